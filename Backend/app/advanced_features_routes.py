@@ -521,14 +521,25 @@ async def predict_price_movements(pair: str, historical_data: List[Dict]):
     return await forex_service.predict_price_movements(pair, historical_data)
 
 
+@router.post("/market/predict-batch")
+async def predict_price_movements_batch(histories: Dict[str, List[Dict]]):
+    """
+    Predict price movements for several pairs with a single Gemini request
+    Body: {"EUR/USD": [{"timestamp": ..., "close": ...}, ...], ...}
+    """
+    from .forex_data_service import forex_service
+    
+    return await forex_service.predict_price_movements_batch(histories)
+
+
 @router.post("/news/analyze-impact")
 async def analyze_news_impact(news: List[Dict], currency_pairs: List[str]):
     """
     Use Google Generative AI (Gemini) to analyze news impact on currency pairs
     """
-    from .services.ai_analysis_service import AIAnalysisService
+    from .services.ai_analysis_service import get_ai_analysis_service
     
-    ai_analysis = AIAnalysisService()
+    ai_analysis = get_ai_analysis_service()
     return await ai_analysis.analyze_news_impact(news, currency_pairs)
 
 
@@ -537,9 +548,9 @@ async def analyze_news_sentiment(news_text: str):
     """
     Use Google Generative AI (Gemini) to analyze sentiment from raw news text
     """
-    from .services.ai_analysis_service import AIAnalysisService
+    from .services.ai_analysis_service import get_ai_analysis_service
     
-    ai_analysis = AIAnalysisService()
+    ai_analysis = get_ai_analysis_service()
     return await ai_analysis.analyze_news_sentiment(news_text)
 
 
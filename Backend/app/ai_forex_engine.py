@@ -4,29 +4,26 @@ Autonomous trading system that works while you sleep
 Integrates with Google Generative AI (Gemini) for intelligent decision-making
 """
 import asyncio
-import aiohttp
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Sequence, Tuple, Any
 import numpy as np
 from dataclasses import dataclass
 import json
 import os
 from dotenv import load_dotenv
 
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
+from .services import indicators
+from .services.batch_analysis import analyze_matrix, build_price_matrices
+from .services.candle_store import candle_store
+from .services.indicators import indicator_engine
+from .services.llm_batch import as_float, compact_series, entries_by_pair, format_table, parse_json_array
+from .services.llm_cache import llm_cache
+from .services.llm_gateway import llm_gateway
+from .services.rates_provider import rates_provider
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_AVAILABLE = bool(GEMINI_API_KEY) and genai is not None
-if GEMINI_AVAILABLE:
-    genai.configure(api_key=GEMINI_API_KEY)
-
 
 @dataclass
 class TradingSignal:
@@ -65,51 +62,22 @@ class ForexAIEngine:
     5. Predictive forecasting
     """
     
+    PAIRS = ("EUR/USD", "GBP/USD", "USD/JPY", "USD/CHF", "AUD/USD", "USD/CAD", "NZD/USD", "EUR/GBP")
+    
     def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
         self.active_positions: Dict[str, Dict] = {}
         self.user_preferences: Dict[str, any] = {}
         
-    async def initialize(self):
-        """Initialize the AI engine"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-    
-    async def close(self):
-        """Close sessions"""
-        if self.session:
-            await self.session.close()
-    
     # ========================================================================
     # REAL-TIME DATA FETCHING
     # ========================================================================
     
     async def fetch_live_rates(self) -> Dict[str, float]:
-        """Fetch real-time forex rates from multiple sources"""
-        try:
-            # Primary source: exchangerate-api.com
-            url = "https://api.exchangerate-api.com/v4/latest/USD"
-            
-            async with self.session.get(url, timeout=10) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    # Calculate major pairs
-                    rates = {
-                        "EUR/USD": 1 / data["rates"]["EUR"],
-                        "GBP/USD": 1 / data["rates"]["GBP"],
-                        "USD/JPY": data["rates"]["JPY"],
-                        "USD/CHF": data["rates"]["CHF"],
-                        "AUD/USD": 1 / data["rates"]["AUD"],
-                        "USD/CAD": data["rates"]["CAD"],
-                        "NZD/USD": 1 / data["rates"]["NZD"],
-                        "EUR/GBP": data["rates"]["GBP"] / data["rates"]["EUR"],
-                    }
-                    
-                    return rates
-        except Exception as e:
-            print(f"Error fetching rates: {e}")
+        """Fetch real-time forex rates from the shared rates provider"""
+        snapshot = await rates_provider.get_snapshot()
+        if snapshot is None:
             return {}
+        return snapshot.rates_for(self.PAIRS)
     
     async def fetch_economic_calendar(self) -> List[Dict]:
         """Fetch economic events from Forex Factory"""
@@ -147,65 +115,41 @@ class ForexAIEngine:
     # TECHNICAL ANALYSIS
     # ========================================================================
     
-    def calculate_rsi(self, prices: List[float], period: int = 14) -> float:
-        """Calculate Relative Strength Index"""
+    def calculate_rsi(self, prices: Sequence[float], period: int = 14) -> float:
+        """Calculate Relative Strength Index (Wilder smoothing)"""
         if len(prices) < period + 1:
             return 50.0
-        
-        deltas = np.diff(prices)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gain = np.mean(gains[:period])
-        avg_loss = np.mean(losses[:period])
-        
-        if avg_loss == 0:
-            return 100.0
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
+        return indicators.rsi(prices, period)
     
-    def calculate_macd(self, prices: List[float]) -> Dict[str, float]:
+    def calculate_macd(self, prices: Sequence[float]) -> Dict[str, float]:
         """Calculate MACD (Moving Average Convergence Divergence)"""
         if len(prices) < 26:
             return {"macd": 0, "signal": 0, "histogram": 0}
-        
-        prices_array = np.array(prices)
-        
-        # Calculate EMAs
-        ema_12 = self._calculate_ema(prices_array, 12)
-        ema_26 = self._calculate_ema(prices_array, 26)
-        
-        macd_line = ema_12 - ema_26
-        signal_line = self._calculate_ema(np.array([macd_line]), 9)
-        histogram = macd_line - signal_line
-        
-        return {
-            "macd": macd_line,
-            "signal": signal_line,
-            "histogram": histogram
-        }
+        return indicators.macd(prices, 12, 26, 9)
     
-    def _calculate_ema(self, prices: np.ndarray, period: int) -> float:
+    def _calculate_ema(self, prices: Sequence[float], period: int) -> float:
         """Calculate Exponential Moving Average"""
-        multiplier = 2 / (period + 1)
-        ema = prices[0]
-        
-        for price in prices[1:]:
-            ema = (price * multiplier) + (ema * (1 - multiplier))
-        
-        return ema
+        ema = indicators.EMA(min(period, len(prices)))
+        for price in prices:
+            ema.update(float(price))
+        return ema.value
     
-    def identify_support_resistance(self, prices: List[float]) -> Tuple[float, float]:
+    def identify_support_resistance(self, prices: Sequence[float]) -> Tuple[float, float]:
         """Identify support and resistance levels"""
-        recent_prices = prices[-50:] if len(prices) > 50 else prices
+        recent_prices = np.asarray(prices[-50:] if len(prices) > 50 else prices, dtype=float)
         
-        support = min(recent_prices)
-        resistance = max(recent_prices)
+        support = float(recent_prices.min())
+        resistance = float(recent_prices.max())
         
         return support, resistance
+
+    def get_price_history(self, pair: str, timeframe: str = "1m", points: int = 100) -> np.ndarray:
+        """Read recent closes for a pair from the shared candle store (zero-copy view)"""
+        return candle_store.closes(pair, timeframe, points)
+
+    def has_live_indicators(self, pair: str, timeframe: str = "1m") -> bool:
+        """True once the streaming indicator state for a pair has enough closed candles"""
+        return indicator_engine.ready(pair, timeframe)
     
     # ========================================================================
     # AI MARKET ANALYSIS
@@ -214,11 +158,20 @@ class ForexAIEngine:
     async def analyze_market_conditions(
         self,
         pair: str,
-        historical_prices: List[float]
+        historical_prices: Optional[Sequence[float]] = None,
+        timeframe: str = "1m",
     ) -> MarketCondition:
         """Comprehensive market analysis using AI"""
         
-        current_price = historical_prices[-1]
+        if historical_prices is None and indicator_engine.ready(pair, timeframe):
+            return self._market_condition_from_indicators(pair, timeframe)
+
+        if historical_prices is None:
+            historical_prices = self.get_price_history(pair, timeframe)
+        if len(historical_prices) == 0:
+            raise ValueError(f"No price history available for {pair}")
+        
+        current_price = float(historical_prices[-1])
         
         # Technical indicators
         rsi = self.calculate_rsi(historical_prices)
@@ -226,15 +179,9 @@ class ForexAIEngine:
         support, resistance = self.identify_support_resistance(historical_prices)
         
         # Trend identification
-        sma_20 = np.mean(historical_prices[-20:])
-        sma_50 = np.mean(historical_prices[-50:]) if len(historical_prices) >= 50 else sma_20
-        
-        if sma_20 > sma_50 and current_price > sma_20:
-            trend = "BULLISH"
-        elif sma_20 < sma_50 and current_price < sma_20:
-            trend = "BEARISH"
-        else:
-            trend = "SIDEWAYS"
+        sma_20 = float(np.mean(historical_prices[-20:]))
+        sma_50 = float(np.mean(historical_prices[-50:])) if len(historical_prices) >= 50 else sma_20
+        trend = self._classify_trend(current_price, sma_20, sma_50)
         
         # Volatility (Standard Deviation)
         volatility = float(np.std(historical_prices[-20:]))
@@ -250,6 +197,95 @@ class ForexAIEngine:
             macd=macd
         )
     
+    def analyze_markets_batch(
+        self,
+        histories: Dict[str, Sequence[float]],
+        horizon_hours: int = 24,
+        include_forecast: bool = True,
+        timeframe: str = "1m",
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze many pairs in one vectorized pass.
+
+        Returns ``{pair: {"condition": MarketCondition, "forecast": dict | None}}``
+        with the same values the per-pair methods produce. Pairs with warm
+        streaming indicators take their conditions from that state; the
+        history matrix is then only needed for the remaining pairs and for
+        forecasts.
+        """
+        live = {pair for pair in histories if self.has_live_indicators(pair, timeframe)}
+        pending = histories if include_forecast else {
+            pair: prices for pair, prices in histories.items() if pair not in live
+        }
+
+        analysis: Dict[str, Dict[str, Any]] = {
+            pair: {"condition": self._market_condition_from_indicators(pair, timeframe), "forecast": None}
+            for pair in live
+        }
+        for pairs, matrix in build_price_matrices(pending):
+            result = analyze_matrix(matrix, horizon_hours)
+            macd = result["macd"]
+            linear = result["linear"]
+            for row, pair in enumerate(pairs):
+                current_price = float(result["current_price"][row])
+                if pair in live:
+                    condition = analysis[pair]["condition"]
+                else:
+                    condition = MarketCondition(
+                        pair=pair,
+                        current_price=current_price,
+                        trend=str(result["trend"][row]),
+                        volatility=float(result["volatility"][row]),
+                        support_level=float(result["support"][row]),
+                        resistance_level=float(result["resistance"][row]),
+                        rsi=float(result["rsi"][row]),
+                        macd={
+                            "macd": float(macd["macd"][row]),
+                            "signal": float(macd["signal"][row]),
+                            "histogram": float(macd["histogram"][row]),
+                        },
+                    )
+                forecast = None
+                if include_forecast:
+                    forecasted_price = float(linear["forecast"][row])
+                    forecast = {
+                        "pair": pair,
+                        "current_price": current_price,
+                        "forecasted_price": forecasted_price,
+                        "expected_change": forecasted_price - current_price,
+                        "expected_change_percent": (forecasted_price - current_price) / current_price * 100,
+                        "confidence": float(linear["r_squared"][row]),
+                        "trend": "UP" if linear["slope"][row] > 0 else "DOWN",
+                        "horizon_hours": horizon_hours,
+                    }
+                analysis[pair] = {"condition": condition, "forecast": forecast}
+        return analysis
+
+    def _classify_trend(self, current_price: float, sma_20: float, sma_50: float) -> str:
+        if sma_20 > sma_50 and current_price > sma_20:
+            return "BULLISH"
+        if sma_20 < sma_50 and current_price < sma_20:
+            return "BEARISH"
+        return "SIDEWAYS"
+
+    def _market_condition_from_indicators(self, pair: str, timeframe: str) -> MarketCondition:
+        """Build market conditions from streaming indicator state (no history recompute)"""
+        state = indicator_engine.get(pair, timeframe)
+        values = state.values()
+        latest = candle_store.latest(pair, timeframe)
+        current_price = latest["close"] if latest else float(values["close"])
+        support, resistance = self.identify_support_resistance(self.get_price_history(pair, timeframe, 50))
+        return MarketCondition(
+            pair=pair,
+            current_price=current_price,
+            trend=self._classify_trend(current_price, values["sma_20"], values["sma_50"]),
+            volatility=float(values["std_20"]),
+            support_level=support,
+            resistance_level=resistance,
+            rsi=float(values["rsi"]),
+            macd=dict(values["macd"]),
+        )
+
     # ========================================================================
     # AI TRADING SIGNALS
     # ========================================================================
@@ -265,11 +301,9 @@ class ForexAIEngine:
         Generate AI-powered trading signal using Google Generative AI (Gemini)
         """
         try:
-            if not GEMINI_AVAILABLE:
-                return self.generate_trading_signal(pair, market_condition, user_strategy)
+            if not llm_gateway.available:
+                return await self.generate_trading_signal(pair, market_condition, user_strategy)
                 
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            
             # Format market conditions for analysis
             condition_text = f"""
             MARKET CONDITIONS FOR {pair}:
@@ -313,13 +347,12 @@ class ForexAIEngine:
             Format your response as JSON.
             """
             
-            response = model.generate_content(prompt)
+            response_text = await llm_cache.generate("trading_signal", prompt, model="gemini-2.0-flash")
             
-            import json
             try:
-                signal_data = json.loads(response.text)
+                signal_data = json.loads(response_text)
             except:
-                return self.generate_trading_signal(pair, market_condition, user_strategy)
+                return await self.generate_trading_signal(pair, market_condition, user_strategy)
                 
             return TradingSignal(
                 pair=pair,
@@ -334,7 +367,127 @@ class ForexAIEngine:
             
         except Exception as e:
             print(f"Gemini signal generation failed: {e}")
-            return self.generate_trading_signal(pair, market_condition, user_strategy)
+            return await self.generate_trading_signal(pair, market_condition, user_strategy)
+
+    async def generate_trading_signals_batch(
+        self,
+        conditions: Dict[str, MarketCondition],
+        user_strategy: Dict,
+        histories: Optional[Dict[str, Sequence[float]]] = None,
+    ) -> Dict[str, TradingSignal]:
+        """
+        Generate Gemini signals for many pairs with one prompt.
+
+        Pairs are sent as rows of a compact table and the reply is a JSON
+        array. Each entry is validated on its own: invalid or missing pairs are
+        retried through the single-pair path, and if the batch call itself
+        fails every pair uses the heuristic signal.
+        """
+        if not conditions:
+            return {}
+        if not llm_gateway.available:
+            return {
+                pair: await self.generate_trading_signal(pair, condition, user_strategy)
+                for pair, condition in conditions.items()
+            }
+
+        histories = histories or {}
+        rows = []
+        for pair, c in conditions.items():
+            rows.append((
+                pair,
+                f"{c.current_price:.5f}",
+                c.trend,
+                f"{c.rsi:.1f}",
+                f"{c.macd['macd']:.6f}",
+                f"{c.macd['histogram']:.6f}",
+                f"{c.volatility:.6f}",
+                f"{c.support_level:.5f}",
+                f"{c.resistance_level:.5f}",
+                compact_series(histories.get(pair, [])[-30:], points=15),
+            ))
+        table = format_table(
+            ("pair", "price", "trend", "rsi", "macd", "hist", "vol", "support", "resistance", "closes_oldest_first"),
+            rows,
+        )
+        prompt = f"""
+        You are an expert forex trading signal generator.
+        
+        Market table (one row per pair):
+        {table}
+        
+        USER STRATEGY: {json.dumps(user_strategy, separators=(",", ":"))}
+        
+        Return ONLY a JSON array with one object per pair:
+        {{"pair": str, "action": "BUY"|"SELL"|"HOLD", "confidence": 0-1,
+          "entry_price": number, "stop_loss": number, "take_profit": number, "reason": str}}
+        """
+
+        try:
+            response_text = await llm_cache.generate("trading_signal", prompt, model="gemini-2.0-flash")
+            entries = entries_by_pair(parse_json_array(response_text), conditions.keys())
+        except Exception as e:
+            print(f"Gemini batch signal generation failed: {e}")
+            return {
+                pair: await self.generate_trading_signal(pair, condition, user_strategy)
+                for pair, condition in conditions.items()
+            }
+
+        signals: Dict[str, TradingSignal] = {}
+        for pair, condition in conditions.items():
+            signal = self._validated_signal(pair, condition, entries.get(pair))
+            if signal is None:
+                history = [
+                    {"timestamp": i, "close": float(price)}
+                    for i, price in enumerate(histories.get(pair, []))
+                ]
+                signal = await self.generate_trading_signal_with_gemini(pair, condition, user_strategy, history)
+            signals[pair] = signal
+        return signals
+
+    def _validated_signal(
+        self,
+        pair: str,
+        condition: MarketCondition,
+        entry: Optional[Dict[str, Any]],
+    ) -> Optional[TradingSignal]:
+        """Turn one batch-response entry into a TradingSignal, or None if it is unusable"""
+        if not entry:
+            return None
+        action = str(entry.get("action", "")).upper()
+        if action not in {"BUY", "SELL", "HOLD"}:
+            return None
+        confidence = as_float(entry.get("confidence"))
+        if confidence is None:
+            return None
+        if 1.0 < confidence <= 100.0:
+            confidence /= 100.0
+        if not 0.0 <= confidence <= 1.0:
+            return None
+
+        price = condition.current_price
+        entry_price = as_float(entry.get("entry_price")) or price
+        stop_loss = as_float(entry.get("stop_loss")) or 0.0
+        take_profit = as_float(entry.get("take_profit")) or 0.0
+        # Reject levels that are nowhere near the market (likely hallucinated or mis-scaled).
+        for level in (entry_price, stop_loss, take_profit):
+            if level and abs(level - price) > price * 0.2:
+                return None
+        if action == "BUY" and stop_loss and take_profit and not stop_loss < entry_price < take_profit:
+            return None
+        if action == "SELL" and stop_loss and take_profit and not take_profit < entry_price < stop_loss:
+            return None
+
+        return TradingSignal(
+            pair=pair,
+            action=action,
+            confidence=confidence,
+            entry_price=entry_price,
+            stop_loss=stop_loss,
+            take_profit=take_profit,
+            reason=str(entry.get("reason") or "AI analysis"),
+            timestamp=datetime.now()
+        )
 
     async def generate_trading_signal(
         self,
@@ -415,11 +568,9 @@ class ForexAIEngine:
         Use Google Generative AI (Gemini) to analyze portfolio performance
         """
         try:
-            if not GEMINI_AVAILABLE:
+            if not llm_gateway.available:
                 return self._get_default_portfolio_analysis(portfolio_data)
                 
-            model = genai.GenerativeModel("gemini-1.5-pro")
-            
             prompt = f"""
             You are an expert portfolio analyst.
             
@@ -438,15 +589,15 @@ class ForexAIEngine:
             Format your response as JSON.
             """
             
-            response = model.generate_content(prompt)
+            response_text = await llm_cache.generate("portfolio_analysis", prompt, model="gemini-1.5-pro")
             
             import json
             try:
-                analysis = json.loads(response.text)
+                analysis = json.loads(response_text)
                 analysis["timestamp"] = datetime.now().isoformat()
             except:
                 analysis = self._get_default_portfolio_analysis(portfolio_data)
-                analysis["ai_analysis"] = response.text
+                analysis["ai_analysis"] = response_text
                 
             return analysis
             
@@ -593,7 +744,7 @@ class ForexAIEngine:
         
         return {
             "pair": pair,
-            "current_price": historical_prices[-1],
+            "current_price": float(historical_prices[-1]),
             "forecasted_price": float(forecasted_price),
             "expected_change": float(forecasted_price - historical_prices[-1]),
             "expected_change_percent": float((forecasted_price - historical_prices[-1]) / historical_prices[-1] * 100),
@@ -8,6 +8,7 @@ from typing import Optional, List, Dict
 from datetime import datetime, timezone
 import uuid
 import asyncio
+import os
 
 from .ai_forex_engine import ai_engine
 from .enhanced_websocket_manager import ws_manager
@@ -18,6 +19,9 @@ router = APIRouter(prefix="/api/tasks", tags=["AI Tasks"])
 
 _task_service = None
 
+# Market-analysis tasks use the heuristic signals unless Gemini signals are opted into
+_LLM_TASK_SIGNALS = (os.getenv("AI_TASK_LLM_SIGNALS") or "").strip().lower() in {"1", "true", "yes", "on"}
+
 
 _activity_logger = None
 
@@ -29,8 +33,7 @@ async def _log_activity(user_id: str, message: str, activity_type: str = "monito
         if _activity_logger is None:
             from .services.engagement_activity_service import EngagementActivityService
             _activity_logger = EngagementActivityService()
-        await asyncio.to_thread(
-            _activity_logger.log_activity,
+        await _activity_logger.log_activity(
             user_id,
             activity_type,
             message,
@@ -41,6 +44,15 @@ async def _log_activity(user_id: str, message: str, activity_type: str = "monito
         print(f"Activity log failed: {exc}")
 
 
+def _historical_prices(pair: str, rates: Dict[str, float], points: int = 100):
+    """Recent closes from the candle store, or a synthetic ramp until enough history exists"""
+    history = ai_engine.get_price_history(pair, points=points)
+    if len(history) >= 50:
+        return history
+    base = rates.get(pair, 1.0)
+    return [base * (1 + (i/1000 - 0.05)) for i in range(points)]
+
+
 def _get_task_service() -> TaskService:
     global _task_service
     if _task_service is None:
@@ -214,7 +226,6 @@ async def execute_market_analysis_task(task_id: str, params: TaskCreateRequest):
             message="Collecting live forex rates and economic calendar..."
         )
         
-        await ai_engine.initialize()
         rates = await ai_engine.fetch_live_rates()
         calendar = await ai_engine.fetch_economic_calendar()
         await _complete_step(task_id, "Fetch Data")
@@ -229,31 +240,30 @@ async def execute_market_analysis_task(task_id: str, params: TaskCreateRequest):
         
         analysis_results = {}
         
+        # Analyze every pair (conditions + forecasts) in one vectorized pass
+        histories = {pair: _historical_prices(pair, rates) for pair in params.currency_pairs}
+        batch = ai_engine.analyze_markets_batch(
+            histories,
+            horizon_hours=params.forecast_horizon_hours,
+            include_forecast=params.include_forecast,
+        )
+        
+        conditions = {pair: analysis["condition"] for pair, analysis in batch.items()}
+        if _LLM_TASK_SIGNALS:
+            # One AI request covers the signals for every pair
+            signals = await ai_engine.generate_trading_signals_batch(conditions, params.user_limits or {}, histories)
+        else:
+            signals = {
+                pair: await ai_engine.generate_trading_signal(pair, condition, params.user_limits or {})
+                for pair, condition in conditions.items()
+            }
+        
         for pair in params.currency_pairs:
-            # Simulate historical prices (in production, fetch from API)
-            historical_prices = [rates.get(pair, 1.0) * (1 + (i/1000 - 0.05)) 
-                                for i in range(100)]
-            
-            # Analyze market conditions
-            market_condition = await ai_engine.analyze_market_conditions(
-                pair, historical_prices
-            )
-            
-            # Generate trading signal
-            signal = await ai_engine.generate_trading_signal(
-                pair, 
-                market_condition,
-                params.user_limits or {}
-            )
-            
-            # Forecast if requested
-            forecast = None
-            if params.include_forecast:
-                forecast = await ai_engine.forecast_price_movement(
-                    pair,
-                    historical_prices,
-                    params.forecast_horizon_hours
-                )
+            if pair not in batch:
+                continue
+            market_condition = batch[pair]["condition"]
+            forecast = batch[pair]["forecast"]
+            signal = signals[pair]
             
             analysis_results[pair] = {
                 "current_price": market_condition.current_price,
@@ -321,8 +331,6 @@ async def execute_market_analysis_task(task_id: str, params: TaskCreateRequest):
     except Exception as e:
         await ws_manager.send_error(task_id, str(e), user_id=params.user_id)
         await _update_task(task_id, status="failed", endTime=_now())
-    finally:
-        await ai_engine.close()
 
 
 async def execute_auto_trading_task(task_id: str, params: TaskCreateRequest):
@@ -333,7 +341,6 @@ async def execute_auto_trading_task(task_id: str, params: TaskCreateRequest):
     
     try:
         await _update_task(task_id, status="running", startTime=_now())
-        await ai_engine.initialize()
         
         await ws_manager.send_task_progress(
             task_id=task_id,
@@ -360,19 +367,19 @@ async def execute_auto_trading_task(task_id: str, params: TaskCreateRequest):
             # Fetch current rates
             rates = await ai_engine.fetch_live_rates()
             
+            # Analyze all tradable pairs in one vectorized pass
+            batch = ai_engine.analyze_markets_batch(
+                {
+                    pair: _historical_prices(pair, rates)
+                    for pair in params.currency_pairs
+                    if pair in rates
+                },
+                include_forecast=False,
+            )
+            
             # Check each pair for trading opportunities
-            for pair in params.currency_pairs:
-                if pair not in rates:
-                    continue
-                
-                # Simulate historical data
-                historical_prices = [rates[pair] * (1 + (j/1000 - 0.05)) 
-                                    for j in range(100)]
-                
-                # Analyze and generate signal
-                market_condition = await ai_engine.analyze_market_conditions(
-                    pair, historical_prices
-                )
+            for pair, analysis in batch.items():
+                market_condition = analysis["condition"]
                 
                 signal = await ai_engine.generate_trading_signal(
                     pair,
@@ -447,8 +454,6 @@ async def execute_auto_trading_task(task_id: str, params: TaskCreateRequest):
     except Exception as e:
         await ws_manager.send_error(task_id, str(e), user_id=params.user_id)
         await _update_task(task_id, status="failed", endTime=_now())
-    finally:
-        await ai_engine.close()
 
 
 async def execute_forecast_task(task_id: str, params: TaskCreateRequest):
@@ -459,7 +464,6 @@ async def execute_forecast_task(task_id: str, params: TaskCreateRequest):
     
     try:
         await _update_task(task_id, status="running", startTime=_now())
-        await ai_engine.initialize()
         
         await ws_manager.send_task_progress(
             task_id=task_id,
@@ -480,18 +484,15 @@ async def execute_forecast_task(task_id: str, params: TaskCreateRequest):
         )
         await _complete_step(task_id, "Train AI Model")
         
+        batch = ai_engine.analyze_markets_batch(
+            {pair: _historical_prices(pair, rates) for pair in params.currency_pairs},
+            horizon_hours=params.forecast_horizon_hours,
+        )
+        
         for pair in params.currency_pairs:
-            # Simulate historical prices
-            historical_prices = [rates.get(pair, 1.0) * (1 + (i/1000 - 0.05)) 
-                                for i in range(100)]
-            
-            # Generate forecast
-            forecast = await ai_engine.forecast_price_movement(
-                pair,
-                historical_prices,
-                params.forecast_horizon_hours
-            )
-            
+            if pair not in batch:
+                continue
+            forecast = batch[pair]["forecast"]
             forecasts[pair] = forecast
             
             await ws_manager.send_update(
@@ -529,8 +530,6 @@ async def execute_forecast_task(task_id: str, params: TaskCreateRequest):
     except Exception as e:
         await ws_manager.send_error(task_id, str(e), user_id=params.user_id)
         await _update_task(task_id, status="failed", endTime=_now())
-    finally:
-        await ai_engine.close()
 
 
 # ============================================================================
@@ -707,9 +706,7 @@ async def delete_task(task_id: str, user_id: str = Depends(get_current_user_id))
 @router.get("/market/live-rates")
 async def get_live_rates():
     """Get current forex rates"""
-    await ai_engine.initialize()
     rates = await ai_engine.fetch_live_rates()
-    await ai_engine.close()
     
     return {
         "timestamp": datetime.now().isoformat(),
@@ -720,9 +717,7 @@ async def get_live_rates():
 @router.get("/market/economic-calendar")
 async def get_economic_calendar():
     """Get upcoming economic events"""
-    await ai_engine.initialize()
     calendar = await ai_engine.fetch_economic_calendar()
-    await ai_engine.close()
     
     return {
         "events": calendar
@@ -65,7 +65,7 @@ async def get_activity_feed(
     cursor: Optional[str] = None,
     user_id: str = Depends(get_current_user_id),
 ):
-    return _get_activity_service().get_activity_feed(user_id=user_id, limit=limit, cursor=cursor)
+    return await _get_activity_service().get_activity_feed(user_id=user_id, limit=limit, cursor=cursor)
 
 
 @router.post("/ai/log-activity", response_model=dict)
@@ -73,12 +73,13 @@ async def log_activity(
     payload: AIActivityCreate,
     user_id: str = Depends(get_current_user_id),
 ):
-    return _get_activity_service().log_activity(
+    return await _get_activity_service().log_activity(
         user_id=user_id,
         activity_type=payload.type,
         message=payload.message,
         emoji=payload.emoji,
         color=payload.color,
+        buffered=False,
     )
 
 
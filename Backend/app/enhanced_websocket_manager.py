@@ -2,12 +2,50 @@
 Enhanced WebSocket Manager with Live Forex Data Integration
 """
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, Set, Optional
+from typing import Any, Dict, Iterable, List, Set, Optional
 import asyncio
+import json
 import uuid
 from datetime import datetime
 import os
 
+from .services.pubsub import create_pubsub
+from .services.ws_codec import JSON, EncodedMessage, epoch_millis
+from .services.ws_outbox import ConnectionOutbox
+from .services.ws_replay import ReplayLog
+
+
+# Topics a client can subscribe to. "forex" is the legacy all-in-one stream
+# payload every connection gets until it subscribes to something explicitly.
+LEGACY_FOREX_TOPIC = "forex"
+NOTIFICATIONS_TOPIC = "notifications"
+STATIC_TOPICS = {LEGACY_FOREX_TOPIC, "rates", "news", "sentiment", NOTIFICATIONS_TOPIC}
+# Snapshot topics: a lagging client only needs the newest queued value
+MARKET_DATA_TOPICS = {LEGACY_FOREX_TOPIC, "rates", "news", "sentiment"}
+
+
+def is_market_data_topic(topic: str) -> bool:
+    return topic in MARKET_DATA_TOPICS or topic.startswith("rates:")
+
+
+def normalize_topic(topic: str) -> Optional[str]:
+    """Canonical topic name (``rates:eurusd`` -> ``rates:EUR/USD``), or None if unknown"""
+    value = str(topic or "").strip()
+    if not value:
+        return None
+    if ":" in value:
+        kind, _, key = value.partition(":")
+        if kind.lower() != "rates":
+            return None
+        pair = key.strip().upper().replace("-", "/").replace(" ", "")
+        if "/" not in pair and len(pair) == 6:
+            pair = f"{pair[:3]}/{pair[3:]}"
+        if len(pair) != 7 or pair[3] != "/":
+            return None
+        return f"rates:{pair}"
+    value = value.lower()
+    return value if value in STATIC_TOPICS else None
+
 
 class EnhancedWebSocketManager:
     """Manages WebSocket connections and broadcasts live forex updates"""
@@ -17,6 +55,25 @@ class EnhancedWebSocketManager:
         self.active_connections: Dict[str, Set[WebSocket]] = {}
         # Store all connections for broadcasts
         self.all_connections: Set[WebSocket] = set()
+        # Topic index: {topic: Set[WebSocket]} and its reverse
+        self.topic_subscribers: Dict[str, Set[WebSocket]] = {}
+        self.connection_topics: Dict[WebSocket, Set[str]] = {}
+        # Connections still on the implicit legacy subscription
+        self._implicit_topics: Set[WebSocket] = set()
+        # Owner of each connection, for per-user delivery (notifications)
+        self.connection_users: Dict[WebSocket, str] = {}
+        self.connection_tasks: Dict[WebSocket, str] = {}
+        # Stable pair -> index map for the fixed-layout binary rate ticks
+        self._pair_ids: Dict[str, int] = {}
+        # Per-connection outbound queues, each drained by its own writer task
+        self._outboxes: Dict[WebSocket, ConnectionOutbox] = {}
+        self._stats = {"messages": 0, "frames": 0, "slow_consumers_dropped": 0, "replayed_frames": 0}
+        # Sequence numbers + bounded per-stream history for ?since= resume
+        self.replay_log = ReplayLog()
+        # Cross-worker backbone: publishers write once, every worker relays
+        # envelopes to the sockets it holds (see services.pubsub)
+        self.bus = create_pubsub()
+        self.bus.handler = self._deliver
         # Track streaming tasks
         self.streaming_tasks: Dict[str, asyncio.Task] = {}
         # Track forex stream interval
@@ -28,31 +85,76 @@ class EnhancedWebSocketManager:
         self.engagement_logging_enabled = os.getenv("ENABLE_ENGAGEMENT_LOGGING", "").lower() != "false"
         self._activity_logger = None
 
-    async def connect(self, websocket: WebSocket, task_id: str = "global"):
-        """Accept a new WebSocket connection"""
-        await websocket.accept()
+    async def connect(
+        self,
+        websocket: WebSocket,
+        task_id: str = "global",
+        user_id: Optional[str] = None,
+        topics: Optional[Iterable[str]] = None,
+        since: Optional[int] = None,
+        encoding: str = JSON,
+        subprotocol: Optional[str] = None,
+    ):
+        """
+        Accept a new WebSocket connection.
+
+        With ``since`` (the last ``seq`` the client saw), missed messages on
+        its streams are replayed right after the welcome message. ``encoding``
+        is the negotiated wire format (see ``services.ws_codec``).
+        """
+        if subprotocol:
+            await websocket.accept(subprotocol=subprotocol)
+        else:
+            await websocket.accept()
+        self._outboxes[websocket] = ConnectionOutbox(websocket, on_failure=self.disconnect, encoding=encoding)
 
         # Add to task-specific connections
         if task_id not in self.active_connections:
             self.active_connections[task_id] = set()
         self.active_connections[task_id].add(websocket)
+        self.connection_tasks[websocket] = task_id
 
         # Add to all connections
         self.all_connections.add(websocket)
+        if user_id:
+            self.connection_users[websocket] = user_id
+
+        # Topic subscriptions: explicit list, or the legacy full stream
+        self.connection_topics[websocket] = set()
+        requested = [topic for topic in (topics or []) if topic]
+        if requested:
+            self.subscribe(websocket, requested)
+        else:
+            self._add_subscription(websocket, LEGACY_FOREX_TOPIC)
+            self._implicit_topics.add(websocket)
+        if user_id:
+            self._add_subscription(websocket, NOTIFICATIONS_TOPIC)
 
         print(f"WebSocket connected for task: {task_id}")
         print(f"Total connections: {len(self.all_connections)}")
 
-        # Send welcome message
-        await self.send_update(
-            task_id=task_id,
-            message=f"Connected to live forex updates for task: {task_id}",
-            update_type="success",
-            websocket=websocket
-        )
-
-    def disconnect(self, websocket: WebSocket, task_id: str = "global"):
+        # Send welcome message (queued without awaiting so nothing published
+        # in between can slip ahead of the replay)
+        self._enqueue(websocket, EncodedMessage({
+            "id": str(uuid.uuid4()),
+            "task_id": task_id,
+            "message": f"Connected to live forex updates for task: {task_id}",
+            "type": "success",
+            "timestamp": datetime.now().isoformat(),
+            "progress": None,
+            "data": {
+                "topics": sorted(self.connection_topics.get(websocket, set())),
+                "seq": self.replay_log.last_seq,
+                "encoding": encoding,
+                "pair_ids": self._pair_ids_for(websocket),
+            },
+        }))
+        if since is not None:
+            self._replay(websocket, task_id, since)
+
+    def disconnect(self, websocket: WebSocket, task_id: Optional[str] = None):
         """Remove a WebSocket connection"""
+        task_id = task_id or self.connection_tasks.get(websocket, "global")
         # Remove from task-specific connections
         if task_id in self.active_connections:
             self.active_connections[task_id].discard(websocket)
@@ -60,10 +162,306 @@ class EnhancedWebSocketManager:
                 del self.active_connections[task_id]
 
         # Remove from all connections
+        was_connected = websocket in self.all_connections
         self.all_connections.discard(websocket)
+        self.connection_tasks.pop(websocket, None)
+        self.connection_users.pop(websocket, None)
+        self._implicit_topics.discard(websocket)
+        outbox = self._outboxes.pop(websocket, None)
+        if outbox is not None:
+            outbox.close()
+        for topic in self.connection_topics.pop(websocket, set()):
+            self._remove_subscription(websocket, topic, forget=False)
+
+        if was_connected:
+            print(f"WebSocket disconnected for task: {task_id}")
+            print(f"Remaining connections: {len(self.all_connections)}")
+
+    # ------------------------------------------------------------------
+    # Sequencing and replay
+    # ------------------------------------------------------------------
+
+    def _streams_for(self, websocket: WebSocket, task_id: str) -> List[str]:
+        streams = ["broadcast"]
+        if task_id != "global":
+            streams.append(f"task:{task_id}")
+        user_id = self.connection_users.get(websocket)
+        for topic in self.connection_topics.get(websocket, set()):
+            if topic == NOTIFICATIONS_TOPIC:
+                if user_id:
+                    streams.append(f"{NOTIFICATIONS_TOPIC}:{user_id}")
+            else:
+                streams.append(topic)
+        return streams
+
+    def _gap_notice(self, stream: str) -> EncodedMessage:
+        return EncodedMessage({
+            "id": str(uuid.uuid4()),
+            "type": "replay_gap",
+            "topic": stream,
+            "message": "Some updates are no longer buffered; refetch current state",
+            "timestamp": datetime.now().isoformat(),
+            "seq": self.replay_log.last_seq,
+        })
+
+    def _replay(self, websocket: WebSocket, task_id: str, since: int) -> None:
+        """
+        Queue what the client missed after ``since``.
+
+        Market-data topics carry full snapshots, so only their newest frame is
+        sent. Ordered streams (task, notifications, broadcast) get every
+        buffered frame, preceded by a ``replay_gap`` notice when some were
+        already evicted. An offset from before a restart (``since`` beyond the
+        current sequence) is treated as a gap on every ordered stream.
+        """
+        outbox = self._outboxes.get(websocket)
+        if outbox is None:
+            return
+        reset = since > self.replay_log.last_seq
+        if reset:
+            since = 0
+        notices: List[EncodedMessage] = []
+        frames: List[tuple] = []
+        for stream in self._streams_for(websocket, task_id):
+            entries, gap = self.replay_log.since(stream, since)
+            if is_market_data_topic(stream):
+                frames.extend(entries[-1:])
+                continue
+            if gap or reset:
+                notices.append(self._gap_notice(stream))
+            frames.extend(entries)
+        frames.sort(key=lambda entry: entry[0])
+        for message in notices + [message for _, message in frames]:
+            outbox.put(message.payload(outbox.encoding), force=True)
+        self._stats["replayed_frames"] += len(frames)
+
+    # ------------------------------------------------------------------
+    # Topic subscriptions
+    # ------------------------------------------------------------------
+
+    def _pair_id(self, pair: str) -> int:
+        pair_id = self._pair_ids.get(pair)
+        if pair_id is None:
+            pair_id = self._pair_ids[pair] = len(self._pair_ids)
+        return pair_id
+
+    def _pair_ids_for(self, websocket: WebSocket) -> Dict[str, int]:
+        """Index of every pair the connection follows (for binary rate ticks)"""
+        pairs = [topic[len("rates:"):] for topic in self.connection_topics.get(websocket, set()) if topic.startswith("rates:")]
+        return {pair: self._pair_id(pair) for pair in sorted(pairs)}
+
+    def _add_subscription(self, websocket: WebSocket, topic: str) -> None:
+        self.topic_subscribers.setdefault(topic, set()).add(websocket)
+        self.connection_topics.setdefault(websocket, set()).add(topic)
+
+    def _remove_subscription(self, websocket: WebSocket, topic: str, forget: bool = True) -> None:
+        subscribers = self.topic_subscribers.get(topic)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self.topic_subscribers[topic]
+        if forget:
+            self.connection_topics.get(websocket, set()).discard(topic)
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]) -> List[str]:
+        """Subscribe a connection to topics; returns the accepted (normalized) topics"""
+        if websocket not in self.all_connections:
+            return []
+        if websocket in self._implicit_topics:
+            # First explicit subscription replaces the implicit legacy stream.
+            self._implicit_topics.discard(websocket)
+            self._remove_subscription(websocket, LEGACY_FOREX_TOPIC)
+        accepted = []
+        for topic in topics:
+            normalized = normalize_topic(topic)
+            if normalized is None:
+                continue
+            if normalized == NOTIFICATIONS_TOPIC and websocket not in self.connection_users:
+                continue
+            self._add_subscription(websocket, normalized)
+            accepted.append(normalized)
+        return accepted
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]) -> List[str]:
+        """Unsubscribe a connection from topics; returns the removed topics"""
+        if websocket in self._implicit_topics:
+            self._implicit_topics.discard(websocket)
+        removed = []
+        for topic in topics:
+            normalized = normalize_topic(topic)
+            if normalized and normalized in self.connection_topics.get(websocket, set()):
+                self._remove_subscription(websocket, normalized)
+                removed.append(normalized)
+        return removed
+
+    async def handle_control_message(self, websocket: WebSocket, raw: str) -> bool:
+        """
+        Handle ``{"action": "subscribe"|"unsubscribe", "topics": [...]}``.
+
+        Returns False when ``raw`` is not a control message so the caller can
+        treat it as ordinary input.
+        """
+        try:
+            payload = json.loads(raw)
+        except (TypeError, ValueError):
+            return False
+        if not isinstance(payload, dict):
+            return False
+        action = str(payload.get("action", "")).lower()
+        if action not in {"subscribe", "unsubscribe"}:
+            return False
+        topics = payload.get("topics") or ([payload["topic"]] if payload.get("topic") else [])
+        if isinstance(topics, str):
+            topics = [topics]
+        if action == "subscribe":
+            changed = self.subscribe(websocket, topics)
+        else:
+            changed = self.unsubscribe(websocket, topics)
+        await self._send_direct(websocket, {
+            "id": str(uuid.uuid4()),
+            "type": f"{action}d",
+            "timestamp": datetime.now().isoformat(),
+            "topics": changed,
+            "subscriptions": sorted(self.connection_topics.get(websocket, set())),
+            "pair_ids": self._pair_ids_for(websocket),
+        })
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        depths = [len(outbox) for outbox in self._outboxes.values()]
+        return {
+            **self._stats,
+            "conflated_frames": sum(outbox.conflated for outbox in self._outboxes.values()),
+            "connections": len(self.all_connections),
+            "topics": len(self.topic_subscribers),
+            "queued_frames": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "encodings": {
+                encoding: sum(1 for outbox in self._outboxes.values() if outbox.encoding == encoding)
+                for encoding in {outbox.encoding for outbox in self._outboxes.values()}
+            },
+            "replay": self.replay_log.get_stats(),
+            "bus": self.bus.get_stats(),
+        }
+
+    def get_topic_counts(self) -> Dict[str, int]:
+        return {topic: len(subscribers) for topic, subscribers in self.topic_subscribers.items()}
+
+    def _enqueue(self, websocket: WebSocket, message: EncodedMessage, conflate_key: Optional[str] = None) -> None:
+        outbox = self._outboxes.get(websocket)
+        if outbox is None:
+            return
+        self._stats["frames"] += 1
+        if not outbox.put(message.payload(outbox.encoding), conflate_key):
+            self._drop_slow_consumer(websocket)
+
+    def _drop_slow_consumer(self, websocket: WebSocket) -> None:
+        """Disconnect a client whose outbox overflowed; it can reconnect and resync"""
+        self._stats["slow_consumers_dropped"] += 1
+        print(f"Dropping slow WebSocket consumer for task: {self.connection_tasks.get(websocket, 'unknown')}")
+        self.disconnect(websocket)
+        asyncio.get_running_loop().create_task(self._close_quietly(websocket, code=1013))
+
+    async def _close_quietly(self, websocket: WebSocket, code: int) -> None:
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def _send_direct(self, websocket: WebSocket, update: dict) -> None:
+        self._stats["messages"] += 1
+        if websocket in self._outboxes:
+            self._enqueue(websocket, EncodedMessage(update))
+            return
+        try:
+            await websocket.send_json(update)
+        except Exception:
+            self.disconnect(websocket)
+
+    async def _send_to(
+        self,
+        connections: Iterable[WebSocket],
+        update: dict,
+        conflate_key: Optional[str] = None,
+        stream: Optional[str] = None,
+        tick: Optional[tuple] = None,
+        seq: Optional[int] = None,
+    ) -> None:
+        # Encode once per wire format; subscribers sharing a format share the payload.
+        # Messages on a stream are numbered and kept for replay even when
+        # nobody is connected right now (that is when they are needed).
+        # Use a copy to avoid issues if the set is modified during iteration
+        connections = list(connections)
+        if stream is None and not connections:
+            return
+        if stream is not None:
+            update["seq"] = seq if seq is not None else self.replay_log.next_seq()
+        message = EncodedMessage(update, tick)
+        if stream is not None:
+            self.replay_log.record(stream, update["seq"], message)
+        if not connections:
+            return
+        self._stats["messages"] += 1
+        for connection in connections:
+            self._enqueue(connection, message, conflate_key)
+
+    # ------------------------------------------------------------------
+    # Publishing (through the bus) and local delivery
+    # ------------------------------------------------------------------
 
-        print(f"WebSocket disconnected for task: {task_id}")
-        print(f"Remaining connections: {len(self.all_connections)}")
+    def _topic_update(self, topic: str, message: str, data: Optional[dict], update_type: str = "info") -> dict:
+        return {
+            "id": str(uuid.uuid4()),
+            "task_id": "broadcast",
+            "topic": topic,
+            "message": message,
+            "type": update_type,
+            "timestamp": datetime.now().isoformat(),
+            "data": data
+        }
+
+    async def _deliver(self, envelope: dict) -> None:
+        """
+        Bus handler: relay one envelope to the sockets held by this worker.
+
+        The envelope's sequence number (assigned by the bus, or locally for
+        the in-process bus) numbers every message derived from it.
+        """
+        seq = envelope.get("seq") or self.replay_log.next_seq()
+        self.replay_log.observe(seq)
+        route = envelope.get("route")
+        update = envelope.get("update") or {}
+        if route == "forex":
+            await self._fan_out_forex(envelope.get("data") or {}, seq)
+        elif route == "topic":
+            await self._publish_local(envelope["topic"], update, seq)
+        elif route == "user":
+            user_id = envelope["user_id"]
+            subscribers = self.topic_subscribers.get(NOTIFICATIONS_TOPIC, set())
+            targets = [ws for ws in subscribers if self.connection_users.get(ws) == user_id]
+            await self._send_to(targets, update, stream=f"{NOTIFICATIONS_TOPIC}:{user_id}", seq=seq)
+        elif route == "task":
+            task_id = envelope["task_id"]
+            await self._send_to(self.active_connections.get(task_id, set()), update, stream=f"task:{task_id}", seq=seq)
+        elif route == "all":
+            await self._send_to(self.all_connections, update, stream="broadcast", seq=seq)
+
+    async def _publish_local(self, topic: str, update: dict, seq: int, tick: Optional[tuple] = None) -> None:
+        subscribers = self.topic_subscribers.get(topic)
+        if not subscribers:
+            return
+        conflate_key = topic if is_market_data_topic(topic) else None
+        await self._send_to(subscribers, update, conflate_key, stream=topic, tick=tick, seq=seq)
+
+    async def publish(self, topic: str, message: str, data: Optional[dict] = None, update_type: str = "info"):
+        """Send an update only to the connections (on any worker) subscribed to ``topic``"""
+        update = self._topic_update(topic, message, data, update_type)
+        await self.bus.publish({"route": "topic", "topic": topic, "update": update})
+
+    async def send_to_user(self, user_id: str, message: str, update_type: str = "info", data: Optional[dict] = None):
+        """Send an update to every connection owned by ``user_id`` that wants notifications"""
+        update = self._topic_update(NOTIFICATIONS_TOPIC, message, data, update_type)
+        await self.bus.publish({"route": "user", "user_id": user_id, "update": update})
 
     async def send_update(
         self,
@@ -97,15 +495,9 @@ class EnhancedWebSocketManager:
 
         try:
             if websocket:
-                await websocket.send_json(update)
-            elif task_id in self.active_connections:
-                # Use a copy to avoid issues if the set is modified during iteration
-                connections = list(self.active_connections[task_id])
-                for connection in connections:
-                    try:
-                        await connection.send_json(update)
-                    except Exception:
-                        self.disconnect(connection, task_id)
+                await self._send_direct(websocket, update)
+            else:
+                await self.bus.publish({"route": "task", "task_id": task_id, "update": update})
         except Exception as e:
             print(f"Error in send_update: {e}")
 
@@ -133,8 +525,7 @@ class EnhancedWebSocketManager:
                 from .services.engagement_activity_service import EngagementActivityService
                 self._activity_logger = EngagementActivityService()
 
-            await asyncio.to_thread(
-                self._activity_logger.log_activity,
+            await self._activity_logger.log_activity(
                 user_id,
                 activity,
                 message,
@@ -174,25 +565,45 @@ class EnhancedWebSocketManager:
             "data": data
         }
 
-        # Use a copy to avoid issues if the set is modified during iteration
-        all_connections_copy = list(self.all_connections)
-        for connection in all_connections_copy:
-            try:
-                await connection.send_json(update)
-            except Exception:
-                # Find which task_id this dead connection belongs to
-                for task_id, web_sockets in self.active_connections.items():
-                    if connection in web_sockets:
-                        self.disconnect(connection, task_id)
-                        break
+        await self.bus.publish({"route": "all", "update": update})
 
     async def send_forex_update(self, forex_data: dict):
-        """Send forex market data to all connected clients"""
-        await self.broadcast(
-            message="Live forex market update received",
-            update_type="info",
-            data=forex_data
-        )
+        """Publish one forex stream tick; each worker fans it out to its own subscribers"""
+        await self.bus.publish({"route": "forex", "data": forex_data})
+
+    async def _fan_out_forex(self, forex_data: dict, seq: int) -> None:
+        """
+        Fan a forex stream tick out by topic.
+
+        ``forex`` subscribers get the full payload (legacy behaviour), while
+        ``rates``, ``rates:<PAIR>``, ``news`` and ``sentiment`` subscribers get
+        only their slice. Topics without subscribers cost nothing.
+        """
+        if self.topic_subscribers.get(LEGACY_FOREX_TOPIC):
+            update = self._topic_update(LEGACY_FOREX_TOPIC, "Live forex market update received", forex_data)
+            await self._publish_local(LEGACY_FOREX_TOPIC, update, seq)
+
+        timestamp = forex_data.get("timestamp")
+        rates = forex_data.get("rates") or {}
+        if rates and self.topic_subscribers.get("rates"):
+            update = self._topic_update("rates", "Live rates update", {"rates": rates, "timestamp": timestamp})
+            await self._publish_local("rates", update, seq)
+        for pair, rate in rates.items():
+            topic = f"rates:{pair}"
+            if self.topic_subscribers.get(topic):
+                # Only mid rates are streamed, so the binary tick has bid == ask.
+                tick = None
+                if isinstance(rate, (int, float)):
+                    tick = (self._pair_id(pair), float(rate), float(rate), epoch_millis(timestamp))
+                update = self._topic_update(topic, f"{pair} rate update", {"pair": pair, "rate": rate, "timestamp": timestamp})
+                await self._publish_local(topic, update, seq, tick=tick)
+
+        if forex_data.get("news") is not None and self.topic_subscribers.get("news"):
+            update = self._topic_update("news", "News update", {"news": forex_data["news"], "timestamp": timestamp})
+            await self._publish_local("news", update, seq)
+        if forex_data.get("sentiment") is not None and self.topic_subscribers.get("sentiment"):
+            update = self._topic_update("sentiment", "Sentiment update", {"sentiment": forex_data["sentiment"], "timestamp": timestamp})
+            await self._publish_local("sentiment", update, seq)
 
     async def send_task_progress(self, task_id: str, step: str, progress: float, message: str):
         """Send task progress update"""
@@ -239,10 +650,20 @@ class EnhancedWebSocketManager:
         """Get the current forex stream interval."""
         return int(self.forex_stream_interval)
 
+    async def start_bus(self):
+        """Connect the cross-worker pub/sub backbone"""
+        await self.bus.start()
+
+    async def stop_bus(self):
+        await self.bus.close()
+
     async def start_forex_stream(self, interval: int = 10):
-        """Start streaming live forex data to all clients"""
-        from .forex_data_service import forex_service
+        """
+        Start streaming live forex data to all clients.
 
+        Every worker runs the election loop, but only the worker holding the
+        bus lease polls upstream; the others just relay what it publishes.
+        """
         interval = int(interval)
         if self.is_forex_stream_running():
             if interval == self.forex_stream_interval:
@@ -251,13 +672,32 @@ class EnhancedWebSocketManager:
             self.stop_forex_stream()
         self.forex_stream_interval = interval
 
-        async def stream_callback(forex_data):
-            await self.send_forex_update(forex_data)
-
-        task = asyncio.create_task(forex_service.stream_live_data(stream_callback, interval))
+        task = asyncio.create_task(self._run_forex_stream(interval))
         self.streaming_tasks["forex_stream"] = task
         print(f"Started forex data stream (interval: {interval}s)")
 
+    async def _run_forex_stream(self, interval: int):
+        from .forex_data_service import forex_service
+
+        lease_seconds = max(interval * 3, 30)
+        poller: Optional[asyncio.Task] = None
+        try:
+            while True:
+                leader = await self.bus.acquire_leadership("forex_stream", lease_seconds)
+                if leader and (poller is None or poller.done()):
+                    if self.bus.backend != "memory":
+                        print(f"Worker {self.bus.worker_id} is now the forex stream leader")
+                    poller = asyncio.create_task(forex_service.stream_live_data(self.send_forex_update, interval))
+                elif not leader and poller is not None:
+                    print("Lost forex stream leadership; stopping upstream poller")
+                    poller.cancel()
+                    poller = None
+                await asyncio.sleep(lease_seconds / 3)
+        finally:
+            if poller is not None:
+                poller.cancel()
+            await self.bus.release_leadership("forex_stream")
+
     def stop_forex_stream(self):
         """Stop the forex data stream"""
         if "forex_stream" in self.streaming_tasks:
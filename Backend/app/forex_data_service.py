@@ -3,47 +3,35 @@ Forex Data Service - Fetches real-time data from multiple sources
 Integrates with Google Generative AI (Gemini) for market analysis and predictions
 """
 import asyncio
-import aiohttp
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 import os
 from dotenv import load_dotenv
 
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
+from .services.candle_store import TIMEFRAMES, candle_store
+from .services.llm_batch import as_float, compact_series, entries_by_pair, format_table, parse_json_array
+from .services.llm_cache import llm_cache, normalize_news, normalize_rates
+from .services.llm_gateway import llm_gateway
+from .services.rates_provider import MAJOR_PAIRS, RatesSnapshot, rates_provider
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_AVAILABLE = bool(GEMINI_API_KEY) and genai is not None
-if GEMINI_AVAILABLE:
-    genai.configure(api_key=GEMINI_API_KEY)
-
 
 class ForexDataService:
     """Service to fetch real-time forex data from multiple sources"""
 
+    PAIRS = ("EUR/USD", "GBP/USD", "USD/JPY", "USD/CHF", "AUD/USD", "USD/CAD", "NZD/USD", "USD/PKR")
+    # Forecast windows in seconds; tuned on ~10s rate ticks and read back as 1m candles
+    FORECAST_LOOKBACK_SECONDS = {"intraday": 80, "1d": 200, "1w": 600}
+    FORECAST_FULL_HISTORY_SECONDS = 400
+
     def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
         self.running = False
         self._latest_rates: Dict[str, float] = {}
-        self._latest_usd_base_rates: Dict[str, float] = {}
-        self._price_history: Dict[str, List[float]] = {}
-
-    async def initialize(self):
-        """Initialize the HTTP session"""
-        if not self.session or self.session.closed:
-            self.session = aiohttp.ClientSession()
-
-    async def close(self):
-        """Close the HTTP session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        self._latest_snapshot: Optional[RatesSnapshot] = None
+        self.candles = candle_store
+        rates_provider.subscribe(self._on_rates_snapshot)
 
     async def get_forex_factory_news(self) -> List[Dict]:
         """
@@ -80,59 +68,32 @@ class ForexDataService:
     async def get_currency_rates(self) -> Dict[str, float]:
         """
         Fetch real-time currency exchange rates
-        Using exchangerate-api.com (free tier)
+        Served from the shared rates provider (exchangerate-api.com, free tier)
         """
-        try:
-            # Free API - no key required for basic usage
-            url = "https://api.exchangerate-api.com/v4/latest/USD"
-
-            if not self.session:
-                await self.initialize()
-
-            async with self.session.get(url, timeout=10) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    rates = data.get("rates", {})
-                    usd_base = {}
-                    for code, value in rates.items():
-                        if isinstance(value, (int, float)) and value > 0:
-                            usd_base[str(code).upper()] = float(value)
-
-                    self._latest_usd_base_rates = usd_base
-
-                    parsed_rates = {
-                        "EUR/USD": (1 / usd_base["EUR"]) if usd_base.get("EUR") else None,
-                        "GBP/USD": (1 / usd_base["GBP"]) if usd_base.get("GBP") else None,
-                        "USD/JPY": usd_base.get("JPY"),
-                        "USD/CHF": usd_base.get("CHF"),
-                        "AUD/USD": (1 / usd_base["AUD"]) if usd_base.get("AUD") else None,
-                        "USD/CAD": usd_base.get("CAD"),
-                        "NZD/USD": (1 / usd_base["NZD"]) if usd_base.get("NZD") else None,
-                        "USD/PKR": usd_base.get("PKR"),
-                    }
-                    clean_rates = {
-                        pair: float(price)
-                        for pair, price in parsed_rates.items()
-                        if isinstance(price, (int, float)) and price > 0
-                    }
-                    if clean_rates:
-                        self._latest_rates = dict(clean_rates)
-                        self._update_price_history(clean_rates)
-                    return clean_rates
-        except Exception as e:
-            print(f"Error fetching currency rates: {e}")
-            if self._latest_rates:
-                return dict(self._latest_rates)
-            return {
-                "EUR/USD": 1.08,
-                "GBP/USD": 1.27,
-                "USD/JPY": 154.0,
-                "USD/CHF": 0.78,
-                "AUD/USD": 0.66,
-                "USD/CAD": 1.37,
-                "NZD/USD": 0.60,
-                "USD/PKR": 279.0,
-            }
+        snapshot = await rates_provider.get_snapshot()
+        if snapshot is not None:
+            self._latest_snapshot = snapshot
+            clean_rates = snapshot.rates_for(self.PAIRS)
+            if clean_rates:
+                self._latest_rates = dict(clean_rates)
+                return clean_rates
+
+        if self._latest_rates:
+            return dict(self._latest_rates)
+        return {
+            "EUR/USD": 1.08,
+            "GBP/USD": 1.27,
+            "USD/JPY": 154.0,
+            "USD/CHF": 0.78,
+            "AUD/USD": 0.66,
+            "USD/CAD": 1.37,
+            "NZD/USD": 0.60,
+            "USD/PKR": 279.0,
+        }
+
+    def _on_rates_snapshot(self, snapshot: RatesSnapshot) -> None:
+        """Fold each new provider snapshot into the candle store exactly once"""
+        self._update_price_history(snapshot.rates_for(MAJOR_PAIRS))
 
     def _normalize_pair(self, pair: str) -> str:
         cleaned = str(pair or "").strip().upper().replace("-", "/").replace(" ", "")
@@ -143,49 +104,37 @@ class ForexDataService:
         return cleaned
 
     def _pair_digits(self, pair: str) -> int:
+        snapshot = self._latest_snapshot
+        if snapshot is not None:
+            digits = snapshot.precision(pair)
+            if digits is not None:
+                return digits
         pair_upper = pair.upper()
         if "JPY" in pair_upper or "PKR" in pair_upper:
             return 2
         return 4
 
     def _update_price_history(self, rates: Dict[str, float]) -> None:
-        for pair, price in rates.items():
-            history = self._price_history.setdefault(pair, [])
-            history.append(float(price))
-            if len(history) > 240:
-                del history[:-240]
+        self.candles.update(rates)
 
     def _derive_pair_from_usd_table(self, pair: str) -> Optional[float]:
-        if "/" not in pair:
-            return None
-        base, quote = pair.split("/", 1)
-        base = base.strip().upper()
-        quote = quote.strip().upper()
-        table = self._latest_usd_base_rates
-        if not table:
+        snapshot = self._latest_snapshot
+        if snapshot is None:
             return None
+        return snapshot.cross(pair)
 
-        if base == quote:
-            return 1.0
-        if base == "USD":
-            value = table.get(quote)
-            return float(value) if isinstance(value, (int, float)) and value > 0 else None
-        if quote == "USD":
-            base_rate = table.get(base)
-            if isinstance(base_rate, (int, float)) and base_rate > 0:
-                return 1.0 / float(base_rate)
-            return None
-
-        base_rate = table.get(base)
-        quote_rate = table.get(quote)
-        if (
-            isinstance(base_rate, (int, float))
-            and isinstance(quote_rate, (int, float))
-            and base_rate > 0
-            and quote_rate > 0
-        ):
-            return float(quote_rate) / float(base_rate)
-        return None
+    async def get_cross_rates(self, pairs: List[str]) -> Dict[str, Any]:
+        """
+        Bulk cross-rate lookup against the current snapshot's matrix.
+        Pairs the table cannot price are listed under ``unavailable``.
+        """
+        snapshot = await rates_provider.get_snapshot()
+        if snapshot is None:
+            return {"rates": {}, "precision": {}, "unavailable": list(pairs), "version": 0}
+        self._latest_snapshot = snapshot
+        result = snapshot.matrix.lookup_many(pairs)
+        result["version"] = snapshot.version
+        return result
 
     def _normalize_horizon(self, horizon: str) -> str:
         value = str(horizon or "").strip().lower()
@@ -210,7 +159,6 @@ class ForexDataService:
                 current_price = float(derived)
                 rates[normalized_pair] = current_price
                 self._latest_rates[normalized_pair] = current_price
-                self._update_price_history({normalized_pair: current_price})
 
         if current_price is None or current_price <= 0:
             raise ValueError(f"Pair {normalized_pair} is not available for forecasting")
@@ -221,18 +169,21 @@ class ForexDataService:
         volatility = str(sentiment.get("volatility", "medium")).lower()
         risk_level = str(sentiment.get("risk_level", "moderate")).lower()
 
-        history = self._price_history.get(normalized_pair, [])
-        lookback = 8 if normalized_horizon == "intraday" else 20 if normalized_horizon == "1d" else 60
+        bar_seconds = TIMEFRAMES["1m"]
+        lookback = max(2, -(-self.FORECAST_LOOKBACK_SECONDS[normalized_horizon] // bar_seconds))
+        history = self.candles.closes(normalized_pair, "1m", lookback)
+        history_length = self.candles.length(normalized_pair, "1m")
         if len(history) >= 2:
-            anchor_price = history[-lookback] if len(history) >= lookback else history[0]
-            latest_prev = history[-2]
+            anchor_price = float(history[0])
+            latest_prev = float(history[-2])
+            latest_price = float(history[-1])
             momentum_pct = (
-                ((history[-1] - anchor_price) / anchor_price) * 100
+                ((latest_price - anchor_price) / anchor_price) * 100
                 if anchor_price
                 else 0.0
             )
             latest_change_pct = (
-                ((history[-1] - latest_prev) / latest_prev) * 100
+                ((latest_price - latest_prev) / latest_prev) * 100
                 if latest_prev
                 else 0.0
             )
@@ -265,7 +216,7 @@ class ForexDataService:
         target_low = current_price * (1 + (expected_low_pct / 100))
         target_high = current_price * (1 + (expected_high_pct / 100))
 
-        history_strength = min(len(history) / 40.0, 1.0)
+        history_strength = min(history_length * bar_seconds / self.FORECAST_FULL_HISTORY_SECONDS, 1.0)
         direction_alignment = (
             1.0 if trend_score == momentum_score and trend_score != 0 else
             0.6 if trend_score == 0 or momentum_score == 0 else
@@ -332,11 +283,9 @@ class ForexDataService:
         Use Google Generative AI (Gemini) to analyze market conditions from real-time data
         """
         try:
-            if not GEMINI_AVAILABLE:
+            if not llm_gateway.available:
                 return self.get_default_sentiment(rates)
                 
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            
             # Format news for analysis
             news_text = "\n".join([
                 f"- {news_item['currency']}: {news_item['event']} (Impact: {news_item['impact']})"
@@ -371,16 +320,22 @@ class ForexDataService:
             Format your response as JSON with clear, actionable insights.
             """
             
-            response = model.generate_content(prompt)
+            # Keyed on pip-rounded rates and news identity, so unchanged markets reuse one answer
+            response_text = await llm_cache.generate(
+                "market_sentiment",
+                prompt,
+                model="gemini-2.0-flash",
+                key_inputs={"rates": normalize_rates(rates, self._pair_digits), "news": normalize_news(news)},
+            )
             
             import json
             try:
-                analysis = json.loads(response.text)
+                analysis = json.loads(response_text)
                 analysis["timestamp"] = datetime.now().isoformat()
                 analysis["major_pairs"] = rates
             except:
                 analysis = self.get_default_sentiment(rates)
-                analysis["ai_analysis"] = response.text
+                analysis["ai_analysis"] = response_text
                 
             return analysis
             
@@ -403,15 +358,13 @@ class ForexDataService:
         Use Google Generative AI (Gemini) to predict future price movements
         """
         try:
-            if not GEMINI_AVAILABLE:
+            if not llm_gateway.available:
                 return {
                     "success": False,
                     "message": "Gemini is unavailable (missing package or API key)",
                     "prediction": None
                 }
                 
-            model = genai.GenerativeModel("gemini-1.5-pro")
-            
             # Format historical data for analysis
             data_text = "\n".join([
                 f"- Time: {data['timestamp']}, Price: {data['close']:.5f}"
@@ -437,11 +390,11 @@ class ForexDataService:
             Format your response as JSON.
             """
             
-            response = model.generate_content(prompt)
+            response_text = await llm_cache.generate("price_prediction", prompt, model="gemini-1.5-pro")
             
             import json
             try:
-                prediction = json.loads(response.text)
+                prediction = json.loads(response_text)
                 prediction["pair"] = pair
                 prediction["timestamp"] = datetime.now().isoformat()
             except:
@@ -468,6 +421,73 @@ class ForexDataService:
                 "prediction": None
             }
 
+    async def predict_price_movements_batch(self, histories: Dict[str, List[Dict]]) -> Dict[str, Dict[str, any]]:
+        """
+        Predict price movements for many pairs with one Gemini prompt.
+        Entries that fail validation are retried through predict_price_movements.
+        """
+        if not histories:
+            return {}
+        if not llm_gateway.available:
+            return {pair: await self.predict_price_movements(pair, data) for pair, data in histories.items()}
+
+        rows = []
+        for pair, data in histories.items():
+            closes = [item["close"] for item in data[-50:] if isinstance(item, dict) and "close" in item]
+            rows.append((pair, len(closes), compact_series(closes, points=25, digits=self._pair_digits(pair) + 1)))
+        table = format_table(("pair", "periods", "closes_oldest_first"), rows)
+        prompt = f"""
+        You are an expert technical analyst specializing in forex price prediction.
+        
+        Recent closes per pair (evenly sampled):
+        {table}
+        
+        Return ONLY a JSON array with one object per pair:
+        {{"pair": str, "direction": "up"|"down"|"sideways", "confidence": 0-100,
+          "support": number, "resistance": number, "timeframe": str, "indicators": [str], "risk": "low"|"medium"|"high"}}
+        """
+
+        try:
+            response_text = await llm_cache.generate("price_prediction", prompt, model="gemini-1.5-pro")
+            entries = entries_by_pair(parse_json_array(response_text), histories.keys())
+        except Exception as e:
+            print(f"Gemini batch prediction failed: {e}")
+            entries = {}
+
+        results: Dict[str, Dict[str, any]] = {}
+        for pair, data in histories.items():
+            prediction = self._validated_prediction(pair, entries.get(pair))
+            if prediction is None:
+                results[pair] = await self.predict_price_movements(pair, data)
+                continue
+            results[pair] = {
+                "success": True,
+                "message": "Prediction generated successfully",
+                "prediction": prediction,
+            }
+        return results
+
+    def _validated_prediction(self, pair: str, entry: Optional[Dict[str, any]]) -> Optional[Dict[str, any]]:
+        if not entry:
+            return None
+        direction = str(entry.get("direction", "")).lower()
+        if direction not in {"up", "down", "sideways"}:
+            return None
+        confidence = as_float(entry.get("confidence"))
+        if confidence is None or not 0 <= confidence <= 100:
+            return None
+        return {
+            "direction": direction,
+            "confidence": confidence,
+            "support": as_float(entry.get("support")),
+            "resistance": as_float(entry.get("resistance")),
+            "timeframe": str(entry.get("timeframe") or "1H"),
+            "indicators": [str(item) for item in entry.get("indicators") or []][:10],
+            "risk": str(entry.get("risk") or "medium"),
+            "pair": pair,
+            "timestamp": datetime.now().isoformat(),
+        }
+
     async def get_market_sentiment(self) -> Dict[str, any]:
         """
         Get market sentiment analysis
@@ -490,14 +510,13 @@ class ForexDataService:
             interval: Update interval in seconds
         """
         self.running = True
-        await self.initialize()
 
         try:
             while self.running:
-                # Fetch all data types
+                # Fetch all data types (one rates snapshot feeds both rates and sentiment)
                 rates = await self.get_currency_rates()
                 news = await self.get_forex_factory_news()
-                sentiment = await self.get_market_sentiment()
+                sentiment = await self.analyze_market_with_gemini(rates, news)
 
                 # Prepare update package
                 update_data = {
@@ -518,7 +537,6 @@ class ForexDataService:
             print("Live data stream cancelled")
         finally:
             self.running = False
-            await self.close()
 
     def stop_streaming(self):
         """Stop the live data stream"""
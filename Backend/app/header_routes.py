@@ -40,7 +40,7 @@ async def get_header(
     claims: Dict[str, Any] = Depends(get_token_claims),
 ):
     user_id = _get_user_id_from_claims(claims)
-    return _get_service().get_header(user_id=user_id, claims=claims)
+    return await _get_service().get_header(user_id=user_id, claims=claims)
 
 
 @router.patch("/header", response_model=HeaderResponse)
@@ -50,7 +50,7 @@ async def update_header(
 ):
     user_id = _get_user_id_from_claims(claims)
     updates = payload.model_dump(exclude_none=True, by_alias=False)
-    return _get_service().update_header(user_id=user_id, updates=updates, claims=claims)
+    return await _get_service().update_header(user_id=user_id, updates=updates, claims=claims)
 
 
 @router.post("/header/stream", response_model=HeaderResponse)
@@ -70,4 +70,4 @@ async def update_header_stream(
     else:
         ws_manager.stop_forex_stream()
 
-    return _get_service().get_header(user_id=user_id, claims=claims)
+    return await _get_service().get_header(user_id=user_id, claims=claims)
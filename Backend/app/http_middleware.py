@@ -0,0 +1,137 @@
+"""
+Single-pass HTTP edge middleware (pure ASGI).
+
+Replaces the separate security-header, body-size, rate-limit and auth
+``@app.middleware("http")`` functions: one path classification per request,
+no per-middleware task or body-stream wrapping, and the security headers are
+built once at startup.
+"""
+import math
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .utils.rate_limiter import RateLimiter
+
+
+Header = Tuple[bytes, bytes]
+
+
+def build_security_headers(enable_csp: bool, enable_hsts: bool) -> List[Header]:
+    headers = [
+        (b"x-content-type-options", b"nosniff"),
+        (b"x-frame-options", b"DENY"),
+        (b"referrer-policy", b"no-referrer"),
+        (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+        (b"cross-origin-opener-policy", b"same-origin"),
+        (b"cross-origin-resource-policy", b"same-origin"),
+    ]
+    if enable_csp:
+        headers.append((b"content-security-policy", b"default-src 'none'; frame-ancestors 'none';"))
+    if enable_hsts:
+        headers.append((b"strict-transport-security", b"max-age=31536000; includeSubDomains"))
+    return headers
+
+
+class EdgeMiddleware:
+    """Auth, rate limit, body-size limit and security headers in one pass"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        verify_request: Callable[[Request], Awaitable[Dict[str, Any]]],
+        rate_limiter: Optional[RateLimiter] = None,
+        rate_limit_exempt: Iterable[str] = (),
+        max_body_bytes: int = 1_048_576,
+        enable_csp: bool = True,
+        enable_hsts: bool = True,
+    ):
+        self.app = app
+        self.verify_request = verify_request
+        self.rate_limiter = rate_limiter
+        self.rate_limit_exempt = frozenset(rate_limit_exempt)
+        self.max_body_bytes = max_body_bytes
+        self.headers = build_security_headers(enable_csp, enable_hsts)
+        self.api_headers = self.headers + [(b"cache-control", b"no-store")]
+        self._header_names = frozenset(name for name, _ in self.api_headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        method = scope["method"]
+        is_api = path.startswith("/api")
+        extra_headers = self.api_headers if is_api else self.headers
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Same semantics as ``response.headers[name] = value``: ours win.
+                headers = [
+                    (name, value) for name, value in message.get("headers", [])
+                    if name.lower() not in self._header_names
+                ]
+                message["headers"] = headers + extra_headers
+            await send(message)
+
+        claims = None
+        if is_api and method != "OPTIONS":
+            try:
+                claims = await self.verify_request(Request(scope))
+            except Exception as exc:
+                status_code = getattr(exc, "status_code", 401)
+                detail = getattr(exc, "detail", "Unauthorized")
+                await self._reject(status_code, detail, scope, receive, send_with_headers)
+                return
+            # Dependencies (get_token_claims / get_current_user_id) reuse these
+            scope.setdefault("state", {})["auth_claims"] = claims
+
+        if self.rate_limiter is not None and path not in self.rate_limit_exempt and not path.startswith("/docs"):
+            client = scope.get("client")
+            user_id = (claims.get("uid") or claims.get("user_id")) if claims else None
+            allowed, retry_after = await self.rate_limiter.check(
+                f"ip:{client[0] if client else 'unknown'}",
+                f"user:{user_id}" if user_id else None,
+            )
+            if not allowed:
+                retry_header = [(b"retry-after", str(max(1, math.ceil(retry_after))).encode())]
+                await self._reject(429, "Rate limit exceeded", scope, receive, send_with_headers, retry_header)
+                return
+
+        if is_api and method in {"POST", "PUT", "PATCH"}:
+            content_length = self._header(scope, b"content-length")
+            if content_length:
+                try:
+                    too_large = int(content_length) > self.max_body_bytes
+                except ValueError:
+                    await self._reject(400, "Invalid Content-Length header", scope, receive, send_with_headers)
+                    return
+                if too_large:
+                    await self._reject(413, "Request payload too large", scope, receive, send_with_headers)
+                    return
+
+        await self.app(scope, receive, send_with_headers)
+
+    @staticmethod
+    def _header(scope: Scope, name: bytes) -> str:
+        for key, value in scope.get("headers", []):
+            if key == name:
+                return value.decode("latin-1")
+        return ""
+
+    @staticmethod
+    async def _reject(
+        status_code: int,
+        detail: Any,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        headers: Optional[List[Header]] = None,
+    ) -> None:
+        response = JSONResponse(status_code=status_code, content={"detail": detail})
+        if headers:
+            response.raw_headers.extend(headers)
+        await response(scope, receive, send)
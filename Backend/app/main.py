@@ -2,14 +2,11 @@
 Forex Companion - Complete FastAPI Application
 """
 from pathlib import Path
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from contextlib import asynccontextmanager
 import os
-import time
-from collections import defaultdict, deque
 from dotenv import load_dotenv
 
 # Load environment variables from Backend/.env if present
@@ -35,7 +32,7 @@ def _env_int(name: str, default: int) -> int:
 
 # Import routers
 from .users import router as users_router
-from .websocket_routes import router as websocket_router
+from .websocket_routes import router as websocket_router, ws_connect_limiter
 from .engagement_routes import router as engagement_router
 from .auth_status_routes import router as auth_status_router
 from .header_routes import router as header_router
@@ -78,7 +75,20 @@ except ImportError:
     print("??  Credential vault routes not available")
 
 from .enhanced_websocket_manager import ws_manager
+from .services.activity_buffer import activity_buffer
+from .services.inference_batcher import lstm_predictor
+from .services.llm_cache import llm_cache
+from .services.llm_gateway import llm_gateway
+from .services.model_registry import model_registry
+from .services.notification_counter import unread_counter
+from .services.rates_provider import RATES_ENDPOINT, rates_provider
+from .services.user_cache import user_cache
 from .utils.firestore_client import get_firebase_config_status, init_firebase
+from .utils.firestore_repository import firestore_repo
+from .utils.http_clients import http_clients
+from .utils.rate_limiter import RateLimiter, rate_limit_store
+from .utils.token_cache import token_cache
+from .http_middleware import EdgeMiddleware
 from .security import verify_http_request
 
 
@@ -109,7 +119,19 @@ async def lifespan(app: FastAPI):
         print(f"[Firebase] Startup check failed: {exc}")
         if os.getenv("REQUIRE_FIREBASE", "").lower() == "true":
             raise
-    
+
+    # Pooled upstream HTTP clients live for the whole app lifetime
+    await http_clients.startup([RATES_ENDPOINT])
+
+    # Load ML models off the event loop so the first analysis request doesn't pay for it
+    if _env_bool("MODEL_PRELOAD", True):
+        model_registry.preload_in_background()
+
+    # Cross-worker WebSocket fan-out (in-process unless PUBSUB_URL is set)
+    await ws_manager.start_bus()
+    # Cross-worker invalidation of cached per-user documents
+    await user_cache.start()
+
     forex_stream_enabled = os.getenv("FOREX_STREAM_ENABLED", "true").lower() == "true"
     if forex_stream_enabled:
         await ws_manager.start_forex_stream(interval=10)
@@ -118,6 +140,13 @@ async def lifespan(app: FastAPI):
 
     if forex_stream_enabled:
         ws_manager.stop_forex_stream()
+    await ws_manager.stop_bus()
+    await user_cache.stop()
+    # Write out buffered activity before the Firestore pool goes away
+    await activity_buffer.stop()
+    await lstm_predictor.close()
+    await http_clients.close()
+    firestore_repo.shutdown(wait=False)
     print("? Shutdown complete")
 
 
@@ -128,89 +157,25 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Security headers middleware
-@app.middleware("http")
-async def security_headers_middleware(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["Referrer-Policy"] = "no-referrer"
-    response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-    response.headers["Cross-Origin-Opener-Policy"] = "same-origin"
-    response.headers["Cross-Origin-Resource-Policy"] = "same-origin"
-    if _env_bool("ENABLE_CSP", True):
-        response.headers["Content-Security-Policy"] = "default-src 'none'; frame-ancestors 'none';"
-    if _env_bool("ENABLE_HSTS", not _env_bool("DEBUG", False)):
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    if request.url.path.startswith("/api"):
-        response.headers["Cache-Control"] = "no-store"
-    return response
-
-# Rate limiting middleware (simple in-memory)
+# Security headers, auth, rate limit and body-size checks in one ASGI pass
 _rate_limit_enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
-_rate_limit_max = int(os.getenv("RATE_LIMIT_MAX", "120"))
-_rate_limit_window = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
-_rate_limit_store = defaultdict(deque)
+_http_rate_limiter = RateLimiter(
+    "http",
+    limit=int(os.getenv("RATE_LIMIT_MAX", "120")),
+    window_seconds=int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60")),
+)
 _rate_limit_exempt = {"/", "/health", "/api/health", "/docs", "/openapi.json", "/redoc"}
 _max_request_body_bytes = _env_int("MAX_REQUEST_BODY_BYTES", 1_048_576)
 
-
-@app.middleware("http")
-async def request_size_limit_middleware(request: Request, call_next):
-    if request.method in {"POST", "PUT", "PATCH"} and request.url.path.startswith("/api"):
-        content_length = request.headers.get("content-length")
-        if content_length:
-            try:
-                if int(content_length) > _max_request_body_bytes:
-                    return JSONResponse(
-                        status_code=413,
-                        content={"detail": "Request payload too large"},
-                    )
-            except ValueError:
-                return JSONResponse(
-                    status_code=400,
-                    content={"detail": "Invalid Content-Length header"},
-                )
-    return await call_next(request)
-
-@app.middleware("http")
-async def rate_limit_middleware(request: Request, call_next):
-    if not _rate_limit_enabled:
-        return await call_next(request)
-
-    path = request.url.path
-    if path in _rate_limit_exempt or path.startswith("/docs"):
-        return await call_next(request)
-
-    client_host = request.client.host if request.client else "unknown"
-    now = time.time()
-    window_start = now - _rate_limit_window
-    bucket = _rate_limit_store[client_host]
-    while bucket and bucket[0] <= window_start:
-        bucket.popleft()
-    if len(bucket) >= _rate_limit_max:
-        return JSONResponse(
-            status_code=429,
-            content={"detail": "Rate limit exceeded"},
-        )
-    bucket.append(now)
-    return await call_next(request)
-
-@app.middleware("http")
-async def strict_auth_middleware(request: Request, call_next):
-    if request.method == "OPTIONS":
-        return await call_next(request)
-
-    path = request.url.path
-    if path.startswith("/api"):
-        try:
-            await verify_http_request(request)
-        except Exception as exc:
-            status_code = getattr(exc, "status_code", 401)
-            detail = getattr(exc, "detail", "Unauthorized")
-            return JSONResponse(status_code=status_code, content={"detail": detail})
-
-    return await call_next(request)
+app.add_middleware(
+    EdgeMiddleware,
+    verify_request=verify_http_request,
+    rate_limiter=_http_rate_limiter if _rate_limit_enabled else None,
+    rate_limit_exempt=_rate_limit_exempt,
+    max_body_bytes=_max_request_body_bytes,
+    enable_csp=_env_bool("ENABLE_CSP", True),
+    enable_hsts=_env_bool("ENABLE_HSTS", not _env_bool("DEBUG", False)),
+)
 
 # CORS
 def _get_cors_origins():
@@ -331,3 +296,28 @@ async def api_health():
         "connections": ws_manager.get_connection_count(),
         "firebase": firebase_status,
     }
+
+
+@app.get("/api/health/metrics")
+async def api_health_metrics():
+    """Runtime counters for shared upstream clients, caches and model queues."""
+    return {
+        "status": "healthy",
+        "rates_provider": rates_provider.get_stats(),
+        "http_clients": http_clients.get_stats(),
+        "models": model_registry.status(),
+        "inference": {"lstm_forex": lstm_predictor.get_stats()},
+        "llm": llm_gateway.get_stats(),
+        "llm_cache": llm_cache.get_stats(),
+        "websocket": ws_manager.get_stats(),
+        "auth_cache": token_cache.get_stats(),
+        "firestore": firestore_repo.get_stats(),
+        "notification_counter": unread_counter.get_stats(),
+        "activity_buffer": activity_buffer.get_stats(),
+        "user_cache": user_cache.get_stats(),
+        "rate_limits": {
+            "store": rate_limit_store.get_stats(),
+            "http": _http_rate_limiter.get_stats(),
+            "ws_connect": ws_connect_limiter.get_stats(),
+        },
+    }
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -45,10 +45,20 @@ class AutonomousStudyRequest(BaseModel):
 @router.get("")
 async def list_notifications(
     unread_only: bool = False,
+    unread: Optional[bool] = None,
     limit: int = 20,
+    cursor: Optional[str] = None,
     user_id: str = Depends(get_current_user_id),
 ):
-    return await _get_service().get_notifications(user_id=user_id, unread_only=unread_only, limit=limit)
+    try:
+        return await _get_service().list_notifications(
+            user_id=user_id,
+            limit=limit,
+            cursor=cursor,
+            unread_only=unread if unread is not None else unread_only,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 @router.post("/{notification_id}/read")
@@ -41,7 +41,6 @@ class HeaderUpdateRequest(BaseModel):
     risk_level: Optional[str] = Field(default=None, alias="riskLevel")
     balance_amount: Optional[float] = Field(default=None, alias="balanceAmount")
     balance_currency: Optional[str] = Field(default=None, alias="balanceCurrency")
-    notifications_unread: Optional[int] = Field(default=None, alias="notificationsUnread")
 
 
 class HeaderStreamUpdateRequest(BaseModel):
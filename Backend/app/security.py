@@ -5,7 +5,7 @@ from typing import Optional, Dict, Any
 from fastapi import Depends, HTTPException, Request, status
 from starlette.requests import HTTPConnection
 
-from .utils.firestore_client import verify_firebase_token
+from .utils.token_cache import verify_firebase_token_cached
 
 
 _USER_ID_RE = re.compile(r"^[A-Za-z0-9_-]{3,128}$")
@@ -77,6 +77,11 @@ def resolve_dev_user(connection: HTTPConnection) -> Optional[str]:
 async def get_token_claims(
     connection: HTTPConnection,
 ) -> Dict[str, Any]:
+    # Already verified by strict_auth_middleware for this request
+    claims = connection.scope.get("state", {}).get("auth_claims")
+    if claims is not None:
+        return claims
+
     dev_user = resolve_dev_user(connection)
     if dev_user:
         return _dev_claims(dev_user)
@@ -89,7 +94,7 @@ async def get_token_claims(
         )
 
     try:
-        return verify_firebase_token(token)
+        return verify_firebase_token_cached(token)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -131,7 +136,7 @@ async def verify_http_request(request: Request) -> Dict[str, Any]:
         )
 
     try:
-        return verify_firebase_token(token)
+        return verify_firebase_token_cached(token)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
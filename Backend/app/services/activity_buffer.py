@@ -0,0 +1,153 @@
+"""
+Write-behind buffer for ``ai_activity`` records.
+
+Every non-progress WebSocket update and AI task step used to cost one
+Firestore write. Records are now queued in memory (document ids are
+generated client-side, so callers still get one back immediately) and
+written in WriteBatch commits of up to 500: every ACTIVITY_FLUSH_INTERVAL_MS,
+or as soon as ACTIVITY_FLUSH_BATCH_SIZE records are waiting. The queue is
+capped at ACTIVITY_BUFFER_MAX (oldest records are dropped and counted), a
+failed commit is put back and retried on the next flush, and ``stop()``
+drains whatever is left at shutdown.
+"""
+import asyncio
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ..utils.firestore_repository import MAX_BATCH_WRITES, FirestoreRepository, firestore_repo
+
+
+ACTIVITY_COLLECTION = "ai_activity"
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed > 0 else default
+
+
+class ActivityWriteBuffer:
+    """Bounded queue of pending activity documents flushed by one background task"""
+
+    def __init__(
+        self,
+        repo: FirestoreRepository = firestore_repo,
+        collection: str = ACTIVITY_COLLECTION,
+        flush_interval_ms: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self.repo = repo
+        self.collection = collection
+        self.flush_interval = int(flush_interval_ms or _env_int("ACTIVITY_FLUSH_INTERVAL_MS", 500)) / 1000
+        self.batch_size = min(int(batch_size or _env_int("ACTIVITY_FLUSH_BATCH_SIZE", MAX_BATCH_WRITES)), MAX_BATCH_WRITES)
+        self.max_pending = int(max_pending or _env_int("ACTIVITY_BUFFER_MAX", 10000))
+        self._pending: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._failing = False
+        self._stats = {"queued": 0, "written": 0, "commits": 0, "failed_commits": 0, "dropped": 0}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, payload: Dict[str, Any]) -> str:
+        """Queue one document and return its id; starts the flusher on first use"""
+        doc_id = self.repo.collection(self.collection).document().id
+        self._pending.append((doc_id, payload))
+        self._stats["queued"] += 1
+        while len(self._pending) > self.max_pending:
+            self._pending.popleft()
+            self._stats["dropped"] += 1
+        self.start()
+        if len(self._pending) >= self.batch_size and self._wake is not None:
+            self._wake.set()
+        return doc_id
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+                self._failing = False
+            except Exception as exc:
+                if not self._failing:
+                    print(f"[Activity] Flush failed, will retry: {exc}")
+                self._failing = True
+
+    async def flush(self) -> int:
+        """Commit everything queued right now in batches; returns documents written"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        written = 0
+        async with self._flush_lock:
+            rounds = -(-len(self._pending) // self.batch_size)
+            for _ in range(rounds):
+                if not self._pending:
+                    break
+                batch: List[Tuple[str, Dict[str, Any]]] = []
+                while self._pending and len(batch) < self.batch_size:
+                    batch.append(self._pending.popleft())
+                try:
+                    await self.repo.batch_set(self.collection, batch)
+                except BaseException:
+                    # Also on cancellation mid-commit: ids are fixed, so a retried set is idempotent
+                    self._stats["failed_commits"] += 1
+                    room = max(self.max_pending - len(self._pending), 0)
+                    self._pending.extendleft(reversed(batch[:room]))
+                    self._stats["dropped"] += len(batch) - min(room, len(batch))
+                    raise
+                self._stats["commits"] += 1
+                self._stats["written"] += len(batch)
+                written += len(batch)
+        return written
+
+    async def stop(self) -> None:
+        """Stop the flusher and drain the queue"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            try:
+                await self.flush()
+            except Exception as exc:
+                print(f"[Activity] {len(self._pending)} records not written at shutdown: {exc}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+        }
+
+
+# Shared by the WebSocket manager, AI task routes and engagement service
+activity_buffer = ActivityWriteBuffer()
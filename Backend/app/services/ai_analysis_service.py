@@ -1,28 +1,39 @@
 # app/services/ai_analysis_service.py
-import pandas as pd
+from __future__ import annotations
+
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
-import pandas_ta as ta
-from sklearn.preprocessing import MinMaxScaler
-from tensorflow import keras
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
 import requests
 import os
 from dotenv import load_dotenv
 
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
+from .candle_store import candle_store
+from .inference_batcher import lstm_predictor
+from .llm_cache import llm_cache, normalize_news
+from .llm_gateway import llm_gateway
+from .model_registry import model_registry
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_AVAILABLE = bool(GEMINI_API_KEY) and genai is not None
-if GEMINI_AVAILABLE:
-    genai.configure(api_key=GEMINI_API_KEY)
+
+# pandas / pandas-ta / scikit-learn take seconds to import, so they are pulled
+# in on first use rather than when this module is imported.
+def _pandas():
+    import pandas
+
+    return pandas
+
+
+def _pandas_ta():
+    import pandas_ta
+
+    return pandas_ta
+
 
 class AIAnalysisService:
     """
@@ -34,29 +45,50 @@ class AIAnalysisService:
     """
     
     def __init__(self):
-        self.scaler = MinMaxScaler()
-        self.lstm_model = None
-        self.load_models()
+        self._scaler = None
+
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            from sklearn.preprocessing import MinMaxScaler
+
+            self._scaler = MinMaxScaler()
+        return self._scaler
+
+    @property
+    def lstm_model(self):
+        """Shared LSTM model if already loaded (non-blocking; ``predict_next_close`` loads on demand)"""
+        return model_registry.peek("lstm_forex")
         
     def load_models(self):
-        """Load pre-trained ML models"""
-        try:
-            # Load LSTM model for price prediction
-            if os.path.exists('models/lstm_forex.h5'):
-                self.lstm_model = keras.models.load_model('models/lstm_forex.h5')
-        except Exception as e:
-            print(f"Model loading error: {e}")
+        """Load pre-trained ML models (once per process, via the model registry)"""
+        return model_registry.get("lstm_forex")
+
+    async def predict_next_close(self, pair: str, timeframe: str = "1h", lookback: int = 60) -> Optional[float]:
+        """
+        LSTM next-close prediction from the candle store.
+        Requests go through the shared micro-batching queue; None without a model or enough history.
+        The model is loaded on first use if startup preloading is off.
+        """
+        if await model_registry.get_async("lstm_forex") is None:
+            return None
+        closes = candle_store.closes(pair, timeframe, lookback)
+        if len(closes) < lookback:
+            return None
+        low, high = float(closes.min()), float(closes.max())
+        span = (high - low) or 1.0
+        scaled = ((closes - low) / span).reshape(lookback, 1)
+        output = await lstm_predictor.predict(scaled)
+        return low + float(np.ravel(output)[0]) * span
     
     async def analyze_news_impact(self, news: List[Dict], currency_pairs: List[str]) -> Dict[str, Any]:
         """
         Use Google Generative AI (Gemini) to analyze news impact on currency pairs
         """
         try:
-            if not GEMINI_AVAILABLE:
+            if not llm_gateway.available:
                 return self._get_default_news_analysis(news, currency_pairs)
                 
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            
             # Format news for analysis
             news_text = "\n".join([
                 f"- {news_item['time']}: {news_item['currency']} - {news_item['event']} (Impact: {news_item['impact']})"
@@ -85,15 +117,20 @@ class AIAnalysisService:
             Format your response as JSON.
             """
             
-            response = model.generate_content(prompt)
+            response_text = await llm_cache.generate(
+                "news_impact",
+                prompt,
+                model="gemini-2.0-flash",
+                key_inputs={"news": normalize_news(news), "pairs": sorted(currency_pairs)},
+            )
             
             import json
             try:
-                analysis = json.loads(response.text)
+                analysis = json.loads(response_text)
                 analysis["timestamp"] = datetime.now().isoformat()
             except:
                 analysis = self._get_default_news_analysis(news, currency_pairs)
-                analysis["ai_analysis"] = response.text
+                analysis["ai_analysis"] = response_text
                 
             return analysis
             
@@ -129,11 +166,9 @@ class AIAnalysisService:
         Use Google Generative AI (Gemini) to analyze sentiment from raw news text
         """
         try:
-            if not GEMINI_AVAILABLE:
+            if not llm_gateway.available:
                 return self._get_default_sentiment_analysis()
                 
-            model = genai.GenerativeModel("gemini-1.5-pro")
-            
             prompt = f"""
             You are an expert financial news sentiment analyzer.
             
@@ -152,15 +187,15 @@ class AIAnalysisService:
             Format your response as JSON.
             """
             
-            response = model.generate_content(prompt)
+            response_text = await llm_cache.generate("news_sentiment", prompt, model="gemini-1.5-pro")
             
             import json
             try:
-                sentiment = json.loads(response.text)
+                sentiment = json.loads(response_text)
                 sentiment["timestamp"] = datetime.now().isoformat()
             except:
                 sentiment = self._get_default_sentiment_analysis()
-                sentiment["ai_analysis"] = response.text
+                sentiment["ai_analysis"] = response_text
                 
             return sentiment
             
@@ -184,22 +219,48 @@ class AIAnalysisService:
         """Check if service is operational"""
         return True
     
+    def _frame_from_store(self, pair: str, timeframe: str = "1h", points: int = 200) -> pd.DataFrame:
+        """Wrap candle store column views in a DataFrame without copying them"""
+        columns = candle_store.candles(pair, timeframe, points)
+        if len(columns["close"]) == 0:
+            raise ValueError(f"No candles available for {pair} ({timeframe})")
+        pd = _pandas()
+        return pd.DataFrame(
+            {
+                "open": columns["open"],
+                "high": columns["high"],
+                "low": columns["low"],
+                "close": columns["close"],
+                "volume": columns["ticks"],
+            },
+            index=pd.to_datetime(columns["timestamp"], unit="s"),
+            copy=False,
+        )
+
     async def analyze_market(
         self, 
-        market_data: pd.DataFrame,
-        depth: str = "detailed"
+        market_data: Optional[pd.DataFrame] = None,
+        depth: str = "detailed",
+        pair: Optional[str] = None,
+        timeframe: str = "1h",
     ) -> Dict[str, Any]:
         """
         Comprehensive market analysis
         
         Args:
-            market_data: DataFrame with OHLCV data
+            market_data: DataFrame with OHLCV data (read from the candle store when omitted)
             depth: quick, detailed, or deep
+            pair: Pair to read from the candle store when market_data is omitted
+            timeframe: Candle store timeframe (1m, 5m, 1h, 1d)
             
         Returns:
             Complete analysis report
         """
         
+        if market_data is None:
+            if not pair:
+                raise ValueError("Either market_data or pair is required")
+            market_data = self._frame_from_store(pair, timeframe)
         df = market_data.copy()
         
         # Calculate technical indicators
@@ -238,11 +299,13 @@ class AIAnalysisService:
             "risk_level": recommendation["risk_level"],
             "entry_suggestions": recommendation["entry_points"],
             "stop_loss_suggestions": recommendation["stop_loss"],
-            "take_profit_suggestions": recommendation["take_profit"]
+            "take_profit_suggestions": recommendation["take_profit"],
+            "model_forecast": await self.predict_next_close(pair, timeframe) if pair else None,
         }
     
     def _calculate_indicators(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Calculate comprehensive technical indicators"""
+        ta = _pandas_ta()
         
         # RSI
         df['rsi'] = ta.rsi(df['close'], length=14)
@@ -321,6 +384,7 @@ class AIAnalysisService:
     
     def _detect_patterns(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """Detect candlestick and chart patterns"""
+        ta = _pandas_ta()
         patterns = []
         
         # Candlestick patterns
@@ -687,3 +751,14 @@ class AIAnalysisService:
             return round(bb_middle + (3 * atr), 5)
         else:
             return round(bb_middle - (3 * atr), 5)
+
+
+_shared_service: Optional[AIAnalysisService] = None
+
+
+def get_ai_analysis_service() -> AIAnalysisService:
+    """Process-wide AIAnalysisService instance for request handlers"""
+    global _shared_service
+    if _shared_service is None:
+        _shared_service = AIAnalysisService()
+    return _shared_service
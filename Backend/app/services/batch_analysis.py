@@ -0,0 +1,144 @@
+"""
+Batched technical analysis over a (pairs × time) price matrix.
+
+Every indicator is computed for all pairs at once: window statistics and the
+linear-trend fit are plain axis reductions, and the recursive indicators
+(Wilder RSI, EMA/MACD) step through time once with pair-wide vector updates.
+Analyzing N pairs therefore costs about the same as analyzing one. Pairs are
+stacked with others of the same history length, so a newly listed pair with
+a short history never shrinks the window used for the rest.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+
+MIN_POINTS = 10
+
+
+def build_price_matrices(histories: Mapping[str, Sequence[float]]) -> List[Tuple[list, np.ndarray]]:
+    """
+    Stack per-pair histories into float64 matrices, oldest column first.
+
+    Pairs are grouped by history length (one matrix per distinct length), so
+    every pair keeps its full window; histories shorter than MIN_POINTS are
+    skipped.
+    """
+    groups: Dict[int, list] = {}
+    for pair, prices in histories.items():
+        if len(prices) >= MIN_POINTS:
+            groups.setdefault(len(prices), []).append(pair)
+    matrices = []
+    for length, pairs in groups.items():
+        matrix = np.empty((len(pairs), length), dtype=np.float64)
+        for row, pair in enumerate(pairs):
+            matrix[row] = np.asarray(histories[pair], dtype=np.float64)
+        matrices.append((pairs, matrix))
+    return matrices
+
+
+def _ema(prices: np.ndarray, period: int) -> np.ndarray:
+    """Final EMA per row, seeded with the SMA of the first ``period`` columns"""
+    period = min(period, prices.shape[1])
+    alpha = 2.0 / (period + 1)
+    ema = prices[:, :period].mean(axis=1)
+    for t in range(period, prices.shape[1]):
+        ema += alpha * (prices[:, t] - ema)
+    return ema
+
+
+def _ema_series(prices: np.ndarray, period: int) -> np.ndarray:
+    """EMA per row at every column from ``period - 1`` onwards"""
+    alpha = 2.0 / (period + 1)
+    out = np.empty((prices.shape[0], prices.shape[1] - period + 1), dtype=np.float64)
+    out[:, 0] = prices[:, :period].mean(axis=1)
+    for t in range(1, out.shape[1]):
+        out[:, t] = out[:, t - 1] + alpha * (prices[:, period - 1 + t] - out[:, t - 1])
+    return out
+
+
+def _rsi(prices: np.ndarray, period: int = 14) -> np.ndarray:
+    rows, length = prices.shape
+    if length < period + 1:
+        return np.full(rows, 50.0)
+    deltas = np.diff(prices, axis=1)
+    gains = np.clip(deltas, 0.0, None)
+    losses = np.clip(-deltas, 0.0, None)
+    avg_gain = gains[:, :period].mean(axis=1)
+    avg_loss = losses[:, :period].mean(axis=1)
+    for t in range(period, deltas.shape[1]):
+        avg_gain = (avg_gain * (period - 1) + gains[:, t]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[:, t]) / period
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), rsi)
+    return rsi
+
+
+def _macd(prices: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    rows, length = prices.shape
+    if length < slow:
+        zeros = np.zeros(rows)
+        return {"macd": zeros, "signal": zeros.copy(), "histogram": zeros.copy()}
+    fast_ema = _ema_series(prices, fast)[:, slow - fast:]
+    slow_ema = _ema_series(prices, slow)
+    line = fast_ema - slow_ema
+    if line.shape[1] >= signal:
+        signal_line = _ema(line, signal)
+    else:
+        signal_line = line[:, -1].copy()
+    macd_line = line[:, -1]
+    return {"macd": macd_line, "signal": signal_line, "histogram": macd_line - signal_line}
+
+
+def _linear_forecast(prices: np.ndarray, horizon: int) -> Dict[str, np.ndarray]:
+    length = prices.shape[1]
+    x = np.arange(length, dtype=np.float64)
+    x_centered = x - x.mean()
+    y_mean = prices.mean(axis=1)
+    slope = (prices - y_mean[:, None]) @ x_centered / np.dot(x_centered, x_centered)
+    intercept = y_mean - slope * x.mean()
+    fitted = intercept[:, None] + slope[:, None] * x[None, :]
+    ss_res = np.sum((prices - fitted) ** 2, axis=1)
+    ss_tot = np.sum((prices - y_mean[:, None]) ** 2, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_squared = np.where(ss_tot > 0, 1.0 - ss_res / ss_tot, 0.0)
+    forecast = intercept + slope * (length - 1 + horizon)
+    return {"slope": slope, "forecast": forecast, "r_squared": r_squared}
+
+
+def analyze_matrix(prices: np.ndarray, horizon: int = 24) -> Dict[str, np.ndarray]:
+    """
+    Run the full indicator set over a (pairs × time) matrix.
+
+    Returns one array (or dict of arrays) per metric, indexed by row.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim != 2 or prices.shape[1] < MIN_POINTS:
+        raise ValueError(f"expected a (pairs, time) matrix with at least {MIN_POINTS} columns")
+
+    current = prices[:, -1]
+    sma_20 = prices[:, -20:].mean(axis=1)
+    sma_50 = prices[:, -50:].mean(axis=1) if prices.shape[1] >= 50 else sma_20
+    recent = prices[:, -50:]
+
+    trend = np.where(
+        (sma_20 > sma_50) & (current > sma_20),
+        "BULLISH",
+        np.where((sma_20 < sma_50) & (current < sma_20), "BEARISH", "SIDEWAYS"),
+    )
+
+    return {
+        "current_price": current,
+        "sma_20": sma_20,
+        "sma_50": sma_50,
+        "trend": trend,
+        "volatility": prices[:, -20:].std(axis=1),
+        "support": recent.min(axis=1),
+        "resistance": recent.max(axis=1),
+        "rsi": _rsi(prices),
+        "macd": _macd(prices),
+        "linear": _linear_forecast(prices, horizon),
+    }
@@ -12,6 +12,8 @@ import base64
 
 import httpx
 
+from ..utils.http_clients import http_clients
+
 
 class BrokerExecutionService:
     def __init__(self) -> None:
@@ -232,8 +234,13 @@ class BrokerExecutionService:
         payload = self._build_live_order_payload(trade_params, account)
 
         try:
-            async with httpx.AsyncClient(timeout=self._timeout_seconds) as client:
-                response = await client.post(endpoint, headers=headers, json=payload)
+            client = http_clients.httpx_client(endpoint)
+            response = await client.post(
+                endpoint,
+                headers=headers,
+                json=payload,
+                timeout=self._timeout_seconds,
+            )
         except httpx.TimeoutException:
             return {
                 "success": False,
@@ -0,0 +1,252 @@
+"""
+Columnar multi-timeframe candle store.
+
+Each pair keeps one ring buffer per timeframe with timestamp/open/high/low/close/
+tick-count columns. Every column is allocated at twice its capacity and each
+write lands in both halves, so the most recent ``n`` candles are always one
+contiguous slice and can be handed out as zero-copy NumPy views.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+
+TIMEFRAMES: Dict[str, int] = {
+    "1m": 60,
+    "5m": 300,
+    "1h": 3600,
+    "1d": 86400,
+}
+
+DEFAULT_CAPACITY: Dict[str, int] = {
+    "1m": 1440,
+    "5m": 864,
+    "1h": 720,
+    "1d": 365,
+}
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "ticks")
+
+
+class CandleSeries:
+    """Fixed-capacity OHLC ring buffer for one pair and timeframe."""
+
+    def __init__(self, timeframe: str, capacity: int):
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.timeframe = timeframe
+        self.seconds = TIMEFRAMES[timeframe]
+        self.capacity = int(capacity)
+        size = self.capacity * 2
+        self._timestamp = np.zeros(size, dtype=np.int64)
+        self._open = np.zeros(size, dtype=np.float64)
+        self._high = np.zeros(size, dtype=np.float64)
+        self._low = np.zeros(size, dtype=np.float64)
+        self._close = np.zeros(size, dtype=np.float64)
+        self._ticks = np.zeros(size, dtype=np.int64)
+        self._count = 0
+        # Bumped on every write; lets readers cache derived data per version.
+        self.version = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def _head(self) -> int:
+        return (self._count - 1) % self.capacity
+
+    def _bucket(self, ts: float) -> int:
+        return int(ts) - (int(ts) % self.seconds)
+
+    def _write(self, idx: int, bucket: int, o: float, h: float, l: float, c: float, ticks: int) -> None:
+        for offset in (idx, idx + self.capacity):
+            self._timestamp[offset] = bucket
+            self._open[offset] = o
+            self._high[offset] = h
+            self._low[offset] = l
+            self._close[offset] = c
+            self._ticks[offset] = ticks
+
+    def update(self, price: float, ts: float) -> bool:
+        """
+        Fold a price tick into the series.
+
+        Returns True when the tick opened a new candle (i.e. the previous one closed).
+        """
+        bucket = self._bucket(ts)
+        self.version += 1
+        if self._count:
+            idx = self._head
+            current = int(self._timestamp[idx])
+            if bucket == current:
+                self._write(
+                    idx,
+                    bucket,
+                    float(self._open[idx]),
+                    max(float(self._high[idx]), price),
+                    min(float(self._low[idx]), price),
+                    price,
+                    int(self._ticks[idx]) + 1,
+                )
+                return False
+            if bucket < current:
+                # Late tick for an already-closed candle: fold into the live one.
+                self._write(
+                    idx,
+                    current,
+                    float(self._open[idx]),
+                    max(float(self._high[idx]), price),
+                    min(float(self._low[idx]), price),
+                    float(self._close[idx]),
+                    int(self._ticks[idx]) + 1,
+                )
+                return False
+
+        self._count += 1
+        self._write(self._head, bucket, price, price, price, price, 1)
+        return self._count > 1
+
+    def _window(self, n: Optional[int]) -> slice:
+        size = len(self)
+        if n is None or n > size:
+            n = size
+        if n <= 0:
+            return slice(0, 0)
+        end = self._head + self.capacity + 1
+        return slice(end - n, end)
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        """Read-only zero-copy view of the last ``n`` values of a column."""
+        if name not in COLUMNS:
+            raise KeyError(name)
+        view = getattr(self, f"_{name}")[self._window(n)]
+        view.flags.writeable = False
+        return view
+
+    def view(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy views of all columns, oldest candle first."""
+        window = self._window(n)
+        out: Dict[str, np.ndarray] = {}
+        for name in COLUMNS:
+            view = getattr(self, f"_{name}")[window]
+            view.flags.writeable = False
+            out[name] = view
+        return out
+
+    def last(self) -> Optional[Dict[str, float]]:
+        if not self._count:
+            return None
+        idx = self._head
+        return {
+            "timestamp": int(self._timestamp[idx]),
+            "open": float(self._open[idx]),
+            "high": float(self._high[idx]),
+            "low": float(self._low[idx]),
+            "close": float(self._close[idx]),
+            "ticks": int(self._ticks[idx]),
+        }
+
+
+class CandleStore:
+    """Per-pair candle series across all configured timeframes."""
+
+    def __init__(
+        self,
+        timeframes: Optional[Iterable[str]] = None,
+        capacity: Optional[Mapping[str, int]] = None,
+    ):
+        self.timeframes = tuple(timeframes or TIMEFRAMES.keys())
+        for timeframe in self.timeframes:
+            if timeframe not in TIMEFRAMES:
+                raise ValueError(f"Unsupported timeframe: {timeframe}")
+        self._capacity = {**DEFAULT_CAPACITY, **dict(capacity or {})}
+        self._series: Dict[str, Dict[str, CandleSeries]] = {}
+        self._subscribers: List[Callable[[Dict[str, list]], Any]] = []
+
+    def subscribe(self, callback: Callable[[Dict[str, list]], Any]) -> Callable[[], None]:
+        """Call ``callback(closed)`` whenever an update closes candles; returns an unsubscribe function"""
+        self._subscribers.append(callback)
+
+        def _unsubscribe() -> None:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+        return _unsubscribe
+
+    def _pair_series(self, pair: str) -> Dict[str, CandleSeries]:
+        series = self._series.get(pair)
+        if series is None:
+            series = {
+                timeframe: CandleSeries(timeframe, self._capacity[timeframe])
+                for timeframe in self.timeframes
+            }
+            self._series[pair] = series
+        return series
+
+    def update(self, rates: Mapping[str, float], ts: Optional[float] = None) -> Dict[str, list]:
+        """
+        Fold a rates snapshot into every timeframe.
+
+        Returns ``{pair: [timeframes whose previous candle just closed]}``.
+        """
+        now = time.time() if ts is None else float(ts)
+        closed: Dict[str, list] = {}
+        for pair, price in rates.items():
+            if not isinstance(price, (int, float)) or price <= 0:
+                continue
+            series_by_tf = self._pair_series(pair)
+            for timeframe, series in series_by_tf.items():
+                if series.update(float(price), now):
+                    closed.setdefault(pair, []).append(timeframe)
+        if closed:
+            for callback in list(self._subscribers):
+                try:
+                    callback(closed)
+                except Exception as exc:
+                    print(f"Candle subscriber failed: {exc}")
+        return closed
+
+    def has(self, pair: str) -> bool:
+        return pair in self._series
+
+    def pairs(self) -> list:
+        return list(self._series.keys())
+
+    def series(self, pair: str, timeframe: str = "1m") -> Optional[CandleSeries]:
+        return self._series.get(pair, {}).get(timeframe)
+
+    def length(self, pair: str, timeframe: str = "1m") -> int:
+        series = self.series(pair, timeframe)
+        return len(series) if series else 0
+
+    def closes(self, pair: str, timeframe: str = "1m", n: Optional[int] = None) -> np.ndarray:
+        series = self.series(pair, timeframe)
+        if series is None:
+            return np.empty(0, dtype=np.float64)
+        return series.column("close", n)
+
+    def candles(self, pair: str, timeframe: str = "1m", n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        series = self.series(pair, timeframe)
+        if series is None:
+            return {name: np.empty(0) for name in COLUMNS}
+        return series.view(n)
+
+    def latest(self, pair: str, timeframe: str = "1m") -> Optional[Dict[str, float]]:
+        series = self.series(pair, timeframe)
+        return series.last() if series else None
+
+    def version(self, pair: str, timeframe: str = "1m") -> int:
+        series = self.series(pair, timeframe)
+        return series.version if series else 0
+
+    def clear(self) -> None:
+        self._series.clear()
+
+
+# Global instance shared by the data service and the analysis engines
+candle_store = CandleStore()
@@ -0,0 +1,121 @@
+"""
+Vectorized cross-rate matrix.
+
+Built once per rates snapshot from the USD-base table with NumPy
+broadcasting: ``matrix[i, j]`` is the price of currency ``i`` quoted in
+currency ``j`` (pair ``CCY_i/CCY_j``). Pair lookups are then a dict hit for
+each leg plus an array index, and bulk lookups are a single fancy-index.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+
+def _split_pair(pair: str) -> Optional[Tuple[str, str]]:
+    cleaned = str(pair or "").strip().upper().replace("-", "/").replace(" ", "")
+    if "/" in cleaned:
+        base, quote = cleaned.split("/", 1)
+    elif len(cleaned) == 6:
+        base, quote = cleaned[:3], cleaned[3:]
+    else:
+        return None
+    if not base or not quote:
+        return None
+    return base, quote
+
+
+class CrossRateMatrix:
+    """Immutable N×N cross-rate table with per-pair display precision"""
+
+    def __init__(self, currencies: Tuple[str, ...], rates: np.ndarray, digits: np.ndarray):
+        self.currencies = currencies
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(currencies)}
+        self.rates = rates
+        self.digits = digits
+        self.rates.flags.writeable = False
+        self.digits.flags.writeable = False
+
+    @classmethod
+    def from_usd_base(cls, usd_base: Mapping[str, float]) -> "CrossRateMatrix":
+        table = {code: float(value) for code, value in usd_base.items() if value and value > 0}
+        table["USD"] = 1.0
+        currencies = tuple(sorted(table))
+        per_usd = np.fromiter((table[code] for code in currencies), dtype=np.float64, count=len(currencies))
+        # BASE/QUOTE = (QUOTE per USD) / (BASE per USD)
+        rates = per_usd[np.newaxis, :] / per_usd[:, np.newaxis]
+        return cls(currencies, rates, cls._display_digits(rates))
+
+    @staticmethod
+    def _display_digits(rates: np.ndarray) -> np.ndarray:
+        # Four decimals for prices in [0.1, 10), fewer as prices grow
+        # (USD/JPY -> 2, USD/IDR -> 0) and more for tiny quotes.
+        magnitude = np.floor(np.log10(rates))
+        digits = 4 - magnitude
+        digits = np.where(rates >= 0.1, np.clip(digits, 0, 4), np.clip(digits, 4, 8))
+        return digits.astype(np.int8)
+
+    def __len__(self) -> int:
+        return len(self.currencies)
+
+    def _locate(self, pair: str) -> Optional[Tuple[int, int]]:
+        legs = _split_pair(pair)
+        if legs is None:
+            return None
+        base_idx = self.index.get(legs[0])
+        quote_idx = self.index.get(legs[1])
+        if base_idx is None or quote_idx is None:
+            return None
+        return base_idx, quote_idx
+
+    def get(self, pair: str) -> Optional[float]:
+        location = self._locate(pair)
+        if location is None:
+            return None
+        return float(self.rates[location])
+
+    def precision(self, pair: str) -> Optional[int]:
+        location = self._locate(pair)
+        if location is None:
+            return None
+        return int(self.digits[location])
+
+    def lookup_many(self, pairs: Iterable[str]) -> Dict[str, object]:
+        """
+        Resolve many pairs with one fancy-index into the matrix.
+
+        Returns ``{"rates": {...}, "precision": {...}, "unavailable": [...]}``
+        keyed by the normalized ``BASE/QUOTE`` form.
+        """
+        names: List[str] = []
+        base_idx: List[int] = []
+        quote_idx: List[int] = []
+        unavailable: List[str] = []
+        for pair in pairs:
+            legs = _split_pair(pair)
+            if legs is None:
+                unavailable.append(str(pair))
+                continue
+            b = self.index.get(legs[0])
+            q = self.index.get(legs[1])
+            name = f"{legs[0]}/{legs[1]}"
+            if b is None or q is None:
+                unavailable.append(name)
+                continue
+            names.append(name)
+            base_idx.append(b)
+            quote_idx.append(q)
+
+        if not names:
+            return {"rates": {}, "precision": {}, "unavailable": unavailable}
+
+        rows = np.asarray(base_idx, dtype=np.intp)
+        cols = np.asarray(quote_idx, dtype=np.intp)
+        values = self.rates[rows, cols].tolist()
+        digits = self.digits[rows, cols].tolist()
+        return {
+            "rates": dict(zip(names, values)),
+            "precision": dict(zip(names, digits)),
+            "unavailable": unavailable,
+        }
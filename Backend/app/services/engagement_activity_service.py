@@ -3,36 +3,46 @@ from typing import Optional, List, Dict, Any
 
 from firebase_admin import firestore
 
-from ..utils.firestore_client import get_firestore_client
+from ..utils.firestore_repository import FirestoreRepository, firestore_repo
+from .activity_buffer import ActivityWriteBuffer, activity_buffer
 
 
 class EngagementActivityService:
-    def __init__(self):
-        self.db = get_firestore_client()
+    collection = "ai_activity"
 
-    def log_activity(
+    def __init__(self, repo: FirestoreRepository = firestore_repo, buffer: ActivityWriteBuffer = activity_buffer):
+        self.repo = repo
+        self.db = repo.db
+        self.buffer = buffer
+
+    async def log_activity(
         self,
         user_id: str,
         activity_type: str,
         message: str,
         emoji: Optional[str] = None,
         color: Optional[str] = None,
+        buffered: bool = True,
     ) -> Dict[str, Any]:
+        """Record an activity; buffered writes land with the next batch commit"""
         now = datetime.now(timezone.utc)
         payload = {
             "userId": user_id,
             "type": activity_type,
             "message": message,
-            "timestamp": firestore.SERVER_TIMESTAMP,
+            # Event time, not commit time, so batching doesn't reorder the feed
+            "timestamp": now,
             "emoji": emoji,
             "color": color,
         }
 
-        doc_ref = self.db.collection("ai_activity").document()
-        doc_ref.set(payload)
+        if buffered:
+            doc_id = self.buffer.add(payload)
+        else:
+            doc_id = await self.repo.add(self.collection, payload)
 
         response = {
-            "id": doc_ref.id,
+            "id": doc_id,
             "userId": user_id,
             "type": activity_type,
             "message": message,
@@ -42,25 +52,25 @@ class EngagementActivityService:
         }
         return response
 
-    def get_activity_feed(
+    async def get_activity_feed(
         self,
         user_id: str,
         limit: int = 10,
         cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
-        query = (
-            self.db.collection("ai_activity")
-            .where("userId", "==", user_id)
-            .order_by("timestamp", direction=firestore.Query.DESCENDING)
-            .limit(limit)
-        )
+        cursor_doc = await self.repo.get(self.collection, cursor) if cursor else None
 
-        if cursor:
-            cursor_doc = self.db.collection("ai_activity").document(cursor).get()
-            if cursor_doc.exists:
+        def _build(ref):
+            query = (
+                ref.where("userId", "==", user_id)
+                .order_by("timestamp", direction=firestore.Query.DESCENDING)
+                .limit(limit)
+            )
+            if cursor_doc is not None and cursor_doc.exists:
                 query = query.start_after(cursor_doc)
+            return query
 
-        docs = list(query.stream())
+        docs = await self.repo.query(self.collection, _build)
         activities: List[Dict[str, Any]] = []
 
         for doc in docs:
@@ -4,17 +4,53 @@ Sends smart, contextual notifications via multiple channels
 """
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from enum import Enum
 import asyncio
+import base64
 import json
 import os
 import smtplib
 import aiohttp
 from email.message import EmailMessage
 
-from ..utils.firestore_client import get_firestore_client
+from firebase_admin import firestore
+
+from ..utils.firestore_repository import firestore_repo
+from ..utils.http_clients import http_clients
 from .market_intelligence_service import MarketIntelligenceService
+from .notification_counter import is_read, unread_counter
+from .user_cache import user_cache
+
+
+NOTIFICATION_PAGE_MAX = 100
+
+
+def _encode_cursor(timestamp: Optional[object], doc_id: str) -> str:
+    """Opaque page cursor: the last document's sort key (timestamp, id)"""
+    if isinstance(timestamp, datetime):
+        value = {"t": timestamp.isoformat(), "id": doc_id}
+    else:
+        value = {"s": str(timestamp or ""), "id": doc_id}
+    return base64.urlsafe_b64encode(json.dumps(value, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[object, str]:
+    """Inverse of ``_encode_cursor``; raises ValueError for anything malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value = json.loads(raw)
+        timestamp = datetime.fromisoformat(value["t"]) if "t" in value else str(value["s"])
+        return timestamp, str(value["id"])
+    except Exception as exc:
+        raise ValueError("Invalid notification cursor") from exc
+
+
+def _naive(value: object) -> object:
+    """Cursor timestamps compared against in-memory (naive local) notification times"""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
 
 
 class NotificationChannel(Enum):
@@ -169,12 +205,9 @@ class EnhancedNotificationService:
 
         self.default_webhook_url = os.getenv("NOTIFICATION_WEBHOOK_URL", "").strip()
 
-        self._firestore = None
-
-    def _get_firestore(self):
-        if self._firestore is None:
-            self._firestore = get_firestore_client()
-        return self._firestore
+        self.repo = firestore_repo
+        self.unread_counter = unread_counter
+        self.cache = user_cache
 
     def _normalize_channel_settings(self, raw: Optional[Dict]) -> Dict[str, str]:
         if not isinstance(raw, dict):
@@ -295,10 +328,16 @@ class EnhancedNotificationService:
             "recommendation": recommendation,
         }
 
-    def _load_preferences_from_firestore(self, user_id: str) -> Optional[NotificationPreference]:
+    async def _get_preferences(self, user_id: str) -> Optional[NotificationPreference]:
+        """Read through the shared user cache; the local dict only covers Firestore outages"""
+        prefs = await self.cache.get_or_load(
+            "notification_preferences", user_id, lambda: self._load_preferences_from_firestore(user_id)
+        )
+        return prefs or self.user_preferences.get(user_id)
+
+    async def _load_preferences_from_firestore(self, user_id: str) -> Optional[NotificationPreference]:
         try:
-            db = self._get_firestore()
-            doc = db.collection("notification_preferences").document(user_id).get()
+            doc = await self.repo.get("notification_preferences", user_id)
             if not doc.exists:
                 return None
             data = doc.to_dict() or {}
@@ -341,10 +380,11 @@ class EnhancedNotificationService:
         except Exception:
             return None
 
-    def _persist_preferences(self, preferences: NotificationPreference):
+    async def _persist_preferences(self, preferences: NotificationPreference):
         try:
-            db = self._get_firestore()
-            db.collection("notification_preferences").document(preferences.user_id).set(
+            await self.repo.set(
+                "notification_preferences",
+                preferences.user_id,
                 {
                     "user_id": preferences.user_id,
                     "enabled_channels": [ch.value for ch in preferences.enabled_channels],
@@ -440,7 +480,7 @@ class EnhancedNotificationService:
     ) -> Dict:
         """Set user's notification preferences"""
 
-        existing = self.user_preferences.get(user_id) or self._load_preferences_from_firestore(user_id)
+        existing = await self._get_preferences(user_id)
 
         channels: List[NotificationChannel] = []
         if enabled_channels is not None:
@@ -513,7 +553,9 @@ class EnhancedNotificationService:
         )
         
         self.user_preferences[user_id] = preferences
-        self._persist_preferences(preferences)
+        await self._persist_preferences(preferences)
+        self.cache.invalidate("notification_preferences", user_id)
+        self.cache.put("notification_preferences", user_id, preferences)
         
         return {
             "success": True,
@@ -551,13 +593,11 @@ class EnhancedNotificationService:
             requested_priority = NotificationPriority.MEDIUM.value
         
         # Get user preferences
-        prefs = self.user_preferences.get(user_id) or self._load_preferences_from_firestore(user_id)
+        prefs = await self._get_preferences(user_id)
         if not prefs:
             # Initialize default preferences
             await self.set_notification_preferences(user_id)
             prefs = self.user_preferences[user_id]
-        else:
-            self.user_preferences[user_id] = prefs
         
         # Check if category is disabled
         cat = NotificationCategory[category.upper()]
@@ -801,8 +841,9 @@ class EnhancedNotificationService:
         try:
             from ..enhanced_websocket_manager import ws_manager
             
-            # Broadcast notification to all connected clients
-            await ws_manager.broadcast(
+            # Deliver only to the owner's connections (notifications topic)
+            await ws_manager.send_to_user(
+                notification.user_id,
                 message=notification.title,
                 update_type="notification",
                 data={
@@ -819,7 +860,7 @@ class EnhancedNotificationService:
                     "rich_data": notification.rich_data,
                 }
             )
-            print(f"[WS] Broadcasted notification to all clients")
+            print(f"[WS] Sent notification to user {notification.user_id}")
         except Exception as e:
             print(f"[WS] Failed to broadcast notification: {e}")
 
@@ -1008,8 +1049,9 @@ class EnhancedNotificationService:
         """Store in-app notification"""
         # Already stored in self.notifications
         try:
-            db = self._get_firestore()
-            db.collection("notifications").document(notification.notification_id).set(
+            await self.unread_counter.store(
+                notification.notification_id,
+                notification.user_id,
                 {
                     "notificationId": notification.notification_id,
                     "userId": notification.user_id,
@@ -1024,7 +1066,6 @@ class EnhancedNotificationService:
                     "richData": notification.rich_data,
                     "createdAt": datetime.utcnow(),
                 },
-                merge=True,
             )
         except Exception as exc:
             print(f"[IN_APP] Firestore unavailable: {exc}")
@@ -1033,13 +1074,13 @@ class EnhancedNotificationService:
 
     async def _post_json(self, url: str, payload: Dict, channel_name: str):
         timeout = aiohttp.ClientTimeout(total=12)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(url, json=payload) as response:
-                if response.status >= 400:
-                    response_text = await response.text()
-                    raise RuntimeError(
-                        f"{channel_name} request failed with status {response.status}: {response_text}"
-                    )
+        session = http_clients.session(url)
+        async with session.post(url, json=payload, timeout=timeout) as response:
+            if response.status >= 400:
+                response_text = await response.text()
+                raise RuntimeError(
+                    f"{channel_name} request failed with status {response.status}: {response_text}"
+                )
         print(f"[{channel_name}] Sent")
 
     def _is_quiet_hours(self, prefs: NotificationPreference) -> bool:
@@ -1102,15 +1143,19 @@ class EnhancedNotificationService:
 
     async def get_notifications(self, user_id: str, unread_only: bool = False, limit: int = 20) -> List[Dict]:
         """Get notifications for user"""
-        def _coerce_dt(value: Optional[object]) -> datetime:
-            if isinstance(value, datetime):
-                return value
-            if isinstance(value, str):
-                try:
-                    return datetime.fromisoformat(value)
-                except ValueError:
-                    return datetime.min
-            return datetime.min
+        page = await self.list_notifications(user_id, limit=limit, unread_only=unread_only)
+        return page["notifications"]
+
+    async def list_notifications(
+        self,
+        user_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        unread_only: bool = False,
+    ) -> Dict:
+        """One page of notifications, newest first, plus ``next_cursor`` for the following page"""
+        limit = max(1, min(int(limit), NOTIFICATION_PAGE_MAX))
+        after = _decode_cursor(cursor) if cursor else None
 
         def _format_ts(value: Optional[object]) -> str:
             if isinstance(value, datetime):
@@ -1119,20 +1164,25 @@ class EnhancedNotificationService:
                 return value
             return ""
 
+        def _build(ref):
+            query = ref.where("userId", "==", user_id)
+            if unread_only:
+                query = query.where("read", "==", False)
+            query = (
+                query.order_by("timestamp", direction=firestore.Query.DESCENDING)
+                .order_by("__name__", direction=firestore.Query.DESCENDING)
+            )
+            if after is not None:
+                query = query.start_after({"timestamp": after[0], "__name__": after[1]})
+            # One extra document tells us whether another page exists
+            return query.limit(limit + 1)
+
         try:
-            db = self._get_firestore()
-            docs = list(db.collection("notifications").where("userId", "==", user_id).stream())
+            docs = await self.repo.query("notifications", _build)
             items: List[Dict] = []
-            for doc in docs:
+            for doc in docs[:limit]:
                 data = doc.to_dict() or {}
-                read = data.get("read")
-                if read is None:
-                    read = data.get("is_read") or data.get("isRead") or False
-                if unread_only and read:
-                    continue
-
                 timestamp = data.get("timestamp") or data.get("createdAt") or data.get("created_at")
-                sort_dt = _coerce_dt(timestamp)
                 items.append(
                     {
                         "notification_id": data.get("notificationId") or data.get("notification_id") or doc.id,
@@ -1141,17 +1191,16 @@ class EnhancedNotificationService:
                         "category": data.get("category") or "",
                         "priority": data.get("priority") or "",
                         "timestamp": _format_ts(timestamp),
-                        "read": bool(read),
+                        "read": is_read(data),
                         "clicked": bool(data.get("clicked") or False),
                         "rich_data": data.get("richData") or data.get("rich_data") or {},
-                        "_sort_ts": sort_dt,
                     }
                 )
-
-            items.sort(key=lambda item: item.get("_sort_ts", datetime.min), reverse=True)
-            for item in items:
-                item.pop("_sort_ts", None)
-            return items[:limit]
+            next_cursor = None
+            if len(docs) > limit:
+                last = docs[limit - 1]
+                next_cursor = _encode_cursor((last.to_dict() or {}).get("timestamp"), last.id)
+            return {"notifications": items, "next_cursor": next_cursor}
         except Exception:
             # Fallback to in-memory notifications if Firestore is unavailable
             notifications = [n for n in self.notifications if n.user_id == user_id]
@@ -1159,22 +1208,47 @@ class EnhancedNotificationService:
             if unread_only:
                 notifications = [n for n in notifications if not n.read]
 
-            notifications = sorted(notifications, key=lambda x: x.timestamp, reverse=True)[:limit]
+            notifications = sorted(
+                notifications, key=lambda x: (x.timestamp, x.notification_id), reverse=True
+            )
+            if after is not None:
+                after_ts = after[0]
+                if isinstance(after_ts, str):
+                    try:
+                        after_ts = datetime.fromisoformat(after_ts)
+                    except ValueError:
+                        after_ts = None
+                if isinstance(after_ts, datetime):
+                    notifications = [
+                        n for n in notifications
+                        if (n.timestamp, n.notification_id) < (_naive(after_ts), after[1])
+                    ]
+                else:
+                    # No usable sort key: resume after the cursor's document, or end paging
+                    ids = [n.notification_id for n in notifications]
+                    notifications = notifications[ids.index(after[1]) + 1:] if after[1] in ids else []
+            page = notifications[:limit]
+            next_cursor = None
+            if len(notifications) > limit:
+                next_cursor = _encode_cursor(page[-1].timestamp, page[-1].notification_id)
 
-            return [
-                {
-                    "notification_id": n.notification_id,
-                    "title": n.title,
-                    "message": n.message,
-                    "category": n.category.value,
-                    "priority": n.priority.value,
-                    "timestamp": n.timestamp.isoformat(),
-                    "read": n.read,
-                    "clicked": n.clicked,
-                    "rich_data": n.rich_data,
-                }
-                for n in notifications
-            ]
+            return {
+                "notifications": [
+                    {
+                        "notification_id": n.notification_id,
+                        "title": n.title,
+                        "message": n.message,
+                        "category": n.category.value,
+                        "priority": n.priority.value,
+                        "timestamp": n.timestamp.isoformat(),
+                        "read": n.read,
+                        "clicked": n.clicked,
+                        "rich_data": n.rich_data,
+                    }
+                    for n in page
+                ],
+                "next_cursor": next_cursor,
+            }
 
     async def mark_as_read(self, notification_id: str, user_id: Optional[str] = None) -> Dict:
         """Mark notification as read"""
@@ -1189,21 +1263,17 @@ class EnhancedNotificationService:
             updated = True
 
         try:
-            db = self._get_firestore()
-            doc_ref = db.collection("notifications").document(notification_id)
-            if user_id:
-                doc = doc_ref.get()
-                if doc.exists:
-                    data = doc.to_dict() or {}
-                    if data.get("userId") and data.get("userId") != user_id:
-                        return {"error": "Notification not found"}
-            doc_ref.set(
+            # Ownership check, read flag and unread counter change in one transaction
+            flipped = await self.unread_counter.mark_read(
+                notification_id,
+                user_id,
                 {
                     "read": True,
                     "readAt": datetime.utcnow(),
                 },
-                merge=True,
             )
+            if flipped is None:
+                return {"error": "Notification not found"}
             updated = True
         except Exception:
             pass
@@ -1214,13 +1284,12 @@ class EnhancedNotificationService:
 
     async def get_notification_settings_panel(self, user_id: str) -> Dict:
         """Get notification settings for UI"""
-        prefs = self.user_preferences.get(user_id) or self._load_preferences_from_firestore(user_id)
+        prefs = await self._get_preferences(user_id)
         if not prefs:
             await self.set_notification_preferences(user_id=user_id)
             prefs = self.user_preferences.get(user_id)
         if not prefs:
             return {"error": "Preferences not configured"}
-        self.user_preferences[user_id] = prefs
         
         return {
             "channels": {
@@ -1246,7 +1315,7 @@ class EnhancedNotificationService:
 
     async def generate_digest(self, user_id: str, period: str = "daily") -> Dict:
         """Generate notification digest"""
-        prefs = self.user_preferences.get(user_id)
+        prefs = await self._get_preferences(user_id)
         if not prefs or not prefs.digest_mode:
             return {"error": "Digest mode not enabled"}
         
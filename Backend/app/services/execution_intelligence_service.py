@@ -8,23 +8,18 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Callable
 from enum import Enum
 import asyncio
+import operator
 import os
 from dotenv import load_dotenv
 
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
+from .candle_store import candle_store
+from .indicators import indicator_engine
+from .llm_cache import llm_cache
+from .llm_gateway import llm_gateway
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_AVAILABLE = bool(GEMINI_API_KEY) and genai is not None
-if GEMINI_AVAILABLE:
-    genai.configure(api_key=GEMINI_API_KEY)
-
 
 class TradingSession(Enum):
     """Major forex trading sessions"""
@@ -44,6 +39,32 @@ class OrderType(Enum):
     IF_TOUCHED = "if_touched"
 
 
+_OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+# Values a structured "indicator_value" condition can name in its ``indicator`` field
+_INDICATORS: Dict[str, Callable[[Dict], Optional[float]]] = {
+    "rsi": lambda values: values["rsi"],
+    "macd": lambda values: values["macd"]["macd"],
+    "macd_signal": lambda values: values["macd"]["signal"],
+    "macd_histogram": lambda values: values["macd"]["histogram"],
+    "atr": lambda values: values["atr"],
+    "ema_20": lambda values: values["ema_20"],
+    "ema_50": lambda values: values["ema_50"],
+    "sma_20": lambda values: values["sma_20"],
+    "sma_50": lambda values: values["sma_50"],
+    "bollinger_upper": lambda values: values["bollinger"]["upper"],
+    "bollinger_middle": lambda values: values["bollinger"]["middle"],
+    "bollinger_lower": lambda values: values["bollinger"]["lower"],
+}
+
+
 class OrderStatus(Enum):
     """Status of a conditional order"""
     PENDING = "pending"
@@ -60,6 +81,7 @@ class Condition:
     operator: str  # "==", ">", "<", ">=", "<=", "!=", "crosses"
     value: float
     description: str
+    indicator: Optional[str] = None  # for "indicator_value": a key of _INDICATORS, e.g. "rsi", "sma_50"
 
 
 @dataclass
@@ -160,10 +182,11 @@ class ExecutionIntelligenceService:
         parsed_conditions = []
         for cond in conditions:
             parsed_conditions.append(Condition(
-                condition_type=cond.get("type"),
+                condition_type=cond.get("type") or cond.get("condition_type"),
                 operator=cond.get("operator"),
                 value=cond.get("value"),
-                description=cond.get("description", "")
+                description=cond.get("description", ""),
+                indicator=cond.get("indicator")
             ))
         
         # Create order
@@ -229,8 +252,7 @@ class ExecutionIntelligenceService:
                     await asyncio.sleep(60)  # Check every minute
                     continue
             
-            # Check conditions (simulated)
-            # In production, this would fetch live data and evaluate conditions
+            # Check conditions against the latest candle and streaming indicators
             conditions_met = await self._evaluate_conditions(order)
             
             if conditions_met:
@@ -245,15 +267,13 @@ class ExecutionIntelligenceService:
         Use Google Generative AI (Gemini) to analyze conditions and provide recommendations
         """
         try:
-            if not GEMINI_AVAILABLE:
+            if not llm_gateway.available:
                 return {
                     "success": False,
                     "message": "Gemini is unavailable (missing package or API key)",
                     "analysis": None
                 }
                 
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            
             # Create prompt for Gemini
             conditions_text = "\n".join([
                 f"- {cond['description']}"
@@ -277,17 +297,17 @@ class ExecutionIntelligenceService:
             Format your response in JSON with clear, actionable insights.
             """
             
-            response = model.generate_content(prompt)
+            response_text = await llm_cache.generate("condition_analysis", prompt, model="gemini-2.0-flash")
             
             # Parse JSON response
             import json
             try:
-                analysis = json.loads(response.text)
+                analysis = json.loads(response_text)
             except:
                 analysis = {
                     "confidence": 50,
                     "risk_level": "medium",
-                    "analysis": response.text,
+                    "analysis": response_text,
                     "suggestions": ["Could not parse structured response"]
                 }
                 
@@ -309,15 +329,13 @@ class ExecutionIntelligenceService:
         Use Google Generative AI (Gemini) to generate trading conditions from natural language strategy
         """
         try:
-            if not GEMINI_AVAILABLE:
+            if not llm_gateway.available:
                 return {
                     "success": False,
                     "message": "Gemini is unavailable (missing package or API key)",
                     "conditions": None
                 }
                 
-            model = genai.GenerativeModel("gemini-1.5-pro")
-            
             prompt = f"""
             You are an expert forex trading condition generator.
             
@@ -331,10 +349,12 @@ class ExecutionIntelligenceService:
             2. operator (>, <, ==, >=, <=, crosses)
             3. value (numeric value)
             4. description (human-readable description)
+            5. indicator (for indicator_value only; one of {", ".join(_INDICATORS)})
             
             Examples of valid conditions:
             {{
                 "condition_type": "indicator_value",
+                "indicator": "rsi",
                 "operator": "<",
                 "value": 30,
                 "description": "RSI (14-period) drops below 30 (oversold)"
@@ -350,11 +370,11 @@ class ExecutionIntelligenceService:
             Format your response as a JSON array of conditions.
             """
             
-            response = model.generate_content(prompt)
+            response_text = await llm_cache.generate("condition_generation", prompt, model="gemini-1.5-pro")
             
             import json
             try:
-                conditions = json.loads(response.text)
+                conditions = json.loads(response_text)
             except:
                 conditions = []
                 
@@ -372,10 +392,59 @@ class ExecutionIntelligenceService:
             }
 
     async def _evaluate_conditions(self, order: ConditionalOrder) -> bool:
-        """Evaluate if all conditions for an order are met"""
-        # Placeholder: In production, fetch live data and evaluate
-        # For now, return False (conditions not met)
-        return False
+        """Evaluate order conditions against the live candle and indicator state"""
+        if not order.conditions:
+            return False
+        results = [self._evaluate_condition(order.pair, condition) for condition in order.conditions]
+        return all(results) if order.all_conditions_must_match else any(results)
+
+    def _evaluate_condition(self, pair: str, condition: Condition) -> bool:
+        compare = _OPERATORS.get(str(condition.operator or "").strip())
+        if compare is None or condition.value is None:
+            return False
+        current = self._current_value(pair, condition)
+        if current is None:
+            return False
+        return compare(float(current), float(condition.value))
+
+    def _current_value(self, pair: str, condition: Condition) -> Optional[float]:
+        """
+        Live value a condition compares against; None when it can't be evaluated.
+
+        Only "price_level" and "indicator_value" conditions are supported, with
+        the comparison operators in _OPERATORS ("crosses" never matches).
+        Indicator conditions should name their value in ``indicator``; older
+        ones without it fall back to keywords in the free-text description,
+        where the first keyword found wins (so "RSI above the 50 EMA" reads
+        as RSI).
+        """
+        condition_type = str(condition.condition_type or "").lower()
+        if condition_type == "price_level":
+            latest = candle_store.latest(pair)
+            return latest["close"] if latest else None
+        if condition_type != "indicator_value":
+            return None
+
+        state = indicator_engine.get(pair)
+        if state is None or not state.ready:
+            return None
+        values = state.values()
+        if condition.indicator:
+            read = _INDICATORS.get(str(condition.indicator).strip().lower())
+            return read(values) if read is not None else None
+        text = str(condition.description or "").lower()
+        if "rsi" in text:
+            return values["rsi"]
+        if "macd" in text:
+            key = "histogram" if "hist" in text else "signal" if "signal" in text else "macd"
+            return values["macd"][key]
+        if "atr" in text or "average true range" in text:
+            return values["atr"]
+        if "ema" in text:
+            return values["ema_50"] if "50" in text else values["ema_20"]
+        if "sma" in text or "moving average" in text:
+            return values["sma_50"] if "50" in text else values["sma_20"]
+        return None
 
     def _get_current_session(self) -> TradingSession:
         """Determine current trading session based on UTC time"""
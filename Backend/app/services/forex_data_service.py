@@ -3,6 +3,8 @@ from datetime import datetime, timedelta
 import asyncio
 import random
 
+from ..utils.http_clients import http_clients
+
 # --- Configuration ---
 # It's better to use a dedicated Forex data provider API.
 # This is a placeholder using a free but limited API.
@@ -17,7 +19,10 @@ class ForexDataService:
     """
     def __init__(self, api_key: str = EXCHANGE_RATE_API_KEY):
         self._api_key = api_key
-        self._client = httpx.AsyncClient()
+
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        return http_clients.httpx_client(EXCHANGE_RATE_API_URL)
 
     async def get_realtime_price(self, currency_pair: str):
         """
@@ -1,14 +1,25 @@
 from datetime import datetime
 from typing import Dict, Any, Optional
 
-from ..utils.firestore_client import get_firestore_client
+from ..utils.firestore_repository import FirestoreRepository, firestore_repo
 from ..enhanced_websocket_manager import ws_manager
+from .notification_counter import COUNTER_FIELD, UnreadNotificationCounter, unread_counter
+from .user_cache import UserDataCache, user_cache
 
 
 class HeaderService:
-    def __init__(self) -> None:
-        self.db = get_firestore_client()
-        self.collection = self.db.collection("user_headers")
+    collection = "user_headers"
+
+    def __init__(
+        self,
+        repo: FirestoreRepository = firestore_repo,
+        counter: UnreadNotificationCounter = unread_counter,
+        cache: UserDataCache = user_cache,
+    ) -> None:
+        self.repo = repo
+        self.db = repo.db
+        self.counter = counter
+        self.cache = cache
 
     def _default_name(self, claims: Dict[str, Any]) -> str:
         email = claims.get("email") or ""
@@ -17,24 +28,23 @@ class HeaderService:
     def _default_avatar(self, claims: Dict[str, Any]) -> str | None:
         return claims.get("picture") or claims.get("avatar_url") or None
 
-    def _count_unread_notifications(self, user_id: str) -> Optional[int]:
+    async def _count_unread_notifications(self, user_id: str, data: Optional[Dict[str, Any]] = None) -> Optional[int]:
         try:
-            query = self.db.collection("notifications").where("userId", "==", user_id)
-            count = 0
-            for doc in query.stream():
-                data = doc.to_dict() or {}
-                read = data.get("read")
-                if read is None:
-                    read = data.get("is_read") or data.get("isRead") or False
-                if not read:
-                    count += 1
-            return count
+            return await self.counter.get(user_id, data)
         except Exception:
             return None
 
-    def get_header(self, user_id: str, claims: Dict[str, Any]) -> Dict[str, Any]:
-        doc = self.collection.document(user_id).get()
-        data = doc.to_dict() or {}
+    async def _load_header(self, user_id: str) -> Dict[str, Any]:
+        data = await self.repo.get_dict(self.collection, user_id)
+        # The unread count changes far more often than the profile; it is
+        # cached separately by the counter, so seed that and keep it out of here.
+        if data.get(COUNTER_FIELD) is not None:
+            await self._count_unread_notifications(user_id, data)
+        data.pop(COUNTER_FIELD, None)
+        return data
+
+    async def get_header(self, user_id: str, claims: Dict[str, Any]) -> Dict[str, Any]:
+        data = await self.cache.get_or_load("header", user_id, lambda: self._load_header(user_id))
 
         name = data.get("display_name") or data.get("name") or self._default_name(claims)
         status = data.get("status") or "Available Online"
@@ -48,9 +58,9 @@ class HeaderService:
         if balance_currency is None and isinstance(data.get("balance"), dict):
             balance_currency = data.get("balance", {}).get("currency")
 
-        unread = self._count_unread_notifications(user_id)
+        unread = await self._count_unread_notifications(user_id)
         if unread is None:
-            unread = int(data.get("notifications_unread") or 0)
+            unread = 0
 
         return {
             "user": {
@@ -73,7 +83,7 @@ class HeaderService:
             },
         }
 
-    def update_header(self, user_id: str, updates: Dict[str, Any], claims: Dict[str, Any]) -> Dict[str, Any]:
+    async def update_header(self, user_id: str, updates: Dict[str, Any], claims: Dict[str, Any]) -> Dict[str, Any]:
         now = datetime.utcnow().isoformat()
         payload: Dict[str, Any] = {"updated_at": now}
 
@@ -89,13 +99,12 @@ class HeaderService:
             payload["balance_amount"] = updates["balance_amount"]
         if "balance_currency" in updates:
             payload["balance_currency"] = updates["balance_currency"]
-        if "notifications_unread" in updates:
-            payload["notifications_unread"] = updates["notifications_unread"]
+        # notifications_unread is owned by the transactional counter, never set here
 
-        doc_ref = self.collection.document(user_id)
-        doc = doc_ref.get()
+        doc = await self.repo.get(self.collection, user_id)
         if not doc.exists:
             payload["created_at"] = now
 
-        doc_ref.set(payload, merge=True)
-        return self.get_header(user_id, claims)
+        await self.repo.set(self.collection, user_id, payload, merge=True)
+        self.cache.invalidate("header", user_id)
+        return await self.get_header(user_id, claims)
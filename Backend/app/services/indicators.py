@@ -0,0 +1,343 @@
+"""
+Streaming technical indicators.
+
+Every indicator keeps just enough running state to fold in one closed candle
+in constant time, so current values are always available without re-reading
+price history. ``IndicatorEngine`` keeps one ``PairIndicators`` bundle per
+pair and timeframe and is fed by the candle store whenever a candle closes.
+"""
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .candle_store import CandleStore, candle_store
+
+
+class EMA:
+    """Exponential moving average seeded with the SMA of the first ``period`` values"""
+
+    __slots__ = ("period", "alpha", "value", "count", "_seed")
+
+    def __init__(self, period: int):
+        self.period = int(period)
+        self.alpha = 2.0 / (self.period + 1)
+        self.value: Optional[float] = None
+        self.count = 0
+        self._seed = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+    def update(self, x: float) -> Optional[float]:
+        self.count += 1
+        if self.count < self.period:
+            self._seed += x
+            return None
+        if self.count == self.period:
+            self.value = (self._seed + x) / self.period
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class WilderRSI:
+    """Relative Strength Index with Wilder smoothing"""
+
+    __slots__ = ("period", "avg_gain", "avg_loss", "count", "_prev")
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.count = 0
+        self._prev: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+    @property
+    def value(self) -> float:
+        if not self.ready:
+            return 50.0
+        if self.avg_loss == 0:
+            return 100.0 if self.avg_gain > 0 else 50.0
+        rs = self.avg_gain / self.avg_loss
+        return 100.0 - (100.0 / (1.0 + rs))
+
+    def update(self, x: float) -> float:
+        prev, self._prev = self._prev, x
+        if prev is None:
+            return self.value
+        delta = x - prev
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.count += 1
+        if self.count <= self.period:
+            # Simple average over the first ``period`` deltas.
+            self.avg_gain += (gain - self.avg_gain) / self.count
+            self.avg_loss += (loss - self.avg_loss) / self.count
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        return self.value
+
+
+class MACD:
+    """MACD line, signal line (EMA of the MACD line) and histogram"""
+
+    __slots__ = ("fast", "slow", "signal")
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    @property
+    def ready(self) -> bool:
+        return self.signal.ready
+
+    @property
+    def value(self) -> Dict[str, float]:
+        if not self.slow.ready:
+            return {"macd": 0.0, "signal": 0.0, "histogram": 0.0}
+        line = self.fast.value - self.slow.value
+        signal = self.signal.value if self.signal.ready else line
+        return {"macd": line, "signal": signal, "histogram": line - signal}
+
+    def update(self, x: float) -> Dict[str, float]:
+        self.fast.update(x)
+        if self.slow.update(x) is not None:
+            self.signal.update(self.fast.value - self.slow.value)
+        return self.value
+
+
+class RollingStats:
+    """Windowed mean and population standard deviation (sliding Welford update)"""
+
+    __slots__ = ("period", "mean", "_m2", "_window")
+
+    def __init__(self, period: int):
+        self.period = int(period)
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._window: deque = deque(maxlen=self.period)
+
+    @property
+    def count(self) -> int:
+        return len(self._window)
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+    @property
+    def std(self) -> float:
+        if not self._window:
+            return 0.0
+        return math.sqrt(max(self._m2, 0.0) / len(self._window))
+
+    def update(self, x: float) -> float:
+        if len(self._window) < self.period:
+            self._window.append(x)
+            delta = x - self.mean
+            self.mean += delta / len(self._window)
+            self._m2 += delta * (x - self.mean)
+        else:
+            old = self._window[0]
+            self._window.append(x)
+            old_mean = self.mean
+            self.mean += (x - old) / self.period
+            self._m2 += (x - old) * (x - self.mean + old - old_mean)
+        return self.std
+
+
+class Bollinger:
+    """Bollinger bands around a rolling mean"""
+
+    __slots__ = ("stats", "width")
+
+    def __init__(self, period: int = 20, width: float = 2.0):
+        self.stats = RollingStats(period)
+        self.width = float(width)
+
+    @property
+    def ready(self) -> bool:
+        return self.stats.ready
+
+    @property
+    def value(self) -> Dict[str, float]:
+        middle = self.stats.mean
+        band = self.width * self.stats.std
+        return {"upper": middle + band, "middle": middle, "lower": middle - band}
+
+    def update(self, x: float) -> Dict[str, float]:
+        self.stats.update(x)
+        return self.value
+
+
+class ATR:
+    """Average True Range with Wilder smoothing"""
+
+    __slots__ = ("period", "value", "count", "_prev_close")
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self.value = 0.0
+        self.count = 0
+        self._prev_close: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+    def update(self, high: float, low: float, close: float) -> float:
+        prev, self._prev_close = self._prev_close, close
+        if prev is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - prev), abs(low - prev))
+        self.count += 1
+        if self.count <= self.period:
+            self.value += (true_range - self.value) / self.count
+        else:
+            self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+
+class PairIndicators:
+    """All streaming indicators for one pair and timeframe"""
+
+    def __init__(self):
+        self.rsi = WilderRSI(14)
+        self.macd = MACD(12, 26, 9)
+        self.ema_20 = EMA(20)
+        self.ema_50 = EMA(50)
+        self.stats_20 = RollingStats(20)
+        self.stats_50 = RollingStats(50)
+        self.bollinger = Bollinger(20, 2.0)
+        self.atr = ATR(14)
+        self.candles = 0
+        self.last_close: Optional[float] = None
+        self.last_timestamp: Optional[int] = None
+
+    @property
+    def ready(self) -> bool:
+        """Enough closed candles for every indicator to be meaningful"""
+        return self.candles >= 50
+
+    def update(self, high: float, low: float, close: float, timestamp: Optional[int] = None) -> None:
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.ema_20.update(close)
+        self.ema_50.update(close)
+        self.stats_20.update(close)
+        self.stats_50.update(close)
+        self.bollinger.update(close)
+        self.atr.update(high, low, close)
+        self.candles += 1
+        self.last_close = close
+        self.last_timestamp = timestamp
+
+    def values(self) -> Dict[str, Any]:
+        return {
+            "candles": self.candles,
+            "close": self.last_close,
+            "timestamp": self.last_timestamp,
+            "rsi": self.rsi.value,
+            "macd": self.macd.value,
+            "ema_20": self.ema_20.value,
+            "ema_50": self.ema_50.value,
+            "sma_20": self.stats_20.mean,
+            "sma_50": self.stats_50.mean if self.stats_50.count else None,
+            "std_20": self.stats_20.std,
+            "bollinger": self.bollinger.value,
+            "atr": self.atr.value,
+        }
+
+
+def rsi(prices: Iterable[float], period: int = 14) -> float:
+    """Wilder RSI over a full price list (one pass)"""
+    indicator = WilderRSI(period)
+    for price in prices:
+        indicator.update(float(price))
+    return indicator.value
+
+
+def macd(prices: Iterable[float], fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, float]:
+    """MACD/signal/histogram over a full price list (one pass)"""
+    indicator = MACD(fast, slow, signal)
+    for price in prices:
+        indicator.update(float(price))
+    return indicator.value
+
+
+class IndicatorEngine:
+    """Per-pair, per-timeframe indicator state fed from closed candles"""
+
+    def __init__(self, store: CandleStore):
+        self.store = store
+        self._state: Dict[Tuple[str, str], PairIndicators] = {}
+        store.subscribe(self._on_candles_closed)
+
+    def _on_candles_closed(self, closed: Dict[str, list]) -> None:
+        for pair, timeframes in closed.items():
+            for timeframe in timeframes:
+                state = self._state.get((pair, timeframe))
+                if state is None:
+                    # Built lazily (with a replay of history) on first read.
+                    continue
+                self._fold_closed(state, pair, timeframe)
+
+    def _fold_closed(self, state: PairIndicators, pair: str, timeframe: str) -> None:
+        series = self.store.series(pair, timeframe)
+        if series is None or len(series) < 2:
+            return
+        # The live candle is the last row; the one before it just closed.
+        candle = series.view(2)
+        timestamp = int(candle["timestamp"][0])
+        if state.last_timestamp is not None and timestamp <= state.last_timestamp:
+            return
+        state.update(float(candle["high"][0]), float(candle["low"][0]), float(candle["close"][0]), timestamp)
+
+    def _warm(self, pair: str, timeframe: str) -> Optional[PairIndicators]:
+        series = self.store.series(pair, timeframe)
+        if series is None:
+            return None
+        state = PairIndicators()
+        closed = len(series) - 1
+        if closed > 0:
+            history = series.view(len(series))
+            for i in range(closed):
+                state.update(
+                    float(history["high"][i]),
+                    float(history["low"][i]),
+                    float(history["close"][i]),
+                    int(history["timestamp"][i]),
+                )
+        self._state[(pair, timeframe)] = state
+        return state
+
+    def get(self, pair: str, timeframe: str = "1m") -> Optional[PairIndicators]:
+        state = self._state.get((pair, timeframe))
+        if state is None:
+            state = self._warm(pair, timeframe)
+        return state
+
+    def values(self, pair: str, timeframe: str = "1m") -> Optional[Dict[str, Any]]:
+        state = self.get(pair, timeframe)
+        return state.values() if state is not None else None
+
+    def ready(self, pair: str, timeframe: str = "1m") -> bool:
+        state = self.get(pair, timeframe)
+        return bool(state and state.ready)
+
+    def clear(self) -> None:
+        self._state.clear()
+
+
+# Global engine over the shared candle store
+indicator_engine = IndicatorEngine(candle_store)
@@ -0,0 +1,171 @@
+"""
+Micro-batching inference queue.
+
+Concurrent prediction requests are collected for a few milliseconds (or until
+the batch is full) and run as one ``predict`` call in a worker thread, so many
+users share one model invocation and the event loop never blocks on the model.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .model_registry import model_registry
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = float(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed > 0 else default
+
+
+def _keras_predict(model: Any, batch: np.ndarray) -> np.ndarray:
+    return np.asarray(model.predict(batch, verbose=0))
+
+
+class BatchedPredictor:
+    """Queue in front of one model that coalesces requests into batched predict calls"""
+
+    def __init__(
+        self,
+        model_getter: Callable[[], Any],
+        predict_fn: Callable[[Any, np.ndarray], np.ndarray] = _keras_predict,
+        max_batch: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        model_loader: Optional[Callable[[], Awaitable[Any]]] = None,
+    ):
+        self._model_getter = model_getter
+        self._model_loader = model_loader
+        self._predict_fn = predict_fn
+        self.max_batch = int(max_batch or _env_number("INFERENCE_MAX_BATCH", 64))
+        self.max_wait = (max_wait_ms or _env_number("INFERENCE_MAX_WAIT_MS", 5.0)) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batch_sizes: Deque[int] = deque(maxlen=1000)
+        self._queue_waits: Deque[float] = deque(maxlen=1000)
+        self._stats = {"requests": 0, "batches": 0, "errors": 0, "inference_seconds": 0.0}
+
+    @property
+    def available(self) -> bool:
+        """Whether the model is loaded right now (never triggers a load)"""
+        return self._model_getter() is not None
+
+    async def _get_model(self) -> Any:
+        model = self._model_getter()
+        if model is None and self._model_loader is not None:
+            model = await self._model_loader()
+        return model
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        worker = self._worker
+        if worker is None or worker.done() or worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        return self._queue
+
+    async def predict(self, sequence: np.ndarray) -> np.ndarray:
+        """Queue one input sequence and wait for its row of the batched prediction"""
+        if await self._get_model() is None:
+            raise RuntimeError("model is not loaded")
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._stats["requests"] += 1
+        await queue.put((np.asarray(sequence, dtype=np.float32), future, time.perf_counter()))
+        return await future
+
+    async def _collect(self, queue: asyncio.Queue) -> List[Tuple[np.ndarray, asyncio.Future, float]]:
+        batch = [await queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        while len(batch) < self.max_batch and not queue.empty():
+            batch.append(queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = await self._collect(queue)
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                self._queue_waits.append(started - enqueued)
+
+            # Inputs of different shapes can't share one tensor; run one call per shape.
+            groups: Dict[tuple, list] = {}
+            for item in batch:
+                groups.setdefault(item[0].shape, []).append(item)
+            for items in groups.values():
+                await self._predict_group(items)
+
+    async def _predict_group(self, items: list) -> None:
+        live = [item for item in items if not item[1].done()]
+        if not live:
+            return
+        model = self._model_getter()
+        self._batch_sizes.append(len(live))
+        self._stats["batches"] += 1
+        started = time.perf_counter()
+        try:
+            if model is None:
+                raise RuntimeError("model is not loaded")
+            inputs = np.stack([item[0] for item in live])
+            outputs = await asyncio.to_thread(self._predict_fn, model, inputs)
+        except Exception as exc:
+            self._stats["errors"] += 1
+            for _, future, _ in live:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            self._stats["inference_seconds"] += time.perf_counter() - started
+        for row, (_, future, _) in enumerate(live):
+            if not future.done():
+                future.set_result(outputs[row])
+
+    async def close(self) -> None:
+        worker, self._worker = self._worker, None
+        if worker is not None and not worker.done():
+            worker.cancel()
+            try:
+                await worker
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        sizes = np.asarray(self._batch_sizes, dtype=np.float64)
+        waits = np.asarray(self._queue_waits, dtype=np.float64) * 1000.0
+        return {
+            **self._stats,
+            "inference_seconds": round(self._stats["inference_seconds"], 4),
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size_avg": round(float(sizes.mean()), 2) if sizes.size else 0.0,
+            "batch_size_max": int(sizes.max()) if sizes.size else 0,
+            "queue_wait_ms_avg": round(float(waits.mean()), 3) if waits.size else 0.0,
+            "queue_wait_ms_p95": round(float(np.percentile(waits, 95)), 3) if waits.size else 0.0,
+        }
+
+
+# Shared queue in front of the LSTM price model; loads it on first use when not preloaded
+lstm_predictor = BatchedPredictor(
+    lambda: model_registry.peek("lstm_forex"),
+    model_loader=lambda: model_registry.get_async("lstm_forex"),
+)
@@ -0,0 +1,73 @@
+"""
+Helpers for multi-pair LLM prompts.
+
+One prompt carries every pair as a row of a compact pipe-separated table and
+asks for a JSON array back; responses are parsed into ``{pair: entry}`` so
+each pair can be validated (and fall back) on its own.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+
+def compact_series(values: Sequence[float], points: int = 20, digits: int = 5) -> str:
+    """Evenly downsample a price series to ``points`` values, space-separated"""
+    values = list(values)
+    if not values:
+        return ""
+    if len(values) > points:
+        step = (len(values) - 1) / (points - 1)
+        values = [values[round(i * step)] for i in range(points)]
+    return " ".join(f"{float(v):.{digits}f}" for v in values)
+
+
+def format_table(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> str:
+    lines = ["|".join(columns)]
+    for row in rows:
+        lines.append("|".join(str(cell) for cell in row))
+    return "\n".join(lines)
+
+
+def parse_json_array(text: str) -> List[Any]:
+    """Parse a JSON array from an LLM reply, tolerating code fences and wrapper objects"""
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", str(text or "").strip())
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError:
+        start, end = cleaned.find("["), cleaned.rfind("]")
+        if start < 0 or end <= start:
+            return []
+        try:
+            data = json.loads(cleaned[start:end + 1])
+        except json.JSONDecodeError:
+            return []
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, list):
+                return value
+        return []
+    return data if isinstance(data, list) else []
+
+
+def entries_by_pair(items: Iterable[Any], pairs: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Index response entries by their ``pair`` field, keeping only requested pairs"""
+    wanted = {pair.upper().replace("-", "/").replace(" ", ""): pair for pair in pairs}
+    found: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        key = str(item.get("pair", "")).upper().replace("-", "/").replace(" ", "")
+        pair = wanted.get(key)
+        if pair is not None and pair not in found:
+            found[pair] = item
+    return found
+
+
+def as_float(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number else None  # reject NaN
@@ -0,0 +1,185 @@
+"""
+Content-addressed LLM response cache.
+
+Responses are keyed on a hash of the normalized prompt inputs (model name,
+rates rounded to pip precision, news identities, ...) rather than on the
+prompt text, so market states that only differ below a pip reuse one answer.
+Entries expire after a per-use-case TTL, the cache is LRU-bounded, and
+concurrent misses for the same key share a single upstream call.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from .llm_gateway import DEFAULT_MODEL, llm_gateway
+
+
+DEFAULT_TTLS: Dict[str, float] = {
+    "market_sentiment": 60.0,
+    "price_prediction": 120.0,
+    "trading_signal": 30.0,
+    "news_impact": 300.0,
+    "news_sentiment": 900.0,
+    "portfolio_analysis": 300.0,
+    "condition_analysis": 600.0,
+    "condition_generation": 3600.0,
+}
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = float(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed >= 0 else default
+
+
+def _default_digits(pair: str) -> int:
+    pair_upper = pair.upper()
+    return 2 if "JPY" in pair_upper or "PKR" in pair_upper else 4
+
+
+def normalize_rates(
+    rates: Mapping[str, float],
+    digits: Callable[[str], int] = _default_digits,
+) -> Tuple[Tuple[str, float], ...]:
+    """Rates rounded to pip precision, sorted by pair"""
+    return tuple(
+        (pair, round(float(value), digits(pair)))
+        for pair, value in sorted(rates.items())
+        if isinstance(value, (int, float))
+    )
+
+
+def normalize_news(news: Iterable[Mapping[str, Any]]) -> Tuple[str, ...]:
+    """
+    Stable identities for news items.
+
+    Uses an explicit id/url when present, otherwise currency + event + impact
+    (never the fetch timestamp, which changes on every poll).
+    """
+    ids = []
+    for item in news or []:
+        ident = item.get("id") or item.get("url") or item.get("link")
+        if not ident:
+            ident = "|".join(str(item.get(field, "")) for field in ("currency", "event", "impact", "title"))
+        ids.append(str(ident))
+    return tuple(sorted(ids))
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", str(text or "")).strip()
+
+
+def make_key(use_case: str, model: str, inputs: Any) -> str:
+    payload = json.dumps([use_case, model, inputs], sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """TTL + LRU cache of LLM response texts with single-flight misses"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttls: Optional[Mapping[str, float]] = None):
+        self.max_entries = int(max_entries or _env_number("LLM_CACHE_MAX_ENTRIES", 512))
+        self.ttls = dict(DEFAULT_TTLS)
+        for use_case in self.ttls:
+            self.ttls[use_case] = _env_number(f"LLM_CACHE_TTL_{use_case.upper()}", self.ttls[use_case])
+        self.ttls.update(ttls or {})
+        self.default_ttl = _env_number("LLM_CACHE_TTL_SECONDS", 60.0)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    def ttl_for(self, use_case: str) -> float:
+        return self.ttls.get(use_case, self.default_ttl)
+
+    def _lookup(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    async def get_or_compute(self, use_case: str, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for ``key`` or compute it once.
+
+        Concurrent callers for the same missing key await the same computation;
+        failures are propagated to all of them and are not cached. The
+        computation runs in its own task, so a caller that is cancelled does
+        not cancel it for the others.
+        """
+        found, value = self._lookup(key)
+        if found:
+            self._stats["hits"] += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            self._stats["coalesced"] += 1
+        else:
+            self._stats["misses"] += 1
+            task = asyncio.get_running_loop().create_task(self._compute(use_case, key, compute))
+            # Mark retrieved so a failure nobody is still awaiting doesn't warn.
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, use_case: str, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await compute()
+            self._store(key, value, self.ttl_for(use_case))
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    async def generate(
+        self,
+        use_case: str,
+        prompt: str,
+        model: str = DEFAULT_MODEL,
+        key_inputs: Any = None,
+    ) -> str:
+        """
+        Cached ``llm_gateway.generate``.
+
+        ``key_inputs`` is the normalized data the prompt was built from; when
+        omitted the whitespace-normalized prompt itself is the key.
+        """
+        inputs = key_inputs if key_inputs is not None else normalize_text(prompt)
+        key = make_key(use_case, model, inputs)
+        return await self.get_or_compute(use_case, key, lambda: llm_gateway.generate(prompt, model=model))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "entries": len(self._entries), "max_entries": self.max_entries}
+
+
+# Global cache in front of the LLM gateway
+llm_cache = LLMResponseCache()
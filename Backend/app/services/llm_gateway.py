@@ -0,0 +1,194 @@
+"""
+Async LLM gateway.
+
+The single place that configures Gemini and talks to it. Calls never block
+the event loop (native async when the SDK offers it, a worker thread
+otherwise), are capped by a concurrency semaphore and a per-call deadline, and
+run behind a circuit breaker so a failing upstream makes callers fall back to
+their heuristics immediately instead of waiting on timeouts.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+load_dotenv()
+
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = float(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed > 0 else default
+
+
+class LLMUnavailable(RuntimeError):
+    """Raised when the gateway cannot serve a call; callers use their fallback"""
+
+
+class LLMGateway:
+    """Shared, rate-limited and circuit-broken access to Gemini models"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        reset_seconds: Optional[float] = None,
+        client: Any = None,
+    ):
+        self.api_key = api_key if api_key is not None else os.getenv("GEMINI_API_KEY")
+        self.max_concurrency = int(max_concurrency or _env_number("LLM_MAX_CONCURRENCY", 4))
+        self.timeout_seconds = timeout_seconds or _env_number("LLM_TIMEOUT_SECONDS", 20.0)
+        self.failure_threshold = int(failure_threshold or _env_number("LLM_BREAKER_FAILURES", 5))
+        self.reset_seconds = reset_seconds or _env_number("LLM_BREAKER_RESET_SECONDS", 60.0)
+        self._client = client if client is not None else genai
+        self._configured = False
+        self._models: Dict[str, Any] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open_probe = False
+        self._stats = {"calls": 0, "errors": 0, "timeouts": 0, "queue_timeouts": 0, "rejected": 0}
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key) and self._client is not None
+
+    @property
+    def circuit_state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    @property
+    def available(self) -> bool:
+        """True when a call would be attempted (configured and circuit not open)"""
+        return self.configured and self.circuit_state != "open"
+
+    def _ensure_configured(self) -> None:
+        if not self._configured:
+            self._client.configure(api_key=self.api_key)
+            self._configured = True
+
+    def model(self, name: str = DEFAULT_MODEL) -> Any:
+        """Reused model instance for ``name``"""
+        instance = self._models.get(name)
+        if instance is None:
+            self._ensure_configured()
+            instance = self._client.GenerativeModel(name)
+            self._models[name] = instance
+        return instance
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _admit(self) -> None:
+        state = self.circuit_state
+        if state == "open":
+            self._stats["rejected"] += 1
+            raise LLMUnavailable("LLM circuit open")
+        if state == "half_open":
+            if self._half_open_probe:
+                self._stats["rejected"] += 1
+                raise LLMUnavailable("LLM circuit half-open; probe in flight")
+            self._half_open_probe = True
+
+    def _record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._half_open_probe = False
+
+    def _record_failure(self) -> None:
+        self._failures += 1
+        if self._half_open_probe or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+        self._half_open_probe = False
+
+    async def _invoke(self, model: Any, prompt: str) -> Any:
+        async_call = getattr(model, "generate_content_async", None)
+        if async_call is not None:
+            return await async_call(prompt)
+        return await asyncio.to_thread(model.generate_content, prompt)
+
+    async def generate(self, prompt: str, model: str = DEFAULT_MODEL, timeout: Optional[float] = None) -> str:
+        """
+        Run one prompt and return the response text.
+
+        Raises LLMUnavailable when the gateway is unconfigured, the circuit is
+        open, the deadline passes or the upstream call fails. The deadline
+        covers waiting for a concurrency slot as well as the call itself.
+        """
+        if not self.configured:
+            raise LLMUnavailable("Gemini is unavailable (missing package or API key)")
+        self._admit()
+        deadline = timeout or self.timeout_seconds
+        self._stats["calls"] += 1
+        admitted = False
+
+        async def _call() -> str:
+            nonlocal admitted
+            async with self._get_semaphore():
+                admitted = True
+                response = await self._invoke(self.model(model), prompt)
+            return response.text
+
+        try:
+            text = await asyncio.wait_for(_call(), deadline)
+        except asyncio.TimeoutError as exc:
+            if admitted:
+                self._stats["timeouts"] += 1
+                self._record_failure()
+            else:
+                # Local congestion, not an upstream failure: leave the breaker alone
+                self._stats["queue_timeouts"] += 1
+                self._half_open_probe = False
+            raise LLMUnavailable(f"LLM call exceeded {deadline:.1f}s") from exc
+        except asyncio.CancelledError:
+            self._half_open_probe = False
+            raise
+        except Exception as exc:
+            self._stats["errors"] += 1
+            self._record_failure()
+            raise LLMUnavailable(f"LLM call failed: {exc}") from exc
+        self._record_success()
+        return text
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "configured": self.configured,
+            "circuit": self.circuit_state,
+            "consecutive_failures": self._failures,
+            "models": sorted(self._models),
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout_seconds,
+        }
+
+
+# Global gateway used by every Gemini-backed service
+llm_gateway = LLMGateway()
@@ -20,6 +20,8 @@ from xml.etree import ElementTree
 import aiohttp
 
 from ..forex_data_service import forex_service
+from .rates_provider import rates_provider
+from ..utils.http_clients import http_clients
 
 
 @dataclass(frozen=True)
@@ -38,7 +40,8 @@ class MarketIntelligenceService:
 
     _DEFAULT_PAIR = "EUR/USD"
     _CACHE_TTL_SECONDS = 90
-    _RATES_ENDPOINT = "https://api.exchangerate-api.com/v4/latest/USD"
+    _HTTP_TIMEOUT = aiohttp.ClientTimeout(total=6)
+    _RATE_PAIRS = ("EUR/USD", "GBP/USD", "USD/JPY", "USD/CHF", "AUD/USD", "USD/CAD", "NZD/USD")
 
     # Source list aligned with user requirement.
     _SOURCE_DEFINITIONS: List[SourceDefinition] = [
@@ -291,46 +294,10 @@ class MarketIntelligenceService:
         }
 
     async def _fetch_currency_rates(self) -> Dict[str, float]:
-        timeout = aiohttp.ClientTimeout(total=6)
-        headers = {"User-Agent": "ForexCompanionBot/1.0"}
-        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-            async with session.get(self._RATES_ENDPOINT) as response:
-                if response.status != 200:
-                    return {}
-                payload = await response.json()
-
-        rates = payload.get("rates", {}) if isinstance(payload, dict) else {}
-        if not isinstance(rates, dict):
+        snapshot = await rates_provider.get_snapshot()
+        if snapshot is None:
             return {}
-
-        def _safe_inverse(code: str) -> Optional[float]:
-            raw = rates.get(code)
-            if not raw:
-                return None
-            try:
-                return 1 / float(raw)
-            except Exception:
-                return None
-
-        def _safe_direct(code: str) -> Optional[float]:
-            raw = rates.get(code)
-            if raw is None:
-                return None
-            try:
-                return float(raw)
-            except Exception:
-                return None
-
-        normalized = {
-            "EUR/USD": _safe_inverse("EUR"),
-            "GBP/USD": _safe_inverse("GBP"),
-            "USD/JPY": _safe_direct("JPY"),
-            "USD/CHF": _safe_direct("CHF"),
-            "AUD/USD": _safe_inverse("AUD"),
-            "USD/CAD": _safe_direct("CAD"),
-            "NZD/USD": _safe_inverse("NZD"),
-        }
-        return {pair: price for pair, price in normalized.items() if price is not None}
+        return snapshot.rates_for(self._RATE_PAIRS)
 
     def _risk_level_from_volatility(self, volatility: str) -> str:
         if volatility == "high":
@@ -377,16 +344,12 @@ class MarketIntelligenceService:
         self,
         max_headlines: int,
     ) -> List[Dict[str, Any]]:
-        timeout = aiohttp.ClientTimeout(total=6)
-        headers = {"User-Agent": "ForexCompanionBot/1.0"}
-
-        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-            tasks = [
-                self._collect_single_source(session, source, max_headlines)
-                for source in self._SOURCE_DEFINITIONS
-                if source.method not in {"chart", "forex_factory_latest"}
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        tasks = [
+            self._collect_single_source(source, max_headlines)
+            for source in self._SOURCE_DEFINITIONS
+            if source.method not in {"chart", "forex_factory_latest"}
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
 
         records: List[Dict[str, Any]] = []
         for result in results:
@@ -406,7 +369,6 @@ class MarketIntelligenceService:
 
     async def _collect_single_source(
         self,
-        session: aiohttp.ClientSession,
         source: SourceDefinition,
         max_headlines: int,
     ) -> Dict[str, Any]:
@@ -421,9 +383,9 @@ class MarketIntelligenceService:
 
         try:
             if source.method == "rss":
-                headlines = await self._fetch_rss(session, source.url or "", source.label, max_headlines)
+                headlines = await self._fetch_rss(source.url or "", source.label, max_headlines)
             elif source.method == "google_news":
-                headlines = await self._fetch_google_news(session, source.query or source.label, source.label, max_headlines)
+                headlines = await self._fetch_google_news(source.query or source.label, source.label, max_headlines)
             else:
                 headlines = []
         except Exception as exc:
@@ -445,7 +407,6 @@ class MarketIntelligenceService:
 
     async def _fetch_google_news(
         self,
-        session: aiohttp.ClientSession,
         query: str,
         source_label: str,
         max_headlines: int,
@@ -455,11 +416,10 @@ class MarketIntelligenceService:
             "https://news.google.com/rss/search"
             f"?q={encoded}&hl=en-US&gl=US&ceid=US:en"
         )
-        return await self._fetch_rss(session, url, source_label, max_headlines)
+        return await self._fetch_rss(url, source_label, max_headlines)
 
     async def _fetch_rss(
         self,
-        session: aiohttp.ClientSession,
         url: str,
         source_label: str,
         max_headlines: int,
@@ -467,7 +427,8 @@ class MarketIntelligenceService:
         if not url:
             return []
 
-        async with session.get(url) as response:
+        session = http_clients.session(url)
+        async with session.get(url, timeout=self._HTTP_TIMEOUT) as response:
             if response.status != 200:
                 return []
             raw_xml = await response.text()
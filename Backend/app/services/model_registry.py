@@ -0,0 +1,127 @@
+"""
+Process-wide ML model registry.
+
+Models are loaded at most once per process and shared by every service
+instance. TensorFlow is only imported when a model file actually exists and
+is first requested (or preloaded in the background at startup), so importing
+the analysis modules stays cheap.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+def _load_keras_model(path: str) -> Any:
+    from tensorflow import keras
+
+    return keras.models.load_model(path)
+
+
+MODEL_SPECS: Dict[str, Dict[str, Any]] = {
+    "lstm_forex": {
+        "path": os.getenv("LSTM_MODEL_PATH", "models/lstm_forex.h5"),
+        "loader": _load_keras_model,
+    },
+}
+
+
+class ModelRegistry:
+    """Load-once, thread-safe cache of named models"""
+
+    def __init__(self, specs: Optional[Dict[str, Dict[str, Any]]] = None):
+        self._specs = dict(specs if specs is not None else MODEL_SPECS)
+        self._models: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {name: threading.Lock() for name in self._specs}
+        self._preload_task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, path: str, loader: Callable[[str], Any]) -> None:
+        self._specs[name] = {"path": path, "loader": loader}
+        self._locks.setdefault(name, threading.Lock())
+
+    def peek(self, name: str) -> Optional[Any]:
+        """Return the model if it is already loaded; never blocks or loads"""
+        return self._models.get(name)
+
+    def get(self, name: str) -> Optional[Any]:
+        """
+        Return the model, loading it on first use.
+
+        Returns None (and remembers why) when the file is missing or the load
+        fails, so later callers don't retry a load that cannot succeed.
+        """
+        if name in self._models:
+            return self._models[name]
+        if name in self._errors:
+            return None
+        spec = self._specs.get(name)
+        if spec is None:
+            raise KeyError(name)
+
+        with self._locks[name]:
+            if name in self._models:
+                return self._models[name]
+            if name in self._errors:
+                return None
+            path = spec["path"]
+            if not os.path.exists(path):
+                self._errors[name] = f"model file not found: {path}"
+                return None
+            started = time.perf_counter()
+            try:
+                model = spec["loader"](path)
+            except Exception as exc:
+                print(f"Model loading error ({name}): {exc}")
+                self._errors[name] = str(exc)
+                return None
+            self._load_seconds[name] = time.perf_counter() - started
+            self._models[name] = model
+            return model
+
+    async def get_async(self, name: str) -> Optional[Any]:
+        """Like ``get`` but loads in a worker thread so the event loop keeps running"""
+        model = self._models.get(name)
+        if model is not None or name in self._errors:
+            return model
+        return await asyncio.to_thread(self.get, name)
+
+    def preload_in_background(self, names: Optional[Iterable[str]] = None) -> Optional[asyncio.Task]:
+        """Start loading models in a worker thread; call from a running event loop"""
+        if self._preload_task is not None and not self._preload_task.done():
+            return self._preload_task
+        targets = list(names or self._specs.keys())
+
+        async def _preload():
+            for name in targets:
+                await self.get_async(name)
+
+        self._preload_task = asyncio.create_task(_preload())
+        return self._preload_task
+
+    def reset(self, name: Optional[str] = None) -> None:
+        """Forget loaded models/errors so the next ``get`` reloads"""
+        names = [name] if name else list(self._specs.keys())
+        for key in names:
+            self._models.pop(key, None)
+            self._errors.pop(key, None)
+            self._load_seconds.pop(key, None)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "path": spec["path"],
+                "loaded": name in self._models,
+                "error": self._errors.get(name),
+                "load_seconds": round(self._load_seconds[name], 3) if name in self._load_seconds else None,
+            }
+            for name, spec in self._specs.items()
+        }
+
+
+# Global registry shared by every analysis service instance
+model_registry = ModelRegistry()
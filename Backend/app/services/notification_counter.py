@@ -0,0 +1,169 @@
+"""
+Materialized per-user unread notification count.
+
+The count lives on the user's ``user_headers`` document
+(``notifications_unread``) and is adjusted with ``firestore.Increment``
+inside the same transaction that stores a notification or flips it to read,
+so reading it is a single document field instead of a scan of the user's
+whole notification history. Users created before the counter existed are
+backfilled once from their history. Recent values are kept in the shared
+user cache (NOTIFICATION_COUNT_TTL_SECONDS) and invalidated on every write.
+"""
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from firebase_admin import firestore
+
+from ..utils.firestore_repository import FirestoreRepository, firestore_repo
+from .user_cache import UserDataCache, user_cache
+
+
+COUNTER_COLLECTION = "user_headers"
+COUNTER_FIELD = "notifications_unread"
+CACHE_NAMESPACE = "notifications_unread"
+NOTIFICATIONS_COLLECTION = "notifications"
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = float(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed >= 0 else default
+
+
+def is_read(data: Dict[str, Any]) -> bool:
+    """Read flag across the field spellings stored over time"""
+    read = data.get("read")
+    if read is None:
+        read = data.get("is_read") or data.get("isRead") or False
+    return bool(read)
+
+
+class UnreadNotificationCounter:
+    """Transactional writes of a per-user unread counter, read through the user cache"""
+
+    def __init__(
+        self,
+        repo: FirestoreRepository = firestore_repo,
+        ttl_seconds: Optional[float] = None,
+        cache: Optional[UserDataCache] = None,
+    ):
+        self.repo = repo
+        self.ttl = ttl_seconds if ttl_seconds is not None else _env_number("NOTIFICATION_COUNT_TTL_SECONDS", 60.0)
+        self.cache = cache if cache is not None else user_cache
+        self._stats = {"hits": 0, "misses": 0, "backfills": 0}
+
+    def _remember(self, user_id: str, count: int) -> int:
+        count = max(int(count), 0)
+        if self.ttl > 0:
+            self.cache.put(CACHE_NAMESPACE, user_id, count, ttl_seconds=self.ttl)
+        return count
+
+    def cached(self, user_id: str) -> Optional[int]:
+        return self.cache.get(CACHE_NAMESPACE, user_id)
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the cached count on every worker"""
+        self.cache.invalidate(CACHE_NAMESPACE, user_id)
+
+    def _adjust(self, user_id: str, delta: int) -> None:
+        """Invalidate other workers but keep this worker's count, shifted by ``delta``"""
+        count = self.cached(user_id)
+        self.invalidate(user_id)
+        if count is not None:
+            self._remember(user_id, count + delta)
+
+    def _counter_ref(self, user_id: str) -> Any:
+        return self.repo.collection(COUNTER_COLLECTION).document(user_id)
+
+    async def get(self, user_id: str, header_data: Optional[Dict[str, Any]] = None) -> int:
+        """Unread count; ``header_data`` is the user's freshly read header document, if at hand"""
+        if header_data is not None and header_data.get(COUNTER_FIELD) is not None:
+            return self._remember(user_id, header_data[COUNTER_FIELD])
+        count = self.cached(user_id)
+        if count is not None:
+            self._stats["hits"] += 1
+            return count
+        self._stats["misses"] += 1
+        return self._remember(
+            user_id, await self.repo.transaction(COUNTER_COLLECTION, "unread_count", self._read_or_backfill, user_id)
+        )
+
+    def _read_counter(self, transaction: Any, user_id: str) -> Tuple[int, bool]:
+        """``(count, stored)``; counts the history once if the field was never written"""
+        current = (self._counter_ref(user_id).get(transaction=transaction).to_dict() or {}).get(COUNTER_FIELD)
+        if current is not None:
+            return int(current), True
+        query = self.repo.collection(NOTIFICATIONS_COLLECTION).where("userId", "==", user_id)
+        self._stats["backfills"] += 1
+        return sum(1 for doc in transaction.get(query) if not is_read(doc.to_dict() or {})), False
+
+    def _write_counter(self, transaction: Any, user_id: str, counter: Tuple[int, bool], delta: int) -> None:
+        count, stored = counter
+        value = firestore.Increment(delta) if stored else max(count + delta, 0)
+        transaction.set(self._counter_ref(user_id), {COUNTER_FIELD: value}, merge=True)
+
+    def _read_or_backfill(self, transaction: Any, user_id: str) -> int:
+        counter = self._read_counter(transaction, user_id)
+        if not counter[1]:
+            self._write_counter(transaction, user_id, counter, 0)
+        return counter[0]
+
+    async def store(self, notification_id: str, user_id: str, payload: Dict[str, Any]) -> None:
+        """Write a notification document, counting it if it is new and unread"""
+        created = await self.repo.transaction(
+            NOTIFICATIONS_COLLECTION, "store", self._store, notification_id, user_id, payload
+        )
+        if created:
+            self._adjust(user_id, 1)
+
+    def _store(self, transaction: Any, notification_id: str, user_id: str, payload: Dict[str, Any]) -> bool:
+        doc_ref = self.repo.collection(NOTIFICATIONS_COLLECTION).document(notification_id)
+        snapshot = doc_ref.get(transaction=transaction)
+        was_unread = snapshot.exists and not is_read(snapshot.to_dict() or {})
+        counts = not was_unread and not is_read(payload)
+        # Transactions need every read before the first write
+        counter = self._read_counter(transaction, user_id) if counts else None
+        transaction.set(doc_ref, payload, merge=True)
+        if counter is not None:
+            self._write_counter(transaction, user_id, counter, 1)
+        return counts
+
+    async def mark_read(self, notification_id: str, user_id: Optional[str], fields: Dict[str, Any]) -> Optional[bool]:
+        """Flip a notification to read; None if it belongs to another user, else whether it was unread"""
+        flipped = await self.repo.transaction(
+            NOTIFICATIONS_COLLECTION, "mark_read", self._mark_read, notification_id, user_id, fields
+        )
+        if flipped is None:
+            return None
+        owner, was_unread = flipped
+        if was_unread and owner:
+            self._adjust(owner, -1)
+        return was_unread
+
+    def _mark_read(
+        self, transaction: Any, notification_id: str, user_id: Optional[str], fields: Dict[str, Any]
+    ) -> Optional[Tuple[Optional[str], bool]]:
+        doc_ref = self.repo.collection(NOTIFICATIONS_COLLECTION).document(notification_id)
+        snapshot = doc_ref.get(transaction=transaction)
+        data = snapshot.to_dict() or {}
+        owner = data.get("userId")
+        if user_id and owner and owner != user_id:
+            return None
+        was_unread = snapshot.exists and not is_read(data)
+        counter = self._read_counter(transaction, owner) if was_unread and owner else None
+        transaction.set(doc_ref, fields, merge=True)
+        if counter is not None:
+            self._write_counter(transaction, owner, counter, -1)
+        return owner, was_unread
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "ttl_seconds": self.ttl}
+
+
+# Shared by the header and notification services
+unread_counter = UnreadNotificationCounter()
@@ -0,0 +1,309 @@
+"""
+Pub/sub backbone for WebSocket fan-out across workers.
+
+Publishers hand one envelope to the bus; every worker's handler receives it
+and relays it to the sockets that worker holds. ``InProcessPubSub`` delivers
+straight to the local handler (single worker, the default); ``RedisPubSub``
+goes through a Redis channel (any Redis-protocol server will do) so multiple
+uvicorn workers or replicas see the same stream.
+
+The bus also provides leases for leader election, so only one worker runs
+singleton jobs such as the upstream forex poller. A dropped Redis subscription
+is re-established with exponential backoff (up to PUBSUB_RECONNECT_MAX_SECONDS);
+while it is down a worker only claims leadership after
+PUBSUB_STANDALONE_AFTER_SECONDS, so a short blip doesn't start a poller on
+every worker.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+DEFAULT_CHANNEL = "tajir:ws"
+
+# Numbers the envelope and publishes it atomically, so every worker sees the
+# same sequence numbers in the same order: "<seq>|<json>".
+PUBLISH_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('PUBLISH', ARGV[1], seq .. '|' .. ARGV[2])
+return seq
+"""
+
+# Renew the lease if we hold it, otherwise try to take it.
+LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = float(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed >= 0 else default
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class InProcessPubSub:
+    """Single-process bus: publish calls the local handler directly"""
+
+    backend = "memory"
+
+    def __init__(self):
+        self.handler: Optional[Handler] = None
+        self.worker_id = _worker_id()
+        self._stats = {"published": 0, "delivered": 0}
+
+    async def start(self) -> None:
+        return None
+
+    async def publish(self, envelope: Dict[str, Any]) -> None:
+        self._stats["published"] += 1
+        if self.handler is not None:
+            self._stats["delivered"] += 1
+            await self.handler(envelope)
+
+    async def acquire_leadership(self, name: str, ttl_seconds: float) -> bool:
+        return True
+
+    async def release_leadership(self, name: str) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "backend": self.backend, "worker_id": self.worker_id}
+
+
+class RedisPubSub(InProcessPubSub):
+    """
+    Redis-backed bus shared by all workers.
+
+    Until ``start`` succeeds (or if Redis is unavailable) it behaves like the
+    in-process bus, so a single worker keeps working without Redis.
+    """
+
+    backend = "redis"
+
+    def __init__(
+        self,
+        url: str,
+        channel: Optional[str] = None,
+        client: Any = None,
+        reconnect_max_seconds: Optional[float] = None,
+        standalone_after_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__()
+        self.url = url
+        self.channel = channel or os.getenv("PUBSUB_CHANNEL", DEFAULT_CHANNEL)
+        self.reconnect_max = (
+            reconnect_max_seconds
+            if reconnect_max_seconds is not None
+            else _env_number("PUBSUB_RECONNECT_MAX_SECONDS", 30.0)
+        )
+        self.standalone_after = (
+            standalone_after_seconds
+            if standalone_after_seconds is not None
+            else _env_number("PUBSUB_STANDALONE_AFTER_SECONDS", 60.0)
+        )
+        self._clock = clock
+        self._client = client
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._connected = False
+        # When the subscription was last lost (or first failed); None while up or never started
+        self._down_since: Optional[float] = None
+        self._stats.update({"errors": 0, "fallback_deliveries": 0, "reconnects": 0})
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    async def start(self) -> None:
+        if self._listener is not None and not self._listener.done():
+            return
+        if self._client is None:
+            if aioredis is None:
+                print("[PubSub] redis package not installed; using in-process delivery")
+                return
+            self._client = aioredis.from_url(self.url)
+        try:
+            await self._subscribe()
+            print(f"[PubSub] Subscribed to Redis channel {self.channel}")
+        except Exception as exc:
+            self._stats["errors"] += 1
+            self._down_since = self._clock()
+            print(f"[PubSub] Redis unavailable ({exc}); delivering in-process and retrying in the background")
+        self._listener = asyncio.get_running_loop().create_task(self._run())
+
+    async def _subscribe(self) -> None:
+        self._pubsub = self._client.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._connected = True
+        self._down_since = None
+
+    async def _drop_subscription(self) -> None:
+        self._connected = False
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            try:
+                await pubsub.unsubscribe(self.channel)
+                await pubsub.close()
+            except Exception:
+                pass
+
+    async def _run(self) -> None:
+        """Listen while subscribed; resubscribe with exponential backoff after a drop"""
+        delay = min(1.0, self.reconnect_max)
+        while True:
+            if not self._connected:
+                await asyncio.sleep(delay)
+                try:
+                    await self._subscribe()
+                except Exception:
+                    self._stats["errors"] += 1
+                    delay = min(delay * 2, self.reconnect_max)
+                    continue
+                self._stats["reconnects"] += 1
+                print(f"[PubSub] Reconnected to Redis channel {self.channel}")
+            delay = min(1.0, self.reconnect_max)
+            try:
+                await self._listen()
+                reason: Any = "subscription closed"
+            except Exception as exc:
+                reason = exc
+            self._stats["errors"] += 1
+            print(f"[PubSub] Lost Redis subscription ({reason}); delivering in-process and reconnecting")
+            self._down_since = self._clock()
+            await self._drop_subscription()
+
+    async def _listen(self) -> None:
+        async for message in self._pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            data = message.get("data")
+            if isinstance(data, bytes):
+                data = data.decode("utf-8")
+            seq, _, body = str(data).partition("|")
+            try:
+                envelope = json.loads(body)
+                envelope["seq"] = int(seq)
+            except (TypeError, ValueError):
+                self._stats["errors"] += 1
+                continue
+            self._stats["delivered"] += 1
+            if self.handler is not None:
+                try:
+                    await self.handler(envelope)
+                except Exception as exc:
+                    self._stats["errors"] += 1
+                    print(f"[PubSub] Handler failed: {exc}")
+
+    async def publish(self, envelope: Dict[str, Any]) -> None:
+        if not self.connected:
+            self._stats["fallback_deliveries"] += 1
+            await super().publish(envelope)
+            return
+        self._stats["published"] += 1
+        try:
+            await self._client.eval(
+                PUBLISH_SCRIPT,
+                1,
+                f"{self.channel}:seq",
+                self.channel,
+                json.dumps(envelope, separators=(",", ":"), default=str),
+            )
+        except Exception as exc:
+            # Keep this worker's own clients served while Redis is down.
+            self._stats["errors"] += 1
+            self._stats["fallback_deliveries"] += 1
+            print(f"[PubSub] Publish failed ({exc}); delivering locally")
+            if self.handler is not None:
+                await self.handler(envelope)
+
+    async def acquire_leadership(self, name: str, ttl_seconds: float) -> bool:
+        """
+        Take or renew the ``name`` lease; True while this worker holds it.
+
+        Without a subscription the lease can't be checked: a bus that was never
+        started (or has no redis package) runs standalone, otherwise the worker
+        only claims leadership once Redis has been down for the grace period.
+        """
+        if not self.connected:
+            if self._down_since is None:
+                return True
+            return self._clock() - self._down_since >= self.standalone_after
+        try:
+            held = await self._client.eval(
+                LEASE_SCRIPT, 1, f"{self.channel}:leader:{name}", self.worker_id, int(ttl_seconds * 1000)
+            )
+        except Exception as exc:
+            self._stats["errors"] += 1
+            print(f"[PubSub] Lease check for {name} failed: {exc}")
+            return False
+        return bool(held)
+
+    async def release_leadership(self, name: str) -> None:
+        if not self.connected:
+            return
+        try:
+            await self._client.eval(RELEASE_SCRIPT, 1, f"{self.channel}:leader:{name}", self.worker_id)
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.cancel()
+            try:
+                await listener
+            except (asyncio.CancelledError, Exception):
+                pass
+        await self._drop_subscription()
+        self._down_since = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**super().get_stats(), "channel": self.channel, "connected": self.connected}
+
+
+def create_pubsub(channel: Optional[str] = None) -> InProcessPubSub:
+    """Bus selected by ``PUBSUB_URL`` (``redis://...``); in-process when unset"""
+    url = (os.getenv("PUBSUB_URL") or "").strip()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisPubSub(url, channel=channel)
+    return InProcessPubSub()
@@ -0,0 +1,196 @@
+"""
+Shared exchange-rate provider.
+
+All services read USD-base rates through one provider. Concurrent callers are
+coalesced into a single in-flight upstream fetch, and the result is served as a
+versioned snapshot until its TTL expires, so upstream calls stay at one per
+interval no matter how many tasks, routes and notifications ask.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from ..utils.http_clients import http_clients
+from .cross_rates import CrossRateMatrix
+
+
+RATES_ENDPOINT = "https://api.exchangerate-api.com/v4/latest/USD"
+
+MAJOR_PAIRS = (
+    "EUR/USD",
+    "GBP/USD",
+    "USD/JPY",
+    "USD/CHF",
+    "AUD/USD",
+    "USD/CAD",
+    "NZD/USD",
+    "EUR/GBP",
+    "USD/PKR",
+)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = float(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed > 0 else default
+
+
+@dataclass(frozen=True)
+class RatesSnapshot:
+    """Immutable USD-base rate table with a monotonically increasing version"""
+    version: int
+    usd_base: Dict[str, float]
+    fetched_at: float = field(default_factory=time.time)
+    fetched_monotonic: float = field(default_factory=time.monotonic)
+    matrix: CrossRateMatrix = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Every cross is computed once here, not per lookup.
+        object.__setattr__(self, "matrix", CrossRateMatrix.from_usd_base(self.usd_base))
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_monotonic
+
+    def cross(self, pair: str) -> Optional[float]:
+        """``BASE/QUOTE`` from the precomputed cross-rate matrix."""
+        return self.matrix.get(pair)
+
+    def precision(self, pair: str) -> Optional[int]:
+        """Display decimals for ``BASE/QUOTE``."""
+        return self.matrix.precision(pair)
+
+    def rates_for(self, pairs: Iterable[str]) -> Dict[str, float]:
+        """Bulk ``{BASE/QUOTE: rate}`` for the pairs the table can price."""
+        return self.matrix.lookup_many(pairs)["rates"]
+
+
+class RatesProvider:
+    """Single-flight, TTL-cached fetcher for exchangerate-api USD-base rates"""
+
+    def __init__(
+        self,
+        url: str = RATES_ENDPOINT,
+        ttl_seconds: Optional[float] = None,
+        timeout_seconds: float = 10.0,
+    ):
+        self.url = url
+        self.ttl_seconds = ttl_seconds or _env_float("RATES_TTL_SECONDS", 10.0)
+        self.timeout_seconds = timeout_seconds
+        self._snapshot: Optional[RatesSnapshot] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._version = 0
+        self._subscribers: List[Callable[[RatesSnapshot], Any]] = []
+        self._stats = {
+            "upstream_calls": 0,
+            "upstream_errors": 0,
+            "cache_hits": 0,
+            "coalesced": 0,
+        }
+
+    @property
+    def snapshot(self) -> Optional[RatesSnapshot]:
+        """Latest snapshot without triggering a fetch"""
+        return self._snapshot
+
+    def subscribe(self, callback: Callable[[RatesSnapshot], Any]) -> Callable[[], None]:
+        """Call ``callback(snapshot)`` once per new snapshot version; returns an unsubscribe function"""
+        self._subscribers.append(callback)
+
+        def _unsubscribe() -> None:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+        return _unsubscribe
+
+    async def get_snapshot(self, max_age: Optional[float] = None) -> Optional[RatesSnapshot]:
+        """
+        Return a snapshot no older than ``max_age`` seconds (default: the TTL).
+
+        Falls back to the last good snapshot if the upstream fetch fails, and
+        returns None only when no snapshot has ever been fetched.
+        """
+        limit = self.ttl_seconds if max_age is None else max_age
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.age() < limit:
+            self._stats["cache_hits"] += 1
+            return snapshot
+
+        task = self._inflight
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._refresh())
+            self._inflight = task
+        else:
+            self._stats["coalesced"] += 1
+
+        try:
+            # Shield so a cancelled caller doesn't cancel the fetch for everyone else.
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            print(f"Error fetching currency rates: {exc}")
+            return self._snapshot
+
+    async def _refresh(self) -> RatesSnapshot:
+        try:
+            self._stats["upstream_calls"] += 1
+            usd_base = await self._fetch_usd_base()
+            self._version += 1
+            snapshot = RatesSnapshot(version=self._version, usd_base=usd_base)
+            self._snapshot = snapshot
+            self._notify(snapshot)
+            return snapshot
+        except Exception:
+            self._stats["upstream_errors"] += 1
+            raise
+        finally:
+            self._inflight = None
+
+    async def _fetch_usd_base(self) -> Dict[str, float]:
+        session = http_clients.session(self.url)
+        timeout = aiohttp.ClientTimeout(total=self.timeout_seconds)
+        async with session.get(self.url, timeout=timeout) as response:
+            if response.status != 200:
+                raise RuntimeError(f"rates upstream returned status {response.status}")
+            payload = await response.json()
+
+        rates = payload.get("rates", {}) if isinstance(payload, dict) else {}
+        usd_base: Dict[str, float] = {}
+        for code, value in (rates or {}).items():
+            if isinstance(value, (int, float)) and value > 0:
+                usd_base[str(code).upper()] = float(value)
+        if not usd_base:
+            raise RuntimeError("rates upstream returned an empty table")
+        return usd_base
+
+    def _notify(self, snapshot: RatesSnapshot) -> None:
+        for callback in list(self._subscribers):
+            try:
+                callback(snapshot)
+            except Exception as exc:
+                print(f"Rates subscriber failed: {exc}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            **self._stats,
+            "version": snapshot.version if snapshot else 0,
+            "age_seconds": round(snapshot.age(), 3) if snapshot else None,
+            "ttl_seconds": self.ttl_seconds,
+            "currencies": len(snapshot.usd_base) if snapshot else 0,
+        }
+
+
+# Global instance shared by every rates consumer
+rates_provider = RatesProvider()
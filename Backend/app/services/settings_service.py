@@ -1,13 +1,17 @@
 from datetime import datetime
 from typing import Any, Dict, Optional
 
-from ..utils.firestore_client import get_firestore_client
+from ..utils.firestore_repository import FirestoreRepository, firestore_repo
+from .user_cache import UserDataCache, user_cache
 
 
 class SettingsService:
-    def __init__(self) -> None:
-        self.db = get_firestore_client()
-        self.collection = self.db.collection("user_settings")
+    collection = "user_settings"
+
+    def __init__(self, repo: FirestoreRepository = firestore_repo, cache: UserDataCache = user_cache) -> None:
+        self.repo = repo
+        self.db = repo.db
+        self.cache = cache
 
     def _format_ts(self, value: Optional[object]) -> Optional[str]:
         if isinstance(value, datetime):
@@ -16,9 +20,11 @@ class SettingsService:
             return value
         return None
 
-    def get_settings(self, user_id: str) -> Dict[str, Any]:
-        doc = self.collection.document(user_id).get()
-        data = doc.to_dict() or {}
+    async def get_settings(self, user_id: str) -> Dict[str, Any]:
+        return await self.cache.get_or_load("settings", user_id, lambda: self._load_settings(user_id))
+
+    async def _load_settings(self, user_id: str) -> Dict[str, Any]:
+        data = await self.repo.get_dict(self.collection, user_id)
         settings = data.get("settings") or {}
 
         return {
@@ -28,10 +34,9 @@ class SettingsService:
             "updated_at": self._format_ts(data.get("updated_at")),
         }
 
-    def update_settings(self, user_id: str, updates: Dict[str, Any], replace: bool = False) -> Dict[str, Any]:
+    async def update_settings(self, user_id: str, updates: Dict[str, Any], replace: bool = False) -> Dict[str, Any]:
         now = datetime.utcnow().isoformat()
-        doc_ref = self.collection.document(user_id)
-        doc = doc_ref.get()
+        doc = await self.repo.get(self.collection, user_id)
         data = doc.to_dict() or {}
         current_settings = data.get("settings") or {}
 
@@ -48,11 +53,14 @@ class SettingsService:
         if not doc.exists:
             payload["created_at"] = now
 
-        doc_ref.set(payload, merge=True)
+        await self.repo.set(self.collection, user_id, payload, merge=True)
 
-        return {
+        result = {
             "user_id": user_id,
             "settings": merged_settings,
             "created_at": self._format_ts(payload.get("created_at") or data.get("created_at")),
             "updated_at": now,
         }
+        self.cache.invalidate("settings", user_id)
+        self.cache.put("settings", user_id, result)
+        return result
@@ -12,6 +12,7 @@ import os
 from fastapi import HTTPException
 
 from ..utils.firestore_client import get_firestore_client
+from .user_cache import UserDataCache, user_cache
 
 
 def _env_bool(name: str, default: bool = False) -> bool:
@@ -39,8 +40,11 @@ class SubscriptionService:
         "api_key_management": "premium",
     }
 
-    def __init__(self) -> None:
+    def __init__(self, cache: UserDataCache = user_cache) -> None:
+        # Authoritative store only while Firestore is unavailable; otherwise
+        # subscriptions are read through the shared user cache.
         self._subscriptions_by_user: Dict[str, Dict[str, Any]] = {}
+        self.cache = cache
         self._firestore = None
         self._firestore_disabled = False
 
@@ -134,8 +138,15 @@ class SubscriptionService:
             merge=True,
         )
 
+    def _remember(self, subscription: Dict[str, Any]) -> None:
+        user_id = subscription["user_id"]
+        if self._get_firestore() is None:
+            self._subscriptions_by_user[user_id] = dict(subscription)
+        else:
+            self.cache.put("subscription", user_id, subscription)
+
     def get_subscription(self, user_id: str) -> Dict[str, Any]:
-        cached = self._subscriptions_by_user.get(user_id)
+        cached = self._subscriptions_by_user.get(user_id) or self.cache.get("subscription", user_id)
         if cached:
             cached["paywall_enabled"] = self.paywall_enabled
             cached["premium_price_usd"] = self.premium_price_usd
@@ -145,7 +156,7 @@ class SubscriptionService:
         if loaded is None:
             loaded = self._default_subscription(user_id)
 
-        self._subscriptions_by_user[user_id] = dict(loaded)
+        self._remember(loaded)
         return dict(loaded)
 
     def set_subscription(
@@ -169,8 +180,9 @@ class SubscriptionService:
             "paywall_enabled": self.paywall_enabled,
             "premium_price_usd": self.premium_price_usd,
         }
-        self._subscriptions_by_user[user_id] = dict(updated)
         self._persist(updated)
+        self.cache.invalidate("subscription", user_id)
+        self._remember(updated)
         return dict(updated)
 
     def _compare_plan_rank(self, current_plan: str, required_plan: str) -> bool:
@@ -0,0 +1,178 @@
+"""
+Read-through cache for per-user documents that change rarely.
+
+Settings, header profile, subscription and notification preferences are read
+on nearly every request but written only when the user edits them. Values are
+kept per ``(namespace, user_id)`` for USER_CACHE_TTL_SECONDS in a
+size-bounded LRU (USER_CACHE_MAX_ENTRIES). Concurrent misses for the same key
+share one load. Every write path calls ``invalidate``, which drops the local
+copy and, when PUBSUB_URL is set, tells the other workers to drop theirs
+over the pub/sub bus.
+"""
+import asyncio
+import copy
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .pubsub import DEFAULT_CHANNEL, InProcessPubSub, create_pubsub
+
+
+Key = Tuple[str, str]
+_MISSING = object()
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = float(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed > 0 else default
+
+
+class UserDataCache:
+    """TTL + LRU map of (namespace, user_id) -> value with cross-worker invalidation"""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        bus: Optional[InProcessPubSub] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = int(max_entries or _env_number("USER_CACHE_MAX_ENTRIES", 20000))
+        self.ttl = float(ttl_seconds or _env_number("USER_CACHE_TTL_SECONDS", 300.0))
+        self._clock = clock
+        self._entries: "OrderedDict[Key, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Key, asyncio.Task] = {}
+        self.bus = bus if bus is not None else create_pubsub(
+            channel=f"{os.getenv('PUBSUB_CHANNEL', DEFAULT_CHANNEL)}:cache"
+        )
+        self.bus.handler = self._on_invalidation
+        self._pending_publishes: set = set()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "invalidations": 0,
+            "remote_invalidations": 0,
+            "evictions": 0,
+        }
+
+    def get(self, namespace: str, user_id: str, default: Any = None) -> Any:
+        """Cached value (a copy) or ``default``"""
+        key = (namespace, user_id)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self._stats["misses"] += 1
+            return default
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return copy.deepcopy(entry[1])
+
+    def put(self, namespace: str, user_id: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        key = (namespace, user_id)
+        self._entries[key] = (self._clock() + (ttl_seconds or self.ttl), copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        user_id: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[float] = None,
+    ) -> Any:
+        """Cached value, or ``await loader()`` once for all concurrent callers and cache it"""
+        value = self.get(namespace, user_id, _MISSING)
+        if value is not _MISSING:
+            return value
+        key = (namespace, user_id)
+        task = self._inflight.get(key)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.get_running_loop().create_task(self._load(key, loader, ttl_seconds))
+            # Every caller may have gone away by the time a load fails
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._inflight[key] = task
+            self._stats["loads"] += 1
+        # Shield so a cancelled caller doesn't cancel the load for everyone else
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _load(self, key: Key, loader: Callable[[], Awaitable[Any]], ttl_seconds: Optional[float]) -> Any:
+        try:
+            value = await loader()
+        except BaseException:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+            raise
+        # An invalidation during the load means ``value`` may predate the write
+        if self._inflight.get(key) is asyncio.current_task():
+            del self._inflight[key]
+            self.put(key[0], key[1], value, ttl_seconds)
+        return value
+
+    def invalidate(self, namespace: str, user_id: str) -> None:
+        """Drop the entry here and on every other worker"""
+        self._drop(namespace, user_id)
+        self._stats["invalidations"] += 1
+        if self.bus.backend == "memory":
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(
+            self.bus.publish({"namespace": namespace, "user_id": user_id, "origin": self.bus.worker_id})
+        )
+        self._pending_publishes.add(task)
+        task.add_done_callback(self._pending_publishes.discard)
+
+    def _drop(self, namespace: str, user_id: str) -> None:
+        key = (namespace, user_id)
+        self._entries.pop(key, None)
+        self._inflight.pop(key, None)
+
+    async def _on_invalidation(self, envelope: Dict[str, Any]) -> None:
+        if envelope.get("origin") == self.bus.worker_id:
+            return
+        namespace, user_id = envelope.get("namespace"), envelope.get("user_id")
+        if namespace and user_id:
+            self._drop(str(namespace), str(user_id))
+            self._stats["remote_invalidations"] += 1
+
+    async def start(self) -> None:
+        await self.bus.start()
+
+    async def stop(self) -> None:
+        if self._pending_publishes:
+            await asyncio.gather(*self._pending_publishes, return_exceptions=True)
+        await self.bus.close()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        namespaces: Dict[str, int] = {}
+        for namespace, _ in self._entries:
+            namespaces[namespace] = namespaces.get(namespace, 0) + 1
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "namespaces": namespaces,
+            "bus": self.bus.get_stats(),
+        }
+
+
+# Shared by the settings, header, subscription and notification services
+user_cache = UserDataCache()
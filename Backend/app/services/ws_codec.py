@@ -0,0 +1,105 @@
+"""
+WebSocket wire encodings.
+
+JSON text frames are the default. Clients can negotiate a compact encoding
+with ``?encoding=`` or a subprotocol:
+
+- ``msgpack``: every message as a MessagePack binary frame (same fields).
+- ``binary``: ``rates:<PAIR>`` ticks as fixed 35-byte binary frames
+  (see ``TICK_STRUCT``), everything else as JSON text frames. The pair index
+  comes from the ``pair_ids`` map in the welcome / subscribe replies.
+
+A message is encoded at most once per encoding, however many connections
+receive it.
+"""
+from __future__ import annotations
+
+import json
+import struct
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple, Union
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+JSON = "json"
+MSGPACK = "msgpack"
+BINARY = "binary"
+
+# Sec-WebSocket-Protocol names -> encoding
+SUBPROTOCOLS = {
+    "json": JSON,
+    "msgpack": MSGPACK,
+    "forex-binary.v1": BINARY,
+}
+
+# kind (1 = rate tick), pair index, bid, ask, timestamp (epoch ms), seq
+TICK_STRUCT = struct.Struct("<BHddqQ")
+TICK_KIND = 1
+
+
+def encode_json(message: Dict[str, Any]) -> str:
+    """Same compact encoding Starlette's ``send_json`` uses"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    return (JSON, MSGPACK, BINARY) if msgpack is not None else (JSON, BINARY)
+
+
+def negotiate_encoding(websocket: Any) -> Tuple[str, Optional[str]]:
+    """
+    Pick the encoding for a connection: ``(encoding, subprotocol_to_accept)``.
+
+    An offered subprotocol wins over ``?encoding=``; unknown or unavailable
+    choices fall back to JSON.
+    """
+    supported = available_encodings()
+    for offered in websocket.scope.get("subprotocols") or []:
+        encoding = SUBPROTOCOLS.get(offered)
+        if encoding in supported:
+            return encoding, offered
+    requested = (websocket.query_params.get("encoding") or JSON).lower()
+    return (requested if requested in supported else JSON), None
+
+
+def epoch_millis(timestamp: Any) -> int:
+    if isinstance(timestamp, str):
+        try:
+            parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+            if parsed.tzinfo is None:
+                parsed = parsed.astimezone()
+            return int(parsed.timestamp() * 1000)
+        except ValueError:
+            pass
+    return int(datetime.now(timezone.utc).timestamp() * 1000)
+
+
+class EncodedMessage:
+    """A message plus its lazily built, cached payload per encoding"""
+
+    __slots__ = ("message", "tick", "_payloads")
+
+    def __init__(self, message: Dict[str, Any], tick: Optional[Tuple[int, float, float, int]] = None):
+        self.message = message
+        # (pair index, bid, ask, epoch ms) for messages with a fixed binary form
+        self.tick = tick
+        self._payloads: Dict[str, Union[str, bytes]] = {}
+
+    def payload(self, encoding: str = JSON) -> Union[str, bytes]:
+        cached = self._payloads.get(encoding)
+        if cached is None:
+            if encoding == BINARY and self.tick is not None:
+                pair_id, bid, ask, millis = self.tick
+                cached = TICK_STRUCT.pack(TICK_KIND, pair_id, bid, ask, millis, int(self.message.get("seq") or 0))
+            elif encoding == MSGPACK and msgpack is not None:
+                cached = msgpack.packb(self.message, default=str)
+            elif encoding != JSON:
+                cached = self.payload(JSON)
+            else:
+                cached = encode_json(self.message)
+            self._payloads[encoding] = cached
+        return cached
@@ -0,0 +1,124 @@
+"""
+Per-connection outbound queues for WebSocket fan-out.
+
+A broadcast is encoded once and the same payload is appended to every
+subscriber's outbox; each outbox is drained by its own writer task, so a slow
+client only ever delays itself.
+
+Market-data frames carry a conflation key (their topic). While a frame with
+the same key is still waiting, a newer one replaces it in place, so a lagging
+client gets the latest snapshot instead of a backlog of stale ones. Frames
+without a key (task progress, notifications) are delivered in order; an
+outbox whose ordered backlog fills up marks its client as a slow consumer and
+the manager drops the connection. Keyed slots don't count toward that limit:
+there is at most one per topic the client is subscribed to.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Union
+
+from .ws_codec import JSON
+
+Payload = Union[str, bytes]
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed > 0 else default
+
+
+class ConnectionOutbox:
+    """Bounded, conflating FIFO of encoded frames with a dedicated writer task"""
+
+    def __init__(
+        self,
+        websocket: Any,
+        on_failure: Callable[[Any], None],
+        max_size: Optional[int] = None,
+        encoding: str = JSON,
+    ):
+        self.websocket = websocket
+        self.encoding = encoding
+        self.max_size = int(max_size or _env_int("WS_SEND_QUEUE_MAX", 256))
+        self._on_failure = on_failure
+        # (key, payload) slots; keyed slots read their payload from _latest
+        self._queue: Deque[Tuple[Optional[str], Optional[Payload]]] = deque()
+        self._latest: Dict[str, Payload] = {}
+        self._ordered = 0
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.sent = 0
+        self.conflated = 0
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def put(self, payload: Payload, key: Optional[str] = None, force: bool = False) -> bool:
+        """
+        Queue a frame; False when the outbox is closed or its ordered backlog is full.
+
+        With a ``key``, a still-queued frame for the same key is replaced
+        (keeping its place in the queue) instead of adding another one; keyed
+        frames are never rejected for size. ``force`` skips the size check for
+        bounded bursts such as replays.
+        """
+        if self.closed:
+            return False
+        if key is not None and key in self._latest:
+            self._latest[key] = payload
+            self.conflated += 1
+            return True
+        if key is None:
+            if self._ordered >= self.max_size and not force:
+                return False
+            self._ordered += 1
+            self._queue.append((None, payload))
+        else:
+            self._latest[key] = payload
+            self._queue.append((key, None))
+        self._ready.set()
+        return True
+
+    def _pop(self) -> Payload:
+        key, payload = self._queue.popleft()
+        if key is None:
+            self._ordered -= 1
+        else:
+            payload = self._latest.pop(key)
+        return payload
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                await self._ready.wait()
+                while self._queue:
+                    payload = self._pop()
+                    if isinstance(payload, bytes):
+                        await self.websocket.send_bytes(payload)
+                    else:
+                        await self.websocket.send_text(payload)
+                    self.sent += 1
+                self._ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.closed = True
+            self._on_failure(self.websocket)
+
+    def close(self) -> None:
+        self.closed = True
+        self._queue.clear()
+        self._latest.clear()
+        self._ordered = 0
+        if self._task is not asyncio.current_task() and not self._task.done():
+            self._task.cancel()
@@ -0,0 +1,86 @@
+"""
+Replay buffer for resumable WebSocket streams.
+
+Every logged message gets a sequence number from one process-wide counter, so
+sequence numbers increase monotonically within each stream and a single
+``since`` offset is enough to resume all of a client's streams. Each stream
+(``rates:EUR/USD``, ``task:<id>``, ``notifications:<uid>``, ...) keeps a
+bounded ring of its latest messages, with their cached encodings; the least
+recently written streams are evicted once there are too many of them.
+"""
+from __future__ import annotations
+
+import os
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed > 0 else default
+
+
+class _Ring:
+    __slots__ = ("entries", "evicted_seq")
+
+    def __init__(self, capacity: int):
+        self.entries: Deque[Tuple[int, Any]] = deque(maxlen=capacity)
+        # Newest sequence number that fell out of the ring
+        self.evicted_seq = 0
+
+
+class ReplayLog:
+    """Per-stream rings of (seq, message) backed by one global sequence counter"""
+
+    def __init__(self, capacity: Optional[int] = None, max_streams: Optional[int] = None):
+        self.capacity = int(capacity or _env_int("WS_REPLAY_BUFFER", 64))
+        self.max_streams = int(max_streams or _env_int("WS_REPLAY_MAX_STREAMS", 2048))
+        self.last_seq = 0
+        self._streams: "OrderedDict[str, _Ring]" = OrderedDict()
+
+    def next_seq(self) -> int:
+        self.last_seq += 1
+        return self.last_seq
+
+    def observe(self, seq: int) -> None:
+        """Track a sequence number assigned elsewhere (e.g. by the pub/sub bus)"""
+        if seq > self.last_seq:
+            self.last_seq = seq
+
+    def record(self, stream: str, seq: int, message: Any) -> None:
+        ring = self._streams.get(stream)
+        if ring is None:
+            ring = self._streams[stream] = _Ring(self.capacity)
+            while len(self._streams) > self.max_streams:
+                self._streams.popitem(last=False)
+        else:
+            self._streams.move_to_end(stream)
+        if len(ring.entries) == ring.entries.maxlen:
+            ring.evicted_seq = ring.entries[0][0]
+        ring.entries.append((seq, message))
+
+    def since(self, stream: str, seq: int) -> Tuple[List[Tuple[int, Any]], bool]:
+        """
+        Frames of ``stream`` newer than ``seq`` and whether some were lost.
+
+        The flag is True when frames after ``seq`` have already been evicted,
+        i.e. the client is too far behind for a delta replay.
+        """
+        ring = self._streams.get(stream)
+        if ring is None:
+            return [], False
+        return [entry for entry in ring.entries if entry[0] > seq], seq < ring.evicted_seq
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "last_seq": self.last_seq,
+            "streams": len(self._streams),
+            "buffered_frames": sum(len(ring.entries) for ring in self._streams.values()),
+            "capacity": self.capacity,
+        }
@@ -24,7 +24,7 @@ def _get_service() -> SettingsService:
 
 @router.get("/settings", response_model=SettingsResponse)
 async def get_settings(user_id: str = Depends(get_current_user_id)):
-    return _get_service().get_settings(user_id=user_id)
+    return await _get_service().get_settings(user_id=user_id)
 
 
 @router.patch("/settings", response_model=SettingsResponse)
@@ -32,7 +32,7 @@ async def update_settings(
     payload: SettingsUpdateRequest,
     user_id: str = Depends(get_current_user_id),
 ):
-    return _get_service().update_settings(
+    return await _get_service().update_settings(
         user_id=user_id,
         updates=payload.settings,
         replace=payload.replace,
@@ -0,0 +1,179 @@
+"""
+Async access to Firestore for request handlers and services.
+
+The firebase-admin client is synchronous, so every round trip made from an
+``async def`` used to block the event loop. All reads and writes now go
+through ``firestore_repo``, which runs them on a dedicated, bounded thread
+pool (FIRESTORE_MAX_WORKERS) and records latency per collection/operation
+for ``/api/health/metrics``.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from firebase_admin import firestore
+
+from .firestore_client import get_firestore_client
+
+
+MAX_BATCH_WRITES = 500
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed > 0 else default
+
+
+class _LatencyStats:
+    """Call count, errors and a window of recent latencies for one collection/operation"""
+
+    def __init__(self, window: int = 256):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, failed: bool) -> None:
+        self.count += 1
+        self.errors += int(failed)
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent.append(elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+
+        def _pct(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": _pct(0.50),
+            "p95_ms": _pct(0.95),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+class FirestoreRepository:
+    """Runs blocking Firestore calls off the event loop on a bounded pool"""
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any] = get_firestore_client,
+        max_workers: Optional[int] = None,
+    ):
+        self._client_factory = client_factory
+        self._client = None
+        self.max_workers = int(max_workers or _env_int("FIRESTORE_MAX_WORKERS", 16))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._metrics: Dict[Tuple[str, str], _LatencyStats] = {}
+        self._in_flight = 0
+
+    @property
+    def db(self) -> Any:
+        """Underlying client; raises if Firebase is not configured"""
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    def collection(self, name: str) -> Any:
+        return self.db.collection(name)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="firestore")
+        return self._executor
+
+    async def run(self, collection: str, operation: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the Firestore pool, timed under ``collection``/``operation``"""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        failed = True
+        self._in_flight += 1
+        try:
+            result = await loop.run_in_executor(self._get_executor(), partial(fn, *args, **kwargs))
+            failed = False
+            return result
+        finally:
+            self._in_flight -= 1
+            stats = self._metrics.get((collection, operation))
+            if stats is None:
+                stats = self._metrics[(collection, operation)] = _LatencyStats()
+            stats.record((time.perf_counter() - started) * 1000, failed)
+
+    async def get(self, collection: str, doc_id: str) -> Any:
+        """Document snapshot (check ``.exists``)"""
+        return await self.run(collection, "get", self.collection(collection).document(doc_id).get)
+
+    async def get_dict(self, collection: str, doc_id: str) -> Dict[str, Any]:
+        doc = await self.get(collection, doc_id)
+        return doc.to_dict() or {}
+
+    async def set(self, collection: str, doc_id: str, data: Dict[str, Any], merge: bool = False) -> None:
+        await self.run(collection, "set", self.collection(collection).document(doc_id).set, data, merge=merge)
+
+    async def add(self, collection: str, data: Dict[str, Any]) -> str:
+        """Create a document with a generated id and return the id"""
+        doc_ref = self.collection(collection).document()
+        await self.run(collection, "set", doc_ref.set, data)
+        return doc_ref.id
+
+    async def query(self, collection: str, build: Callable[[Any], Any]) -> List[Any]:
+        """Snapshots of ``build(collection_ref)`` (a query), fully read on the pool"""
+        query = build(self.collection(collection))
+        return await self.run(collection, "query", lambda: list(query.stream()))
+
+    async def batch_set(self, collection: str, docs: Sequence[Tuple[str, Dict[str, Any]]]) -> None:
+        """Write ``(doc_id, data)`` pairs in a single WriteBatch commit (Firestore allows 500)"""
+        if len(docs) > MAX_BATCH_WRITES:
+            raise ValueError(f"A WriteBatch holds at most {MAX_BATCH_WRITES} writes")
+
+        def _commit():
+            ref = self.collection(collection)
+            batch = self.db.batch()
+            for doc_id, data in docs:
+                batch.set(ref.document(doc_id), data)
+            batch.commit()
+
+        await self.run(collection, "batch_set", _commit)
+
+    async def transaction(self, collection: str, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(transaction, *args)`` as a retried Firestore transaction on the pool"""
+        def _run():
+            return firestore.transactional(fn)(self.db.transaction(), *args)
+
+        return await self.run(collection, operation, _run)
+
+    def get_stats(self) -> Dict[str, Any]:
+        collections: Dict[str, Dict[str, Any]] = {}
+        for (collection, operation), stats in sorted(self._metrics.items()):
+            collections.setdefault(collection, {})[operation] = stats.snapshot()
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "collections": collections,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Shared by every Firestore-backed service
+firestore_repo = FirestoreRepository()
@@ -0,0 +1,148 @@
+"""
+App-scoped HTTP client registry.
+
+One pooled client per upstream host, opened once and closed only at
+application shutdown, so keep-alive connections (and their TLS sessions) are
+reused across requests, background streams and tasks instead of being torn
+down after every call.
+"""
+import asyncio
+import os
+from typing import Any, Dict, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+import httpx
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed > 0 else default
+
+
+def _host_key(host_or_url: str) -> str:
+    value = (host_or_url or "").strip().lower()
+    if "://" in value:
+        value = urlsplit(value).netloc
+    return value or "default"
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class HttpClientRegistry:
+    """Lazily creates and owns pooled aiohttp/httpx clients keyed by upstream host"""
+
+    def __init__(self):
+        self.pool_limit = _env_int("HTTP_POOL_LIMIT", 100)
+        self.pool_limit_per_host = _env_int("HTTP_POOL_LIMIT_PER_HOST", 20)
+        self.keepalive_seconds = _env_int("HTTP_KEEPALIVE_SECONDS", 60)
+        self.default_timeout_seconds = _env_int("HTTP_TIMEOUT_SECONDS", 15)
+        self.user_agent = os.getenv("HTTP_USER_AGENT", "ForexCompanionBot/1.0")
+        # Clients are bound to the loop that opened them, so they are keyed by
+        # (loop, host); a new loop (tests, worker threads) gets its own pool.
+        self._aiohttp: Dict[Tuple[Optional[asyncio.AbstractEventLoop], str], aiohttp.ClientSession] = {}
+        self._httpx: Dict[Tuple[Optional[asyncio.AbstractEventLoop], str], httpx.AsyncClient] = {}
+        self._closing: Set[asyncio.Task] = set()
+        self._started = False
+
+    def _retire_stale(self, clients: Dict[Tuple[Any, str], Any]) -> None:
+        """Drop clients whose loop has finished and close them on the current loop"""
+        stale = [key for key in clients if key[0] is not None and key[0].is_closed()]
+        current = _running_loop()
+        for key in stale:
+            client = clients.pop(key)
+            if current is None:
+                continue
+            task = current.create_task(self._close_client(client))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def _close_client(self, client: Any) -> None:
+        try:
+            if isinstance(client, aiohttp.ClientSession):
+                await client.close()
+            else:
+                await client.aclose()
+        except Exception as exc:
+            print(f"[HTTP] Failed to close client: {exc}")
+
+    def session(self, host_or_url: str) -> aiohttp.ClientSession:
+        """Pooled aiohttp session for a host (or any URL on that host)"""
+        key = (_running_loop(), _host_key(host_or_url))
+        session = self._aiohttp.get(key)
+        if session is not None and not session.closed:
+            return session
+
+        self._retire_stale(self._aiohttp)
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_limit,
+            limit_per_host=self.pool_limit_per_host,
+            keepalive_timeout=self.keepalive_seconds,
+            ttl_dns_cache=300,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.default_timeout_seconds),
+            headers={"User-Agent": self.user_agent},
+        )
+        self._aiohttp[key] = session
+        return session
+
+    def httpx_client(self, host_or_url: str) -> httpx.AsyncClient:
+        """Pooled httpx client for a host (or any URL on that host)"""
+        key = (_running_loop(), _host_key(host_or_url))
+        client = self._httpx.get(key)
+        if client is not None and not client.is_closed:
+            return client
+
+        self._retire_stale(self._httpx)
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.pool_limit,
+                max_keepalive_connections=self.pool_limit_per_host,
+                keepalive_expiry=self.keepalive_seconds,
+            ),
+            timeout=httpx.Timeout(self.default_timeout_seconds),
+            headers={"User-Agent": self.user_agent},
+        )
+        self._httpx[key] = client
+        return client
+
+    async def startup(self, hosts: Optional[list] = None):
+        """Pre-open clients for known upstreams so the first request skips setup"""
+        for host in hosts or []:
+            self.session(host)
+        self._started = True
+
+    async def close(self):
+        """Close every pooled client; called once at application shutdown"""
+        clients = list(self._aiohttp.values()) + list(self._httpx.values())
+        self._aiohttp.clear()
+        self._httpx.clear()
+        for client in clients:
+            await self._close_client(client)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        self._started = False
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "started": self._started,
+            "aiohttp_hosts": sorted({key[1] for key, s in self._aiohttp.items() if not s.closed}),
+            "httpx_hosts": sorted({key[1] for key, c in self._httpx.items() if not c.is_closed}),
+        }
+
+
+# Global registry; opened in the app lifespan and closed at shutdown
+http_clients = HttpClientRegistry()
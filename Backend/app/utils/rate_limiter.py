@@ -0,0 +1,215 @@
+"""
+GCRA rate limiting shared by HTTP and WebSocket entry points.
+
+Each key stores a single "theoretical arrival time", so memory per client is
+constant and a check is O(1) regardless of the limit. Keys whose arrival time
+has passed carry no state and are swept out periodically. A request can be
+checked against several keys at once (e.g. ``ip:<host>`` and ``user:<uid>``);
+it is admitted only if every key allows it.
+
+State lives in process memory by default; set RATE_LIMIT_STORE_URL to a
+``redis://`` URL to share limits across workers (falls back to memory if
+Redis is unreachable, and only retries Redis after a short cool-down so a
+dead connection cannot stall every request).
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed > 0 else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = float(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed > 0 else default
+
+
+# Slack for float rounding: (now + window) - now can land a hair above window
+TAT_EPSILON = 1e-9
+
+# Atomic multi-key GCRA using the server clock; returns {allowed, retry_after}
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local tats = {}
+for i, key in ipairs(KEYS) do
+    local tat = tonumber(redis.call('GET', key) or '0')
+    if tat < now then tat = now end
+    local new_tat = tat + interval
+    if new_tat - now > window + 1e-9 then
+        return {0, tostring(new_tat - now - window)}
+    end
+    tats[i] = new_tat
+end
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, tostring(tats[i]), 'PX', math.ceil((tats[i] - now) * 1000))
+end
+return {1, '0'}
+"""
+
+
+class MemoryRateLimitStore:
+    """Per-process GCRA state: key -> theoretical arrival time"""
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        max_keys: Optional[int] = None,
+        sweep_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_keys = int(max_keys or _env_int("RATE_LIMIT_MAX_KEYS", 100_000))
+        self.sweep_seconds = sweep_seconds
+        self._clock = clock
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._next_sweep = clock() + sweep_seconds
+        self._stats = {"evicted_idle": 0, "evicted_overflow": 0}
+
+    def _sweep(self, now: float) -> None:
+        idle = [key for key, tat in self._tats.items() if tat <= now]
+        for key in idle:
+            del self._tats[key]
+        self._stats["evicted_idle"] += len(idle)
+        self._next_sweep = now + self.sweep_seconds
+
+    async def acquire(self, keys: Sequence[str], interval: float, window: float) -> Tuple[bool, float]:
+        now = self._clock()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        new_tats = []
+        for key in keys:
+            tat = max(self._tats.get(key, now), now)
+            new_tat = tat + interval
+            if new_tat - now > window + TAT_EPSILON:
+                return False, new_tat - now - window
+            new_tats.append(new_tat)
+        for key, new_tat in zip(keys, new_tats):
+            self._tats[key] = new_tat
+            self._tats.move_to_end(key)
+        while len(self._tats) > self.max_keys:
+            self._tats.popitem(last=False)
+            self._stats["evicted_overflow"] += 1
+        return True, 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "backend": self.backend, "keys": len(self._tats), "max_keys": self.max_keys}
+
+
+class RedisRateLimitStore:
+    """GCRA state in Redis so every worker enforces the same limits"""
+
+    backend = "redis"
+
+    def __init__(
+        self,
+        url: str,
+        client: Any = None,
+        fallback: Optional[MemoryRateLimitStore] = None,
+        prefix: str = "tajir:rl:",
+        timeout_seconds: Optional[float] = None,
+        retry_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.url = url
+        self.prefix = prefix
+        self._client = client
+        self._fallback = fallback or MemoryRateLimitStore()
+        self.timeout = float(timeout_seconds or _env_float("RATE_LIMIT_REDIS_TIMEOUT_SECONDS", 0.25))
+        self.retry_seconds = float(retry_seconds or _env_float("RATE_LIMIT_REDIS_RETRY_SECONDS", 5.0))
+        self._clock = clock
+        self._retry_at = 0.0
+        self._stats = {"errors": 0, "fallback_checks": 0}
+
+    def _get_client(self) -> Any:
+        if self._client is None and aioredis is not None:
+            self._client = aioredis.from_url(
+                self.url, socket_connect_timeout=self.timeout, socket_timeout=self.timeout
+            )
+        return self._client
+
+    async def acquire(self, keys: Sequence[str], interval: float, window: float) -> Tuple[bool, float]:
+        client = self._get_client()
+        if client is not None and self._clock() >= self._retry_at:
+            try:
+                allowed, retry_after = await client.eval(
+                    GCRA_SCRIPT, len(keys), *[self.prefix + key for key in keys], interval, window
+                )
+                if self._retry_at:
+                    self._retry_at = 0.0
+                    print("[RateLimit] Redis reachable again; using shared limits")
+                return bool(int(allowed)), float(retry_after)
+            except Exception as exc:
+                self._stats["errors"] += 1
+                if not self._retry_at:
+                    print(f"[RateLimit] Redis check failed ({exc}); using per-process limits")
+                # Skip Redis for a while instead of paying a timeout on every request
+                self._retry_at = self._clock() + self.retry_seconds
+        self._stats["fallback_checks"] += 1
+        return await self._fallback.acquire(keys, interval, window)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "backend": self.backend,
+            "degraded": self._retry_at > 0,
+            "fallback": self._fallback.get_stats(),
+        }
+
+
+def create_rate_limit_store():
+    url = (os.getenv("RATE_LIMIT_STORE_URL") or "").strip()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisRateLimitStore(url)
+    return MemoryRateLimitStore()
+
+
+class RateLimiter:
+    """``limit`` requests per ``window_seconds`` per key (bursts up to ``limit``)"""
+
+    def __init__(self, name: str, limit: int, window_seconds: float, store: Any = None):
+        self.name = name
+        self.limit = max(int(limit), 1)
+        self.window = float(window_seconds)
+        self.interval = self.window / self.limit
+        self.store = store if store is not None else rate_limit_store
+        self._stats = {"allowed": 0, "limited": 0}
+
+    async def check(self, *keys: Optional[str]) -> Tuple[bool, float]:
+        """``(allowed, retry_after_seconds)`` for a request counted against every given key"""
+        scoped = [f"{self.name}:{key}" for key in keys if key]
+        if not scoped:
+            return True, 0.0
+        allowed, retry_after = await self.store.acquire(scoped, self.interval, self.window)
+        self._stats["allowed" if allowed else "limited"] += 1
+        return allowed, retry_after
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "limit": self.limit, "window_seconds": self.window}
+
+
+# One store shared by every limiter (HTTP requests, WebSocket connects)
+rate_limit_store = create_rate_limit_store()
@@ -0,0 +1,127 @@
+"""
+Verified Firebase ID-token claims cache.
+
+Verifying an ID token costs a signature check (and occasionally a key fetch),
+so verified claims are cached under the token's SHA-256 until the token's own
+``exp`` (capped by AUTH_CACHE_MAX_TTL_SECONDS). Tokens that fail verification
+are remembered briefly so a client retrying a bad token can't force repeated
+verification. Raw tokens are never stored.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from firebase_admin import exceptions as firebase_exceptions
+
+from .firestore_client import verify_firebase_token
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = float(value.strip())
+    except Exception:
+        return default
+    return parsed if parsed >= 0 else default
+
+
+def _is_definitive(exc: Exception) -> bool:
+    """Token problems (bad, expired, revoked) are cached; outages are not"""
+    return isinstance(exc, (ValueError, firebase_exceptions.InvalidArgumentError))
+
+
+class InvalidTokenError(ValueError):
+    """Raised for a token that recently failed verification"""
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of token hash -> verified claims (or a recent failure)"""
+
+    def __init__(
+        self,
+        verifier: Callable[[str], Dict[str, Any]] = verify_firebase_token,
+        max_entries: Optional[int] = None,
+        max_ttl_seconds: Optional[float] = None,
+        negative_ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._verifier = verifier
+        self.max_entries = int(max_entries or _env_number("AUTH_CACHE_MAX_ENTRIES", 10000))
+        self.max_ttl = max_ttl_seconds if max_ttl_seconds is not None else _env_number("AUTH_CACHE_MAX_TTL_SECONDS", 3600.0)
+        self.negative_ttl = (
+            negative_ttl_seconds if negative_ttl_seconds is not None else _env_number("AUTH_NEGATIVE_TTL_SECONDS", 30.0)
+        )
+        self._clock = clock
+        # key -> (expires_at, claims, error message); exactly one of claims/error is set
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]], Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "negative_hits": 0, "evictions": 0}
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _store(self, key: str, expires_at: float, claims: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, claims, error)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Claims for ``token``, verifying it at most once per lifetime; raises like the verifier"""
+        key = self._key(token)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry[2] is not None:
+                    self._stats["negative_hits"] += 1
+                    raise InvalidTokenError(entry[2])
+                self._stats["hits"] += 1
+                return dict(entry[1])
+            self._stats["misses"] += 1
+
+        try:
+            claims = self._verifier(token)
+        except Exception as exc:
+            if _is_definitive(exc) and self.negative_ttl > 0:
+                self._store(key, now + self.negative_ttl, None, str(exc) or exc.__class__.__name__)
+            raise
+
+        expires_at = now + self.max_ttl
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        if expires_at > now:
+            self._store(key, expires_at, dict(claims), None)
+        return claims
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "entries": len(self._entries), "max_entries": self.max_entries}
+
+
+# Shared by the HTTP middleware, auth dependencies and WebSocket endpoints
+token_cache = VerifiedTokenCache()
+
+
+def verify_firebase_token_cached(token: str) -> Dict[str, Any]:
+    return token_cache.verify(token)
@@ -2,36 +2,49 @@
 Complete WebSocket Routes with Live Forex Data Integration
 """
 import os
-import time
-from collections import defaultdict, deque
 from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 from typing import Optional
 import asyncio
 
 from .enhanced_websocket_manager import ws_manager
+from .services.ws_codec import negotiate_encoding
 from .forex_data_service import forex_service
-from .utils.firestore_client import verify_firebase_token
+from .utils.rate_limiter import RateLimiter
+from .utils.token_cache import verify_firebase_token_cached
 from .security import resolve_dev_user
 
 router = APIRouter(prefix="/api", tags=["Live Updates"])
 
-_ws_rate_limit_max = int(os.getenv("WS_CONN_MAX", "30"))
-_ws_rate_limit_window = int(os.getenv("WS_CONN_WINDOW_SECONDS", "60"))
-_ws_rate_limit_store = defaultdict(deque)
+# Connection attempts per client IP (checked before auth) and per user (after)
+ws_connect_limiter = RateLimiter(
+    "ws",
+    limit=int(os.getenv("WS_CONN_MAX", "30")),
+    window_seconds=int(os.getenv("WS_CONN_WINDOW_SECONDS", "60")),
+)
+_max_bulk_pairs = int(os.getenv("FOREX_BULK_PAIRS_MAX", "500"))
 
 
-def _ws_rate_limit_ok(websocket: WebSocket) -> bool:
-    client_host = websocket.client.host if websocket.client else "unknown"
-    now = time.time()
-    window_start = now - _ws_rate_limit_window
-    bucket = _ws_rate_limit_store[client_host]
-    while bucket and bucket[0] <= window_start:
-        bucket.popleft()
-    if len(bucket) >= _ws_rate_limit_max:
-        return False
-    bucket.append(now)
-    return True
+async def _ws_rate_limit_ok(websocket: WebSocket, user_id: Optional[str] = None) -> bool:
+    if user_id:
+        allowed, _ = await ws_connect_limiter.check(f"user:{user_id}")
+    else:
+        client_host = websocket.client.host if websocket.client else "unknown"
+        allowed, _ = await ws_connect_limiter.check(f"ip:{client_host}")
+    return allowed
+
+
+def _requested_topics(websocket: WebSocket) -> list:
+    raw = websocket.query_params.get("topics") or ""
+    return [topic.strip() for topic in raw.split(",") if topic.strip()]
+
+
+def _requested_since(websocket: WebSocket) -> Optional[int]:
+    raw = websocket.query_params.get("since")
+    try:
+        return max(int(raw), 0) if raw not in (None, "") else None
+    except ValueError:
+        return None
 
 
 def _extract_ws_token(websocket: WebSocket) -> Optional[str]:
@@ -54,7 +67,7 @@ async def _require_ws_auth(websocket: WebSocket):
         return None, None, False
 
     try:
-        decoded = verify_firebase_token(token)
+        decoded = verify_firebase_token_cached(token)
     except Exception:
         return None, None, False
 
@@ -89,9 +102,13 @@ async def websocket_endpoint(websocket: WebSocket, task_id: str):
     """
     WebSocket endpoint for real-time updates for a specific task.
 
-    Connect to: ws://localhost:8080/api/ws/{task_id}
+    Connect to: ws://localhost:8080/api/ws/{task_id}[?since=<seq>]
+
+    Messages carry a ``seq``; reconnecting with the last one seen replays the
+    buffered updates that were missed (or a ``replay_gap`` notice plus the
+    latest snapshots when the gap is too old).
     """
-    if not _ws_rate_limit_ok(websocket):
+    if not await _ws_rate_limit_ok(websocket):
         await websocket.close(code=4408)
         return
 
@@ -99,20 +116,35 @@ async def websocket_endpoint(websocket: WebSocket, task_id: str):
     if not user_id:
         await websocket.close(code=4401)
         return
+    if not await _ws_rate_limit_ok(websocket, user_id):
+        await websocket.close(code=4408)
+        return
 
-    await ws_manager.connect(websocket, task_id)
+    encoding, subprotocol = negotiate_encoding(websocket)
+    await ws_manager.connect(
+        websocket,
+        task_id,
+        user_id=user_id,
+        topics=_requested_topics(websocket),
+        since=_requested_since(websocket),
+        encoding=encoding,
+        subprotocol=subprotocol,
+    )
     try:
         while True:
             data = await websocket.receive_text()
             if not is_dev:
                 try:
-                    verify_firebase_token(token)
+                    # Cached until the token's exp, so this is a dict lookup
+                    verify_firebase_token_cached(token)
                 except Exception:
                     await websocket.close(code=4401)
                     return
 
             if data == "ping":
                 await websocket.send_text("pong")
+            elif await ws_manager.handle_control_message(websocket, data):
+                continue
             else:
                 await ws_manager.send_update(
                     task_id=task_id,
@@ -132,9 +164,13 @@ async def websocket_global(websocket: WebSocket):
     """
     Global WebSocket endpoint for broadcasts.
 
-    Connect to: ws://localhost:8080/api/ws
+    Connect to: ws://localhost:8080/api/ws[?topics=rates:EUR/USD,news][&encoding=msgpack|binary]
+
+    Send ``{"action": "subscribe", "topics": ["rates:EUR/USD", "news"]}`` (or
+    ``"unsubscribe"``) to change topics. Clients that never subscribe keep
+    receiving the full ``forex`` stream payload.
     """
-    if not _ws_rate_limit_ok(websocket):
+    if not await _ws_rate_limit_ok(websocket):
         await websocket.close(code=4408)
         return
 
@@ -142,20 +178,35 @@ async def websocket_global(websocket: WebSocket):
     if not user_id:
         await websocket.close(code=4401)
         return
+    if not await _ws_rate_limit_ok(websocket, user_id):
+        await websocket.close(code=4408)
+        return
 
-    await ws_manager.connect(websocket, "global")
+    encoding, subprotocol = negotiate_encoding(websocket)
+    await ws_manager.connect(
+        websocket,
+        "global",
+        user_id=user_id,
+        topics=_requested_topics(websocket),
+        since=_requested_since(websocket),
+        encoding=encoding,
+        subprotocol=subprotocol,
+    )
     try:
         while True:
             data = await websocket.receive_text()
             if not is_dev:
                 try:
-                    verify_firebase_token(token)
+                    # Cached until the token's exp, so this is a dict lookup
+                    verify_firebase_token_cached(token)
                 except Exception:
                     await websocket.close(code=4401)
                     return
 
             if data == "ping":
                 await websocket.send_text("pong")
+            else:
+                await ws_manager.handle_control_message(websocket, data)
     except WebSocketDisconnect:
         ws_manager.disconnect(websocket, "global")
     except Exception as e:
@@ -184,7 +235,8 @@ async def get_all_connections():
     """Get total number of active WebSocket connections."""
     return {
         "total_connections": ws_manager.get_connection_count(),
-        "tasks": list(ws_manager.active_connections.keys())
+        "tasks": list(ws_manager.active_connections.keys()),
+        "topics": ws_manager.get_topic_counts(),
     }
 
 
@@ -207,49 +259,44 @@ async def stop_forex_stream():
 
 
 @router.get("/forex/rates")
-async def get_forex_rates():
-    """Get current forex exchange rates."""
-    try:
-        await forex_service.initialize()
+async def get_forex_rates(pairs: Optional[str] = None):
+    """
+    Get current forex exchange rates.
+    Pass ``pairs=EUR/JPY,GBP/CHF,...`` to resolve any crosses in one call.
+    """
+    if not pairs:
         rates = await forex_service.get_currency_rates()
         return {"status": "success", "rates": rates}
-    finally:
-        await forex_service.close()
+
+    requested = [item for item in pairs.split(",") if item.strip()]
+    if len(requested) > _max_bulk_pairs:
+        raise HTTPException(status_code=400, detail=f"At most {_max_bulk_pairs} pairs per request")
+    result = await forex_service.get_cross_rates(requested)
+    return {"status": "success", **result}
 
 
 @router.get("/forex/news")
 async def get_forex_news():
     """Get latest forex news and economic calendar."""
-    try:
-        await forex_service.initialize()
-        news = await forex_service.get_forex_factory_news()
-        return {"status": "success", "news": news}
-    finally:
-        await forex_service.close()
+    news = await forex_service.get_forex_factory_news()
+    return {"status": "success", "news": news}
 
 
 @router.get("/forex/sentiment")
 async def get_market_sentiment():
     """Get current market sentiment analysis."""
-    try:
-        await forex_service.initialize()
-        sentiment = await forex_service.get_market_sentiment()
-        return {"status": "success", "sentiment": sentiment}
-    finally:
-        await forex_service.close()
+    sentiment = await forex_service.get_market_sentiment()
+    return {"status": "success", "sentiment": sentiment}
 
 
 @router.get("/forex/forecast")
 async def get_pair_forecast(pair: str = "EUR/USD", horizon: str = "1d"):
     """Get a structured pair forecast with horizon and confidence."""
     try:
-        await forex_service.initialize()
         forecast = await forex_service.get_pair_forecast(pair=pair, horizon=horizon)
         return {"status": "success", "forecast": forecast}
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
-    finally:
-        await forex_service.close()
 
 
 # ============================================================================
@@ -0,0 +1,55 @@
+"""
+Measure per-request overhead of the HTTP middleware stack.
+
+Runs GET /api/health (dev-user auth) through httpx's in-process ASGI
+transport, once with the app's middleware and once with it stripped, and
+prints the per-request difference.
+
+    python bench_middleware.py [requests]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("ALLOW_DEV_USER_ID", "true")
+os.environ.setdefault("DEV_USER_LOCALHOST_ONLY", "false")
+os.environ.setdefault("RATE_LIMIT_MAX", "100000000")
+os.environ.setdefault("FOREX_STREAM_ENABLED", "false")
+
+import httpx
+
+from app.main import app
+
+
+async def _run(requests: int) -> float:
+    transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        headers = {"x-user-id": "bench_user"}
+        for _ in range(200):
+            await client.get("/api/health", headers=headers)
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get("/api/health", headers=headers)
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200, response.text
+    return elapsed / requests * 1e6
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with_stack = asyncio.run(_run(requests))
+
+    middleware, app.user_middleware = app.user_middleware, []
+    app.middleware_stack = None
+    bare = asyncio.run(_run(requests))
+    app.user_middleware = middleware
+    app.middleware_stack = None
+
+    print(f"with middleware : {with_stack:8.1f} us/request")
+    print(f"no middleware   : {bare:8.1f} us/request")
+    print(f"overhead        : {with_stack - bare:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
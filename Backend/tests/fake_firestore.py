@@ -0,0 +1,195 @@
+"""In-memory stand-in for the parts of the Firestore client the services use"""
+import itertools
+import threading
+
+from firebase_admin import firestore
+
+
+def _merge(current, data):
+    merged = dict(current or {})
+    for key, value in data.items():
+        if isinstance(value, firestore.Increment):
+            value = (merged.get(key) or 0) + value.value
+        merged[key] = value
+    return merged
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    def __init__(self, collection, doc_id):
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self, transaction=None):
+        self._collection.db.record("get", self._collection.name)
+        return FakeSnapshot(self.id, self._collection.docs.get(self.id))
+
+    def set(self, data, merge=False):
+        self._collection.db.record("set", self._collection.name)
+        current = self._collection.docs.get(self.id) if merge else None
+        self._collection.docs[self.id] = _merge(current, data)
+
+
+class FakeQuery:
+    def __init__(self, collection, filters=(), order=(), limit=None, after=None):
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._order = tuple(order)
+        self._limit = limit
+        self._after = after
+
+    def _copy(self, **changes):
+        state = {"filters": self._filters, "order": self._order, "limit": self._limit, "after": self._after}
+        state.update(changes)
+        return FakeQuery(self._collection, **state)
+
+    def where(self, field, op, value):
+        assert op == "==", op
+        return self._copy(filters=self._filters + ((field, value),))
+
+    def order_by(self, field, direction="ASCENDING"):
+        return self._copy(order=self._order + ((field, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, snapshot_or_fields):
+        return self._copy(after=snapshot_or_fields)
+
+    def stream(self):
+        self._collection.db.record("query", self._collection.name)
+        rows = [
+            (doc_id, data) for doc_id, data in self._collection.docs.items()
+            if all(data.get(field) == value for field, value in self._filters)
+        ]
+        def _value(row, field):
+            return row[0] if field == "__name__" else row[1].get(field)
+
+        if self._order:
+            rows = [row for row in rows if all(_value(row, field) is not None for field, _ in self._order)]
+            for field, direction in reversed(self._order):
+                rows.sort(key=lambda row: _value(row, field), reverse=direction == "DESCENDING")
+        if isinstance(self._after, FakeSnapshot):
+            ids = [doc_id for doc_id, _ in rows]
+            rows = rows[ids.index(self._after.id) + 1:] if self._after.id in ids else rows
+        elif self._after is not None:
+            def _past_cursor(row):
+                for field, direction in self._order:
+                    value, bound = _value(row, field), self._after[field]
+                    if value != bound:
+                        return value < bound if direction == "DESCENDING" else value > bound
+                return False
+
+            rows = [row for row in rows if _past_cursor(row)]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        self._collection.db.reads += len(rows)
+        for doc_id, data in rows:
+            yield FakeSnapshot(doc_id, data)
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.docs = {}
+        super().__init__(self)
+
+    def document(self, doc_id=None):
+        return FakeDocument(self, doc_id or f"auto{next(self.db.ids)}")
+
+
+class FakeTransaction:
+    """Buffers writes until commit; implements what ``firestore.transactional`` drives"""
+
+    _read_only = False
+    _max_attempts = 5
+
+    def __init__(self, db):
+        self.db = db
+        self._id = None
+        self._writes = []
+
+    def _clean_up(self):
+        self._writes = []
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        self._id = b"txn"
+
+    def _commit(self):
+        with self.db.lock:
+            for ref, data, merge in self._writes:
+                ref.set(data, merge=merge)
+        self.db.commits += 1
+        self._clean_up()
+
+    def _rollback(self):
+        self._clean_up()
+
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, FakeDocument):
+            return iter([ref_or_query.get()])
+        return ref_or_query.stream()
+
+    def set(self, ref, data, merge=False):
+        self._writes.append((ref, data, merge))
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self._writes = []
+
+    def set(self, ref, data, merge=False):
+        self._writes.append((ref, data, merge))
+
+    def commit(self):
+        if self.db.fail_commits:
+            self.db.fail_commits -= 1
+            raise ConnectionError("commit failed")
+        with self.db.lock:
+            for ref, data, merge in self._writes:
+                ref.set(data, merge=merge)
+        self.db.commits += 1
+        self.db.batch_sizes.append(len(self._writes))
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.collections = {}
+        self.calls = []
+        self.reads = 0
+        self.threads = set()
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.commits = 0
+        self.batch_sizes = []
+        self.fail_commits = 0
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    def record(self, operation, collection):
+        self.calls.append((operation, collection))
+        self.threads.add(threading.current_thread().name)
+
+    def collection(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self, name)
+        return self.collections[name]
@@ -0,0 +1,71 @@
+"""Shared stand-ins for the clock and the parts of redis.asyncio the services use"""
+import asyncio
+
+from app.services.pubsub import LEASE_SCRIPT, PUBLISH_SCRIPT, RELEASE_SCRIPT
+from app.utils.rate_limiter import GCRA_SCRIPT
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio for the bus scripts and the GCRA limiter script"""
+
+    def __init__(self, fail=False, gcra_reply=(0, "2.5")):
+        self.fail = fail
+        self.gcra_reply = list(gcra_reply)
+        self.calls = []
+        self.values = {}
+        self.subscribers = []
+
+    def pubsub(self):
+        return FakeRedisPubSub(self)
+
+    async def eval(self, script, numkeys, *args):
+        if self.fail:
+            raise ConnectionError("redis down")
+        if script == GCRA_SCRIPT:
+            self.calls.append((numkeys, args))
+            return self.gcra_reply
+        key, args = args[0], args[1:]
+        if script == PUBLISH_SCRIPT:
+            seq = self.values[key] = self.values.get(key, 0) + 1
+            for queue in self.subscribers:
+                queue.put_nowait({"type": "message", "data": f"{seq}|{args[1]}".encode()})
+            return seq
+        if script == LEASE_SCRIPT:
+            if self.values.get(key) in (None, args[0]):
+                self.values[key] = args[0]
+                return 1
+            return 0
+        if script == RELEASE_SCRIPT:
+            if self.values.get(key) == args[0]:
+                del self.values[key]
+                return 1
+            return 0
+        raise AssertionError("unexpected script")
+
+
+class FakeRedisPubSub:
+    def __init__(self, server):
+        self.server = server
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.server.subscribers.append(self.queue)
+
+    async def unsubscribe(self, channel):
+        self.server.subscribers.remove(self.queue)
+
+    async def close(self):
+        pass
+
+    async def listen(self):
+        yield {"type": "subscribe", "data": 1}
+        while True:
+            yield await self.queue.get()
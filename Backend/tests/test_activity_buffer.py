@@ -0,0 +1,71 @@
+import asyncio
+
+from app.services.activity_buffer import ActivityWriteBuffer
+from app.services.engagement_activity_service import EngagementActivityService
+from app.utils.firestore_repository import FirestoreRepository
+
+from .fake_firestore import FakeFirestore
+
+
+def _setup(**options):
+    db = FakeFirestore()
+    repo = FirestoreRepository(client_factory=lambda: db, max_workers=2)
+    return db, repo, ActivityWriteBuffer(repo=repo, **options)
+
+
+def test_busy_session_is_written_in_few_batches():
+    db, repo, buffer = _setup(flush_interval_ms=50)
+    service = EngagementActivityService(repo=repo, buffer=buffer)
+
+    async def scenario():
+        ids = [
+            (await service.log_activity("u1", "trade", f"step {i}"))["id"]
+            for i in range(1200)
+        ]
+        await asyncio.sleep(0.2)
+        return ids
+
+    ids = asyncio.run(scenario())
+    repo.shutdown()
+
+    docs = db.collection("ai_activity").docs
+    assert set(ids) == set(docs)
+    assert db.commits <= 4
+    assert max(db.batch_sizes) <= 500
+    # Size-triggered flushes start before the interval elapses
+    assert db.batch_sizes[0] == 500
+    assert buffer.get_stats()["written"] == 1200
+
+
+def test_stop_drains_and_failed_commits_are_retried():
+    db, repo, buffer = _setup(flush_interval_ms=10_000, batch_size=10)
+    db.fail_commits = 1
+
+    async def scenario():
+        for i in range(25):
+            buffer.add({"userId": "u1", "message": str(i)})
+        flushed_early = len(db.collection("ai_activity").docs)
+        await asyncio.sleep(0)
+        await buffer.stop()
+        return flushed_early
+
+    assert asyncio.run(scenario()) == 0
+    repo.shutdown()
+    assert len(db.collection("ai_activity").docs) == 25
+    stats = buffer.get_stats()
+    assert stats["pending"] == 0
+    assert stats["dropped"] == 0
+    assert stats["failed_commits"] == 1
+
+
+def test_queue_is_bounded():
+    db, repo, buffer = _setup(max_pending=5)
+    for i in range(8):
+        buffer.add({"message": str(i)})
+    assert len(buffer) == 5
+    assert buffer.get_stats()["dropped"] == 3
+
+    asyncio.run(buffer.flush())
+    repo.shutdown()
+    messages = sorted(int(doc["message"]) for doc in db.collection("ai_activity").docs.values())
+    assert messages == [3, 4, 5, 6, 7]
@@ -0,0 +1,69 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app import ai_forex_engine
+from app.ai_forex_engine import ForexAIEngine
+from app.services.batch_analysis import analyze_matrix, build_price_matrices
+from app.services.candle_store import CandleStore
+from app.services.indicators import IndicatorEngine
+
+
+def _histories():
+    rng = np.random.default_rng(3)
+    return {
+        "EUR/USD": list(1.08 + np.cumsum(rng.normal(0, 0.001, 100))),
+        "USD/JPY": list(150 + np.cumsum(rng.normal(0, 0.2, 100))),
+        "GBP/USD": list(np.linspace(1.25, 1.30, 120)),
+    }
+
+
+def test_batch_matches_per_pair_analysis():
+    engine = ForexAIEngine()
+    histories = _histories()
+    batch = engine.analyze_markets_batch(histories, horizon_hours=24)
+
+    for pair, prices in histories.items():
+        single = asyncio.run(engine.analyze_market_conditions(pair, prices))
+        forecast = asyncio.run(engine.forecast_price_movement(pair, prices, 24))
+        condition = batch[pair]["condition"]
+
+        assert condition.trend == single.trend
+        assert condition.rsi == pytest.approx(single.rsi)
+        assert condition.volatility == pytest.approx(single.volatility)
+        assert condition.support_level == pytest.approx(single.support_level)
+        for key in ("macd", "signal", "histogram"):
+            assert condition.macd[key] == pytest.approx(single.macd[key], abs=1e-12)
+        assert batch[pair]["forecast"]["forecasted_price"] == pytest.approx(forecast["forecasted_price"])
+        assert batch[pair]["forecast"]["confidence"] == pytest.approx(forecast["confidence"])
+
+
+def test_short_histories_do_not_shrink_other_pairs():
+    groups = build_price_matrices({"A/B": [1.0] * 60, "C/D": list(range(1, 81)), "E/F": [1.0] * 5, "G/H": [2.0] * 60})
+
+    shapes = {tuple(pairs): matrix.shape for pairs, matrix in groups}
+    assert shapes == {("A/B", "G/H"): (2, 60), ("C/D",): (1, 80)}
+    pairs, matrix = next(group for group in groups if group[0] == ["C/D"])
+    assert matrix[0, 0] == 1.0 and matrix[0, -1] == 80.0
+    assert analyze_matrix(matrix)["trend"].tolist() == ["BULLISH"]
+
+
+def test_warm_indicator_state_supplies_conditions(monkeypatch):
+    store = CandleStore(timeframes=["1m"])
+    engine = IndicatorEngine(store)
+    for minute in range(80):
+        store.update({"EUR/USD": 1.10 + minute * 0.0001}, ts=minute * 60)
+    monkeypatch.setattr(ai_forex_engine, "candle_store", store)
+    monkeypatch.setattr(ai_forex_engine, "indicator_engine", engine)
+
+    forex = ForexAIEngine()
+    histories = {"EUR/USD": list(forex.get_price_history("EUR/USD")), "GBP/USD": list(np.linspace(1.25, 1.30, 40))}
+    batch = forex.analyze_markets_batch(histories, include_forecast=False)
+
+    values = engine.values("EUR/USD")
+    assert batch["EUR/USD"]["condition"].rsi == pytest.approx(values["rsi"])
+    assert batch["EUR/USD"]["condition"].volatility == pytest.approx(values["std_20"])
+    assert batch["GBP/USD"]["condition"].current_price == pytest.approx(1.30)
+    with_forecast = forex.analyze_markets_batch(histories)
+    assert with_forecast["EUR/USD"]["forecast"]["trend"] == "UP"
@@ -0,0 +1,78 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.forex_data_service import ForexDataService
+from app.services.candle_store import CandleSeries, CandleStore
+
+
+def test_ticks_aggregate_into_ohlc_candles():
+    store = CandleStore(timeframes=["1m", "5m"])
+    base = 1_700_000_100  # aligned to a 5m bucket
+    store.update({"EUR/USD": 1.10}, ts=base)
+    store.update({"EUR/USD": 1.12}, ts=base + 10)
+    store.update({"EUR/USD": 1.09}, ts=base + 20)
+    closed = store.update({"EUR/USD": 1.11}, ts=base + 60)
+
+    assert closed == {"EUR/USD": ["1m"]}
+    candles = store.candles("EUR/USD", "1m")
+    assert list(candles["open"]) == [1.10, 1.11]
+    assert list(candles["high"]) == [1.12, 1.11]
+    assert list(candles["low"]) == [1.09, 1.11]
+    assert list(candles["close"]) == [1.09, 1.11]
+    assert list(candles["ticks"]) == [3, 1]
+    assert store.length("EUR/USD", "5m") == 1
+
+
+def test_ring_buffer_wraps_and_returns_contiguous_views():
+    series = CandleSeries("1m", capacity=4)
+    for i in range(10):
+        series.update(float(i + 1), ts=i * 60)
+
+    closes = series.column("close")
+    assert len(series) == 4
+    assert list(closes) == [7.0, 8.0, 9.0, 10.0]
+    assert list(series.column("close", 2)) == [9.0, 10.0]
+    # Views share memory with the underlying buffer and cannot be mutated.
+    assert np.shares_memory(closes, series._close)
+    with pytest.raises(ValueError):
+        closes[0] = 0.0
+
+
+def test_invalid_prices_are_ignored():
+    store = CandleStore(timeframes=["1m"])
+    store.update({"EUR/USD": 0, "GBP/USD": None, "USD/JPY": 150.0}, ts=0)
+
+    assert store.pairs() == ["USD/JPY"]
+    assert len(store.closes("EUR/USD")) == 0
+
+
+def test_forecast_windows_are_in_minute_bars_and_leave_the_store_alone(monkeypatch):
+    store = CandleStore(timeframes=["1m"])
+    for minute in range(20):
+        store.update({"EUR/USD": 1.00 + minute * 0.01}, ts=minute * 60)
+    service = ForexDataService()
+    service.candles = store
+
+    async def _rates():
+        return {"EUR/USD": 1.19}
+
+    async def _news():
+        return []
+
+    async def _sentiment(rates, news):
+        return {"trend": "neutral"}
+
+    monkeypatch.setattr(service, "get_currency_rates", _rates)
+    monkeypatch.setattr(service, "get_forex_factory_news", _news)
+    monkeypatch.setattr(service, "analyze_market_with_gemini", _sentiment)
+    monkeypatch.setattr(service, "_derive_pair_from_usd_table", lambda pair: 0.86)
+
+    intraday = asyncio.run(service.get_pair_forecast("EUR/USD", "intraday"))
+    derived = asyncio.run(service.get_pair_forecast("EUR/GBP", "1d"))
+
+    # 80s of ticks is two 1m bars: momentum is measured over the last minute only
+    assert f"momentum={(1.19 - 1.18) / 1.18 * 100:.3f}%" in intraday["supporting_factors"]
+    assert derived["current_price"] == 0.86
+    assert store.pairs() == ["EUR/USD"]
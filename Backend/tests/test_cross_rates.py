@@ -0,0 +1,25 @@
+import numpy as np
+
+from app.services.cross_rates import CrossRateMatrix
+
+
+def test_matrix_matches_usd_base_derivation():
+    matrix = CrossRateMatrix.from_usd_base({"EUR": 0.5, "JPY": 150.0, "IDR": 15000.0})
+
+    assert matrix.get("EUR/USD") == 2.0
+    assert matrix.get("usdjpy") == 150.0
+    assert matrix.get("EUR/JPY") == 300.0
+    assert matrix.get("JPY/JPY") == 1.0
+    assert matrix.get("EUR/XXX") is None
+    assert np.allclose(matrix.rates * matrix.rates.T, 1.0)
+
+
+def test_bulk_lookup_and_precision():
+    matrix = CrossRateMatrix.from_usd_base({"EUR": 0.92, "JPY": 150.0, "IDR": 15000.0, "CHF": 0.78})
+
+    result = matrix.lookup_many(["EUR/USD", "usd-jpy", "USD/IDR", "USD/CHF", "EUR/XXX", "bad"])
+
+    assert set(result["rates"]) == {"EUR/USD", "USD/JPY", "USD/IDR", "USD/CHF"}
+    assert result["precision"] == {"EUR/USD": 4, "USD/JPY": 2, "USD/IDR": 0, "USD/CHF": 4}
+    assert result["unavailable"] == ["EUR/XXX", "bad"]
+    assert matrix.precision("JPY/USD") > 4
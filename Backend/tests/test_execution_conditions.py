@@ -0,0 +1,37 @@
+import pytest
+
+from app.services import execution_intelligence_service as execution
+from app.services.candle_store import CandleStore
+from app.services.execution_intelligence_service import Condition, ExecutionIntelligenceService
+from app.services.indicators import IndicatorEngine
+
+
+@pytest.fixture
+def service(monkeypatch):
+    store = CandleStore(timeframes=["1m"])
+    engine = IndicatorEngine(store)
+    for minute in range(80):
+        store.update({"EUR/USD": 1.10 + minute * 0.0001}, ts=minute * 60)
+    monkeypatch.setattr(execution, "candle_store", store)
+    monkeypatch.setattr(execution, "indicator_engine", engine)
+    return ExecutionIntelligenceService(), engine.values("EUR/USD")
+
+
+def test_structured_indicator_conditions(service):
+    svc, values = service
+    above_sma = Condition("indicator_value", ">", values["sma_50"] - 0.001, "", indicator="sma_50")
+    rsi_low = Condition("indicator_value", "<", 30, "", indicator="RSI")
+
+    assert svc._evaluate_condition("EUR/USD", above_sma)
+    assert not svc._evaluate_condition("EUR/USD", rsi_low)
+    assert not svc._evaluate_condition("EUR/USD", Condition("indicator_value", ">", 0, "", indicator="vwap"))
+
+
+def test_description_keywords_are_a_fallback(service):
+    svc, values = service
+    # Structured field wins over the description text
+    condition = Condition("indicator_value", ">", 90, "MACD histogram turns positive", indicator="rsi")
+    assert svc._evaluate_condition("EUR/USD", condition) == (values["rsi"] > 90)
+    assert svc._evaluate_condition("EUR/USD", Condition("indicator_value", ">", 90, "RSI above 90"))
+    assert svc._evaluate_condition("EUR/USD", Condition("price_level", ">=", 1.1, "Price above 1.1"))
+    assert not svc._evaluate_condition("EUR/USD", Condition("price_level", "crosses", 1.1, "Price crosses 1.1"))
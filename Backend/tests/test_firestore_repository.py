@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from app.services.header_service import HeaderService
+from app.services.notification_counter import UnreadNotificationCounter
+from app.services.pubsub import InProcessPubSub
+from app.services.settings_service import SettingsService
+from app.services.user_cache import UserDataCache
+from app.utils.firestore_repository import FirestoreRepository
+
+from .fake_firestore import FakeFirestore
+
+
+def _repo():
+    db = FakeFirestore()
+    return db, FirestoreRepository(client_factory=lambda: db, max_workers=2)
+
+
+def test_calls_run_on_the_pool_and_are_timed_per_collection():
+    db, repo = _repo()
+
+    async def scenario():
+        await repo.set("user_settings", "u1", {"settings": {"theme": "dark"}})
+        assert (await repo.get_dict("user_settings", "u1"))["settings"] == {"theme": "dark"}
+        doc_id = await repo.add("ai_activity", {"userId": "u1"})
+        docs = await repo.query("ai_activity", lambda ref: ref.where("userId", "==", "u1"))
+        assert [doc.id for doc in docs] == [doc_id]
+        with pytest.raises(ZeroDivisionError):
+            await repo.run("ai_activity", "boom", lambda: 1 / 0)
+
+    asyncio.run(scenario())
+    repo.shutdown()
+
+    assert all(name.startswith("firestore") for name in db.threads)
+    stats = repo.get_stats()
+    assert stats["in_flight"] == 0
+    assert stats["collections"]["user_settings"]["set"]["count"] == 1
+    assert stats["collections"]["user_settings"]["get"]["count"] == 1
+    assert stats["collections"]["ai_activity"]["query"]["count"] == 1
+    assert stats["collections"]["ai_activity"]["boom"]["errors"] == 1
+
+
+def test_header_and_settings_services_are_async():
+    db, repo = _repo()
+    claims = {"email": "trader@example.com"}
+
+    async def scenario():
+        cache = UserDataCache(bus=InProcessPubSub())
+        settings = SettingsService(repo=repo, cache=cache)
+        await settings.update_settings("u1", {"theme": "dark"})
+        updated = await settings.update_settings("u1", {"lang": "en"})
+        assert updated["settings"] == {"theme": "dark", "lang": "en"}
+        assert (await settings.get_settings("u1"))["settings"] == {"theme": "dark", "lang": "en"}
+
+        header = HeaderService(repo=repo, counter=UnreadNotificationCounter(repo=repo, cache=cache), cache=cache)
+        await repo.set("notifications", "n1", {"userId": "u1", "read": False})
+        await repo.set("notifications", "n2", {"userId": "u1", "read": True})
+        result = await header.update_header("u1", {"status": "Busy"}, claims)
+        assert result["user"]["name"] == "trader"
+        assert result["user"]["status"] == "Busy"
+        assert result["notifications"]["unread"] == 1
+
+    asyncio.run(scenario())
+    repo.shutdown()
+    assert "MainThread" not in db.threads
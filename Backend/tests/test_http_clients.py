@@ -0,0 +1,31 @@
+import asyncio
+
+from app.utils.http_clients import HttpClientRegistry
+
+
+def test_clients_are_reused_per_loop_and_closed_when_their_loop_ends():
+    registry = HttpClientRegistry()
+
+    async def first_loop():
+        session = registry.session("https://api.example.com/v1/rates")
+        client = registry.httpx_client("https://api.example.com")
+        assert registry.session("https://API.example.com/other") is session
+        assert registry.httpx_client("https://api.example.com/x") is client
+        return session, client
+
+    async def second_loop():
+        session = registry.session("https://api.example.com")
+        client = registry.httpx_client("https://api.example.com")
+        await asyncio.sleep(0)
+        stats = registry.get_stats()
+        await registry.close()
+        return session, client, stats
+
+    old_session, old_client = asyncio.run(first_loop())
+    new_session, new_client, stats = asyncio.run(second_loop())
+
+    assert new_session is not old_session and new_client is not old_client
+    assert old_session.closed and old_client.is_closed
+    assert new_session.closed and new_client.is_closed
+    assert stats["aiohttp_hosts"] == ["api.example.com"]
+    assert stats["httpx_hosts"] == ["api.example.com"]
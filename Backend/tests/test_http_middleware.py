@@ -0,0 +1,58 @@
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from app.http_middleware import EdgeMiddleware
+from app.utils.rate_limiter import MemoryRateLimitStore, RateLimiter
+
+
+async def _verify(request: Request):
+    if request.headers.get("authorization") != "Bearer good":
+        raise HTTPException(status_code=401, detail="Invalid Firebase token")
+    return {"uid": "user_1"}
+
+
+def _client(rate_limit_max=100, **options):
+    limiter = RateLimiter("http", rate_limit_max, 60, store=MemoryRateLimitStore())
+    app = FastAPI()
+
+    @app.get("/api/me")
+    async def me(request: Request):
+        return {"uid": request.state.auth_claims["uid"]}
+
+    @app.post("/api/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.get("/public")
+    async def public():
+        return {"ok": True}
+
+    app.add_middleware(EdgeMiddleware, verify_request=_verify, rate_limiter=limiter, max_body_bytes=10, **options)
+    return TestClient(app)
+
+
+def test_auth_claims_headers_and_rejections():
+    client = _client()
+    auth = {"Authorization": "Bearer good"}
+
+    response = client.get("/api/me", headers=auth)
+    assert response.json() == {"uid": "user_1"}
+    assert response.headers["x-frame-options"] == "DENY"
+    assert response.headers["cache-control"] == "no-store"
+    assert "cache-control" not in client.get("/public").headers
+
+    denied = client.get("/api/me")
+    assert denied.status_code == 401
+    assert denied.headers["x-content-type-options"] == "nosniff"
+
+    assert client.post("/api/echo", headers=auth, content=b"x" * 11).status_code == 413
+    assert client.post("/api/echo", headers={**auth, "content-length": "abc"}, content=b"").status_code == 400
+
+
+def test_rate_limit_and_exemptions():
+    client = _client(rate_limit_max=3, rate_limit_exempt={"/public"})
+    auth = {"Authorization": "Bearer good"}
+    responses = [client.get("/api/me", headers=auth) for _ in range(4)]
+    assert [response.status_code for response in responses] == [200, 200, 200, 429]
+    assert int(responses[-1].headers["retry-after"]) >= 1
+    assert all(client.get("/public").status_code == 200 for _ in range(5))
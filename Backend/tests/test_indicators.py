@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from app.services.candle_store import CandleStore
+from app.services.indicators import EMA, IndicatorEngine, RollingStats, WilderRSI, macd
+
+
+def _reference_rsi(prices, period=14):
+    deltas = np.diff(prices)
+    gains = np.clip(deltas, 0, None)
+    losses = np.clip(-deltas, 0, None)
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def test_streaming_values_match_batch_reference():
+    rng = np.random.default_rng(7)
+    prices = 1.1 + np.cumsum(rng.normal(0, 0.001, 300))
+
+    rsi, ema, stats = WilderRSI(14), EMA(20), RollingStats(20)
+    for price in prices:
+        rsi.update(price)
+        ema.update(price)
+        stats.update(price)
+
+    assert rsi.value == pytest.approx(_reference_rsi(prices))
+    assert stats.mean == pytest.approx(prices[-20:].mean())
+    assert stats.std == pytest.approx(prices[-20:].std())
+    expected_ema = prices[:20].mean()
+    for price in prices[20:]:
+        expected_ema += (2 / 21) * (price - expected_ema)
+    assert ema.value == pytest.approx(expected_ema)
+    result = macd(prices)
+    assert result["histogram"] == pytest.approx(result["macd"] - result["signal"])
+    assert result["signal"] != result["macd"]
+
+
+def test_engine_folds_closed_candles_once():
+    store = CandleStore(timeframes=["1m"])
+    engine = IndicatorEngine(store)
+    for minute in range(60):
+        store.update({"EUR/USD": 1.10 + minute * 0.0001}, ts=minute * 60)
+
+    state = engine.get("EUR/USD")
+    assert state.candles == 59  # the live candle is not folded in yet
+    assert state.ready
+
+    store.update({"EUR/USD": 1.2}, ts=60 * 60)
+    store.update({"EUR/USD": 1.2}, ts=60 * 60 + 5)
+    assert state.candles == 60
+    assert state.values()["close"] == pytest.approx(1.10 + 59 * 0.0001)
+    assert state.values()["rsi"] == 100.0
@@ -0,0 +1,76 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.inference_batcher import BatchedPredictor
+
+
+class _SumModel:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, batch, verbose=0):
+        self.batch_sizes.append(len(batch))
+        return batch.sum(axis=(1, 2)).reshape(-1, 1)
+
+
+def test_concurrent_requests_share_batched_predict_calls():
+    model = _SumModel()
+    predictor = BatchedPredictor(lambda: model, max_batch=16, max_wait_ms=20)
+
+    async def _run():
+        sequences = [np.full((4, 1), i, dtype=np.float32) for i in range(40)]
+        results = await asyncio.gather(*(predictor.predict(seq) for seq in sequences))
+        await predictor.close()
+        return results
+
+    results = asyncio.run(_run())
+
+    assert [float(r[0]) for r in results] == [4.0 * i for i in range(40)]
+    assert sum(model.batch_sizes) == 40
+    assert max(model.batch_sizes) == 16
+    assert len(model.batch_sizes) <= 4
+    stats = predictor.get_stats()
+    assert stats["requests"] == 40 and stats["batch_size_max"] == 16
+
+
+def test_predict_errors_propagate_to_every_caller():
+    class _Broken:
+        def predict(self, batch, verbose=0):
+            raise ValueError("bad input")
+
+    predictor = BatchedPredictor(lambda: _Broken(), max_wait_ms=5)
+
+    async def _run():
+        try:
+            return await asyncio.gather(
+                *(predictor.predict(np.zeros((2, 1))) for _ in range(3)), return_exceptions=True
+            )
+        finally:
+            await predictor.close()
+
+    results = asyncio.run(_run())
+    assert all(isinstance(r, ValueError) for r in results)
+    with pytest.raises(RuntimeError):
+        asyncio.run(BatchedPredictor(lambda: None).predict(np.zeros((2, 1))))
+
+
+def test_model_is_loaded_on_first_prediction():
+    loaded = []
+
+    async def _load():
+        loaded.append(_SumModel())
+        return loaded[-1]
+
+    predictor = BatchedPredictor(lambda: loaded[-1] if loaded else None, model_loader=_load, max_wait_ms=5)
+    assert not predictor.available
+
+    async def _run():
+        try:
+            return await predictor.predict(np.ones((3, 1)))
+        finally:
+            await predictor.close()
+
+    assert float(asyncio.run(_run())[0]) == 3.0
+    assert len(loaded) == 1 and predictor.available
@@ -0,0 +1,93 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app import ai_forex_engine
+from app.ai_forex_engine import ForexAIEngine, MarketCondition
+from app.services.llm_batch import compact_series, entries_by_pair, parse_json_array
+
+
+def _condition(pair, price):
+    return MarketCondition(
+        pair=pair,
+        current_price=price,
+        trend="BULLISH",
+        volatility=0.001,
+        support_level=price * 0.99,
+        resistance_level=price * 1.01,
+        rsi=55.0,
+        macd={"macd": 0.0001, "signal": 0.00005, "histogram": 0.00005},
+    )
+
+
+def test_parse_json_array_handles_fences_and_wrappers():
+    fenced = '```json\n[{"pair": "eur-usd", "action": "BUY"}]\n```'
+    wrapped = '{"signals": [{"pair": "USD/JPY"}]}'
+
+    assert entries_by_pair(parse_json_array(fenced), ["EUR/USD"]) == {"EUR/USD": {"pair": "eur-usd", "action": "BUY"}}
+    assert parse_json_array(wrapped) == [{"pair": "USD/JPY"}]
+    assert parse_json_array("no json here") == []
+    assert compact_series(list(range(100)), points=5, digits=0) == "0 25 50 74 99"
+
+
+def test_one_prompt_for_all_pairs_and_per_pair_fallback(monkeypatch):
+    prompts = []
+    reply = json.dumps([
+        {"pair": "EUR/USD", "action": "BUY", "confidence": 80, "entry_price": 1.1,
+         "stop_loss": 1.09, "take_profit": 1.12, "reason": "trend"},
+        {"pair": "USD/JPY", "action": "SELL", "confidence": 0.7, "entry_price": 150.0,
+         "stop_loss": 1.5, "take_profit": 149.0},
+    ])
+
+    async def _generate(use_case, prompt, model=None, key_inputs=None):
+        prompts.append(prompt)
+        return reply
+
+    monkeypatch.setattr(ai_forex_engine, "llm_gateway", SimpleNamespace(available=True))
+    monkeypatch.setattr(ai_forex_engine, "llm_cache", SimpleNamespace(generate=_generate))
+
+    engine = ForexAIEngine()
+    fallbacks = []
+
+    async def _single(pair, condition, strategy, history):
+        fallbacks.append(pair)
+        return await engine.generate_trading_signal(pair, condition, strategy)
+
+    monkeypatch.setattr(engine, "generate_trading_signal_with_gemini", _single)
+
+    conditions = {
+        "EUR/USD": _condition("EUR/USD", 1.1),
+        "USD/JPY": _condition("USD/JPY", 150.0),
+        "GBP/USD": _condition("GBP/USD", 1.27),
+    }
+    signals = asyncio.run(engine.generate_trading_signals_batch(conditions, {}, {"EUR/USD": [1.0, 1.1]}))
+
+    assert len(prompts) == 1
+    assert all(pair in prompts[0] for pair in conditions)
+    assert signals["EUR/USD"].action == "BUY" and signals["EUR/USD"].confidence == 0.8
+    assert sorted(fallbacks) == ["GBP/USD", "USD/JPY"]
+    assert set(signals) == set(conditions)
+
+
+def test_invalid_batch_entry_falls_back_to_a_real_signal(monkeypatch):
+    replies = [
+        json.dumps([
+            {"pair": "EUR/USD", "action": "BUY", "confidence": 0.8, "entry_price": 1.1,
+             "stop_loss": 1.09, "take_profit": 1.12, "reason": "trend"},
+            {"pair": "GBP/USD", "action": "MAYBE"},
+        ]),
+        "not json",  # the single-pair retry for GBP/USD
+    ]
+
+    async def _generate(use_case, prompt, model=None, key_inputs=None):
+        return replies.pop(0)
+
+    monkeypatch.setattr(ai_forex_engine, "llm_gateway", SimpleNamespace(available=True))
+    monkeypatch.setattr(ai_forex_engine, "llm_cache", SimpleNamespace(generate=_generate))
+
+    conditions = {"EUR/USD": _condition("EUR/USD", 1.1), "GBP/USD": _condition("GBP/USD", 1.27)}
+    signals = asyncio.run(ForexAIEngine().generate_trading_signals_batch(conditions, {"risk": "low"}, {}))
+
+    assert not replies
+    assert all(isinstance(signal, ai_forex_engine.TradingSignal) for signal in signals.values())
+    assert signals["GBP/USD"].action in {"BUY", "SELL", "HOLD"}
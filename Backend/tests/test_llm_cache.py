@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_cache import LLMResponseCache, make_key, normalize_news, normalize_rates
+
+
+def test_sub_pip_moves_and_fetch_times_share_a_key():
+    first = {
+        "rates": normalize_rates({"EUR/USD": 1.084321, "USD/JPY": 154.123}),
+        "news": normalize_news([{"time": "t1", "currency": "USD", "event": "NFP", "impact": "high"}]),
+    }
+    second = {
+        "rates": normalize_rates({"USD/JPY": 154.1249, "EUR/USD": 1.084349}),
+        "news": normalize_news([{"time": "t2", "currency": "USD", "event": "NFP", "impact": "high"}]),
+    }
+    moved = {**first, "rates": normalize_rates({"EUR/USD": 1.0845, "USD/JPY": 154.12})}
+
+    assert make_key("market_sentiment", "m", first) == make_key("market_sentiment", "m", second)
+    assert make_key("market_sentiment", "m", first) != make_key("market_sentiment", "m", moved)
+    assert make_key("market_sentiment", "m", first) != make_key("market_sentiment", "other", first)
+
+
+def test_concurrent_misses_share_one_computation_and_lru_evicts():
+    cache = LLMResponseCache(max_entries=2, ttls={"demo": 60})
+    calls = []
+
+    async def _compute(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    async def _run():
+        results = await asyncio.gather(*(cache.get_or_compute("demo", "a", lambda: _compute("A")) for _ in range(10)))
+        await cache.get_or_compute("demo", "b", lambda: _compute("B"))
+        await cache.get_or_compute("demo", "a", lambda: _compute("A2"))  # hit, refreshes "a"
+        await cache.get_or_compute("demo", "c", lambda: _compute("C"))  # evicts "b"
+        again = await cache.get_or_compute("demo", "b", lambda: _compute("B2"))
+        return results, again
+
+    results, again = asyncio.run(_run())
+
+    assert results == ["A"] * 10
+    assert again == "B2"
+    assert calls == ["A", "B", "C", "B2"]
+    stats = cache.get_stats()
+    assert stats["coalesced"] == 9 and stats["evictions"] == 2
+
+
+def test_failures_are_not_cached_and_zero_ttl_disables_caching():
+    cache = LLMResponseCache(ttls={"demo": 60, "off": 0})
+
+    async def _fail():
+        raise RuntimeError("boom")
+
+    async def _ok():
+        return "ok"
+
+    async def _run():
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("demo", "k", _fail)
+        assert await cache.get_or_compute("demo", "k", _ok) == "ok"
+        await cache.get_or_compute("off", "z", _ok)
+
+    asyncio.run(_run())
+    assert cache.get_stats()["entries"] == 1
+
+
+def test_cancelling_the_first_caller_does_not_cancel_waiters():
+    cache = LLMResponseCache(ttls={"demo": 60})
+
+    async def _run():
+        release = asyncio.Event()
+
+        async def _compute():
+            await release.wait()
+            return "answer"
+
+        first = asyncio.ensure_future(cache.get_or_compute("demo", "k", _compute))
+        second = asyncio.ensure_future(cache.get_or_compute("demo", "k", _compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return first, await second
+
+    first, result = asyncio.run(_run())
+    assert first.cancelled()
+    assert result == "answer"
+    assert cache.get_stats()["entries"] == 1
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.llm_gateway import LLMGateway, LLMUnavailable
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeModel:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def generate_content(self, prompt):
+        self.client.calls += 1
+        time.sleep(self.client.delay)
+        if self.client.fail:
+            raise RuntimeError("quota exceeded")
+        return _Response(f"{self.name}:{prompt}")
+
+
+class _FakeClient:
+    def __init__(self):
+        self.calls = 0
+        self.configured = 0
+        self.created = 0
+        self.delay = 0.0
+        self.fail = False
+
+    def configure(self, api_key):
+        self.configured += 1
+
+    def GenerativeModel(self, name):
+        self.created += 1
+        return _FakeModel(self, name)
+
+
+def _gateway(client, **kwargs):
+    return LLMGateway(api_key="test", client=client, **kwargs)
+
+
+def test_calls_run_off_loop_and_reuse_models():
+    client = _FakeClient()
+    client.delay = 0.05
+    gateway = _gateway(client, max_concurrency=4)
+
+    async def _run():
+        started = time.perf_counter()
+        texts = await asyncio.gather(*(gateway.generate(str(i)) for i in range(4)))
+        return texts, time.perf_counter() - started
+
+    texts, elapsed = asyncio.run(_run())
+
+    assert texts == [f"gemini-2.0-flash:{i}" for i in range(4)]
+    assert elapsed < 0.15  # four 50 ms calls overlapped instead of blocking in turn
+    assert client.configured == 1 and client.created == 1
+
+
+def test_deadline_and_circuit_breaker():
+    client = _FakeClient()
+    gateway = _gateway(client, timeout_seconds=0.01, failure_threshold=2, reset_seconds=60)
+    client.delay = 0.05
+
+    async def _run():
+        for _ in range(2):
+            with pytest.raises(LLMUnavailable):
+                await gateway.generate("slow")
+        assert gateway.circuit_state == "open" and not gateway.available
+        with pytest.raises(LLMUnavailable):
+            await gateway.generate("rejected")
+
+    asyncio.run(_run())
+    assert client.calls == 2
+    assert gateway.get_stats()["timeouts"] == 2
+
+
+def test_deadline_covers_waiting_for_a_slot():
+    client = _FakeClient()
+    client.delay = 0.1
+    gateway = _gateway(client, max_concurrency=1, failure_threshold=1)
+
+    async def _run():
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            gateway.generate("first", timeout=1.0),
+            gateway.generate("queued", timeout=0.03),
+            return_exceptions=True,
+        )
+        return results, time.perf_counter() - started
+
+    (first, queued), elapsed = asyncio.run(_run())
+    assert first == "gemini-2.0-flash:first"
+    assert isinstance(queued, LLMUnavailable)
+    assert client.calls == 1
+    stats = gateway.get_stats()
+    assert stats["queue_timeouts"] == 1 and stats["timeouts"] == 0
+    assert gateway.circuit_state == "closed"
+
+
+def test_half_open_probe_closes_circuit_on_success():
+    client = _FakeClient()
+    client.fail = True
+    gateway = _gateway(client, failure_threshold=1, reset_seconds=0.01)
+
+    async def _run():
+        with pytest.raises(LLMUnavailable):
+            await gateway.generate("x")
+        await asyncio.sleep(0.02)
+        assert gateway.circuit_state == "half_open"
+        client.fail = False
+        return await gateway.generate("y")
+
+    assert asyncio.run(_run()) == "gemini-2.0-flash:y"
+    assert gateway.circuit_state == "closed"
+
+
+def test_unconfigured_gateway_is_unavailable():
+    gateway = LLMGateway(api_key="", client=_FakeClient())
+    assert not gateway.available
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(gateway.generate("x"))
@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from app.services.model_registry import ModelRegistry
+
+
+def test_model_loads_once_across_threads(tmp_path):
+    path = tmp_path / "model.bin"
+    path.write_text("weights")
+    calls = []
+
+    def _loader(model_path):
+        calls.append(model_path)
+        return {"path": model_path}
+
+    registry = ModelRegistry(specs={})
+    registry.register("demo", str(path), _loader)
+    assert registry.peek("demo") is None
+
+    threads = [threading.Thread(target=registry.get, args=("demo",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert registry.peek("demo") == {"path": str(path)}
+    assert registry.status()["demo"]["loaded"] is True
+
+
+def test_missing_model_is_remembered_without_loading(tmp_path):
+    calls = []
+    registry = ModelRegistry(specs={})
+    registry.register("missing", str(tmp_path / "nope.h5"), calls.append)
+
+    async def _run():
+        await registry.preload_in_background()
+        return await registry.get_async("missing")
+
+    assert asyncio.run(_run()) is None
+    assert calls == []
+    assert "not found" in registry.status()["missing"]["error"]
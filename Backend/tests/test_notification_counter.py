@@ -0,0 +1,82 @@
+import asyncio
+
+from app.services.header_service import HeaderService
+from app.services.notification_counter import UnreadNotificationCounter
+from app.services.pubsub import InProcessPubSub
+from app.services.user_cache import UserDataCache
+from app.utils.firestore_repository import FirestoreRepository
+
+from .fake_firestore import FakeFirestore
+
+
+def _setup():
+    db = FakeFirestore()
+    repo = FirestoreRepository(client_factory=lambda: db, max_workers=2)
+    return db, repo, UnreadNotificationCounter(repo=repo, cache=UserDataCache(bus=InProcessPubSub()))
+
+
+def _unread_field(db, user_id):
+    return db.collection("user_headers").docs.get(user_id, {}).get("notifications_unread")
+
+
+def test_counter_tracks_store_and_mark_read():
+    db, repo, counter = _setup()
+
+    async def scenario():
+        for i in range(3):
+            await counter.store(f"n{i}", "u1", {"userId": "u1", "read": False})
+        # Re-storing an unread notification is not counted twice
+        await counter.store("n0", "u1", {"userId": "u1", "read": False, "title": "again"})
+        assert await counter.get("u1") == 3
+
+        assert await counter.mark_read("n1", "u1", {"read": True}) is True
+        assert await counter.mark_read("n1", "u1", {"read": True}) is False
+        assert await counter.mark_read("n2", "intruder", {"read": True}) is None
+        return await counter.get("u1")
+
+    assert asyncio.run(scenario()) == 2
+    repo.shutdown()
+    assert _unread_field(db, "u1") == 2
+    assert db.collection("notifications").docs["n2"]["read"] is False
+
+
+def test_legacy_history_is_backfilled_once_and_header_reads_one_document():
+    db, repo, counter = _setup()
+    notifications = db.collection("notifications")
+    for i in range(50):
+        notifications.docs[f"old{i}"] = {"userId": "u1", "isRead": i % 5 == 0}
+    notifications.docs["other"] = {"userId": "u2"}
+
+    async def scenario():
+        header = HeaderService(repo=repo, counter=counter, cache=counter.cache)
+        first = await header.get_header("u1", {"name": "Trader"})
+        reads_after_backfill = db.reads
+        await counter.store("new", "u1", {"userId": "u1", "read": False})
+        second = await header.get_header("u1", {"name": "Trader"})
+        return first, second, db.reads - reads_after_backfill
+
+    first, second, extra_reads = asyncio.run(scenario())
+    repo.shutdown()
+    assert first["notifications"]["unread"] == 40
+    assert second["notifications"]["unread"] == 41
+    assert extra_reads == 0
+    assert counter.get_stats()["backfills"] == 1
+
+
+def test_header_updates_cannot_overwrite_the_counter():
+    db, repo, counter = _setup()
+
+    async def scenario():
+        header = HeaderService(repo=repo, counter=counter, cache=counter.cache)
+        for i in range(2):
+            await counter.store(f"n{i}", "u1", {"userId": "u1", "read": False})
+        await header.update_header("u1", {"status": "Busy", "notifications_unread": 0}, {})
+        await counter.mark_read("n0", "u1", {"read": True})
+        await counter.store("n2", "u1", {"userId": "u1", "read": False})
+        return await header.get_header("u1", {})
+
+    result = asyncio.run(scenario())
+    repo.shutdown()
+    assert result["user"]["status"] == "Busy"
+    assert result["notifications"]["unread"] == 2
+    assert _unread_field(db, "u1") == 2
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.enhanced_notification_service import (
+    EnhancedNotificationService,
+    Notification,
+    NotificationCategory,
+    NotificationPriority,
+    _encode_cursor,
+)
+from app.utils.firestore_repository import FirestoreRepository
+
+from .fake_firestore import FakeFirestore
+
+
+def _service(history=25):
+    db = FakeFirestore()
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    docs = db.collection("notifications").docs
+    for i in range(history):
+        # Pairs of notifications share a timestamp so the id tie-breaker matters
+        docs[f"n{i:03d}"] = {
+            "userId": "u1",
+            "title": f"#{i}",
+            "timestamp": base + timedelta(minutes=i // 2),
+            "read": i % 3 == 0,
+        }
+    docs["other"] = {"userId": "u2", "timestamp": base, "read": False}
+    service = EnhancedNotificationService()
+    service.repo = FirestoreRepository(client_factory=lambda: db, max_workers=2)
+    return db, service
+
+
+def _pages(service, **kwargs):
+    async def collect():
+        pages, cursor = [], None
+        while True:
+            page = await service.list_notifications("u1", cursor=cursor, **kwargs)
+            pages.append(page["notifications"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages
+
+    return asyncio.run(collect())
+
+
+def test_pages_follow_timestamp_order_without_gaps_or_repeats():
+    db, service = _service()
+    pages = _pages(service, limit=10)
+    service.repo.shutdown()
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    ids = [item["notification_id"] for page in pages for item in page]
+    assert ids == [f"n{i:03d}" for i in reversed(range(25))]
+    # Each page reads at most limit + 1 documents
+    assert db.reads <= 3 * 11
+
+
+def test_unread_filter_is_applied_by_the_query():
+    db, service = _service()
+    pages = _pages(service, limit=4, unread_only=True)
+    service.repo.shutdown()
+
+    items = [item for page in pages for item in page]
+    assert len(items) == 16
+    assert not any(item["read"] for item in items)
+    assert db.reads <= len(pages) * 5
+
+
+def test_page_size_bounds_reads_regardless_of_history():
+    db, service = _service(history=500)
+    notifications = asyncio.run(service.get_notifications("u1", limit=20))
+    service.repo.shutdown()
+    assert len(notifications) == 20
+    assert db.reads == 21
+
+
+def test_malformed_cursor_is_rejected():
+    _, service = _service()
+    with pytest.raises(ValueError):
+        asyncio.run(service.list_notifications("u1", cursor="not-a-cursor"))
+    service.repo.shutdown()
+
+
+def _offline():
+    raise RuntimeError("Firebase is not configured")
+
+
+def test_in_memory_fallback_applies_string_cursors():
+    service = EnhancedNotificationService()
+    service.repo = FirestoreRepository(client_factory=_offline)
+    base = datetime(2026, 1, 1)
+    service.notifications = [
+        Notification(
+            f"m{i}", "u1", f"#{i}", "", NotificationCategory.PRICE_ALERT, NotificationPriority.LOW,
+            base + timedelta(minutes=i),
+        )
+        for i in range(5)
+    ]
+
+    async def page(cursor):
+        return await service.list_notifications("u1", limit=2, cursor=cursor)
+
+    iso = asyncio.run(page(_encode_cursor((base + timedelta(minutes=3)).isoformat(), "m3")))
+    assert [n["notification_id"] for n in iso["notifications"]] == ["m2", "m1"]
+    blank = asyncio.run(page(_encode_cursor(None, "m1")))
+    assert [n["notification_id"] for n in blank["notifications"]] == ["m0"]
+    assert blank["next_cursor"] is None
+    unknown = asyncio.run(page(_encode_cursor(None, "missing")))
+    assert unknown == {"notifications": [], "next_cursor": None}
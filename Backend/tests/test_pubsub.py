@@ -0,0 +1,123 @@
+import asyncio
+
+from app.enhanced_websocket_manager import EnhancedWebSocketManager
+from app.services.pubsub import RedisPubSub
+
+from tests.fakes import FakeClock, FakeRedis, FakeRedisPubSub
+from tests.test_websocket_topics import FakeWebSocket, settle
+
+
+def _worker(server):
+    manager = EnhancedWebSocketManager()
+    manager.bus = RedisPubSub("redis://fake", client=server)
+    manager.bus.handler = manager._deliver
+    return manager
+
+
+def test_updates_published_on_one_worker_reach_sockets_on_every_worker():
+    async def run():
+        server = FakeRedis()
+        first, second = _worker(server), _worker(server)
+        await first.start_bus()
+        await second.start_bus()
+
+        on_first, on_second = FakeWebSocket(), FakeWebSocket()
+        await first.connect(on_first, "task-1", topics=["rates:EUR/USD"])
+        await second.connect(on_second, "task-1", user_id="u2", topics=["rates:EUR/USD"])
+
+        await first.send_task_progress("task-1", "fetch", 0.5, "half")
+        await first.send_forex_update({"timestamp": "t", "rates": {"EUR/USD": 1.1}})
+        await first.send_to_user("u2", "Hello")
+        await settle()
+
+        for client in (on_first, on_second):
+            progress = [m for m in client.sent if m.get("type") == "progress"]
+            ticks = [m for m in client.sent if m.get("topic") == "rates:EUR/USD"]
+            assert [m["seq"] for m in progress] == [1]
+            assert [(m["seq"], m["data"]["rate"]) for m in ticks] == [(2, 1.1)]
+        assert [m["message"] for m in on_second.sent if m.get("topic") == "notifications"] == ["Hello"]
+        assert not any(m.get("topic") == "notifications" for m in on_first.sent)
+        assert second.replay_log.last_seq == 3
+
+        await first.stop_bus()
+        await second.stop_bus()
+
+    asyncio.run(run())
+
+
+def test_only_one_worker_holds_the_forex_stream_lease():
+    async def run():
+        server = FakeRedis()
+        first, second = _worker(server), _worker(server)
+        assert await second.bus.acquire_leadership("forex_stream", 30)  # not connected yet: standalone
+        await first.start_bus()
+        await second.start_bus()
+
+        assert await first.bus.acquire_leadership("forex_stream", 30)
+        assert await first.bus.acquire_leadership("forex_stream", 30)
+        assert not await second.bus.acquire_leadership("forex_stream", 30)
+        await first.bus.release_leadership("forex_stream")
+        assert await second.bus.acquire_leadership("forex_stream", 30)
+
+        await first.stop_bus()
+        await second.stop_bus()
+
+    asyncio.run(run())
+
+
+class FlakyRedisPubSub(FakeRedisPubSub):
+    """Raises whatever exception is queued, like a dropped connection"""
+
+    async def listen(self):
+        yield {"type": "subscribe", "data": 1}
+        while True:
+            message = await self.queue.get()
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+
+class FlakyRedis(FakeRedis):
+    def pubsub(self):
+        return FlakyRedisPubSub(self)
+
+
+def test_bus_reconnects_and_withholds_leadership_while_down():
+    async def run():
+        server = FlakyRedis()
+        clock = FakeClock()
+        bus = RedisPubSub(
+            "redis://fake", client=server, reconnect_max_seconds=0.01,
+            standalone_after_seconds=60, clock=clock,
+        )
+        received = []
+
+        async def handler(envelope):
+            received.append(envelope["n"])
+
+        bus.handler = handler
+        await bus.start()
+        assert bus.connected
+
+        # Drop the subscription before the reconnect can run
+        server.subscribers[0].put_nowait(ConnectionError("reset"))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert not bus.connected
+        assert not await bus.acquire_leadership("forex_stream", 30)
+        clock.now = 61
+        assert await bus.acquire_leadership("forex_stream", 30)
+
+        for _ in range(50):
+            if bus.connected:
+                break
+            await asyncio.sleep(0.01)
+        assert bus.connected and bus.get_stats()["reconnects"] == 1
+        assert len(server.subscribers) == 1
+        await bus.publish({"n": 1})
+        await settle()
+        assert received == [1]
+        assert await bus.acquire_leadership("forex_stream", 30)
+        await bus.close()
+
+    asyncio.run(run())
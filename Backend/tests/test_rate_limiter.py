@@ -0,0 +1,93 @@
+import asyncio
+
+from app.utils.rate_limiter import MemoryRateLimitStore, RateLimiter, RedisRateLimitStore
+
+from .fakes import FakeClock, FakeRedis
+
+
+def _check(limiter, *keys):
+    return asyncio.run(limiter.check(*keys))
+
+
+def test_burst_then_steady_refill():
+    clock = FakeClock(1000.0)
+    limiter = RateLimiter("t", limit=3, window_seconds=30, store=MemoryRateLimitStore(clock=clock))
+
+    assert [_check(limiter, "ip:a")[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_after = _check(limiter, "ip:a")
+    assert not allowed
+    assert retry_after == 10.0
+
+    clock.now += 10
+    assert _check(limiter, "ip:a")[0]
+    assert not _check(limiter, "ip:a")[0]
+    assert _check(limiter, "ip:b")[0]
+
+
+def test_request_counts_against_every_key():
+    clock = FakeClock(1000.0)
+    limiter = RateLimiter("t", limit=2, window_seconds=60, store=MemoryRateLimitStore(clock=clock))
+
+    assert _check(limiter, "ip:a", "user:u")[0]
+    assert _check(limiter, "ip:b", "user:u")[0]
+    # user:u is exhausted, so ip:c must not be charged for the rejected request
+    assert not _check(limiter, "ip:c", "user:u")[0]
+    assert _check(limiter, "ip:c", None)[0]
+    assert _check(limiter, "ip:c")[0]
+    assert not _check(limiter, "ip:c")[0]
+
+
+def test_idle_keys_are_swept_and_memory_is_bounded():
+    clock = FakeClock(1000.0)
+    store = MemoryRateLimitStore(max_keys=5, sweep_seconds=10, clock=clock)
+    limiter = RateLimiter("t", limit=10, window_seconds=10, store=store)
+
+    for i in range(8):
+        _check(limiter, f"ip:{i}")
+    assert store.get_stats()["keys"] == 5
+    assert store.get_stats()["evicted_overflow"] == 3
+
+    clock.now += 11
+    _check(limiter, "ip:new")
+    stats = store.get_stats()
+    assert stats["keys"] == 1
+    assert stats["evicted_idle"] == 5
+
+
+def test_last_burst_slot_survives_float_rounding():
+    clock = FakeClock(1000.0)
+    # (now + 60) - now rounds to a hair above 60 here
+    clock.now = 8161.962517661547
+    limiter = RateLimiter("t", limit=1, window_seconds=60, store=MemoryRateLimitStore(clock=clock))
+    assert _check(limiter, "ip:a")[0]
+    assert not _check(limiter, "ip:a")[0]
+
+
+def test_redis_store_uses_script_and_falls_back_to_memory():
+    redis = FakeRedis()
+    limiter = RateLimiter("t", limit=5, window_seconds=60, store=RedisRateLimitStore("redis://test", client=redis))
+    assert _check(limiter, "ip:a", "user:u") == (False, 2.5)
+    assert redis.calls == [(2, ("tajir:rl:t:ip:a", "tajir:rl:t:user:u", 12.0, 60.0))]
+
+    down = RedisRateLimitStore("redis://test", client=FakeRedis(fail=True))
+    limiter = RateLimiter("t", limit=1, window_seconds=60, store=down)
+    assert _check(limiter, "ip:a")[0]
+    assert not _check(limiter, "ip:a")[0]
+    assert down.get_stats()["fallback_checks"] == 2
+
+
+def test_redis_store_cools_down_after_an_error():
+    clock = FakeClock(1000.0)
+    redis = FakeRedis(fail=True)
+    store = RedisRateLimitStore("redis://test", client=redis, retry_seconds=5, clock=clock)
+    limiter = RateLimiter("t", limit=5, window_seconds=60, store=store)
+    for _ in range(3):
+        assert _check(limiter, "ip:a")[0]
+    assert store.get_stats()["errors"] == 1
+    assert store.get_stats()["degraded"]
+
+    clock.now += 5
+    redis.fail = False
+    assert _check(limiter, "ip:a") == (False, 2.5)
+    assert len(redis.calls) == 1
+    assert not store.get_stats()["degraded"]
@@ -0,0 +1,58 @@
+import asyncio
+
+from app.services.rates_provider import RatesProvider, RatesSnapshot
+
+
+class _CountingProvider(RatesProvider):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self.fail = False
+
+    async def _fetch_usd_base(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return {"EUR": 0.9, "JPY": 150.0, "GBP": 0.8}
+
+
+def test_concurrent_callers_share_one_upstream_fetch():
+    provider = _CountingProvider(ttl_seconds=60)
+    seen = []
+    provider.subscribe(seen.append)
+
+    async def _run():
+        return await asyncio.gather(*(provider.get_snapshot() for _ in range(25)))
+
+    snapshots = asyncio.run(_run())
+
+    assert provider.calls == 1
+    assert {snapshot.version for snapshot in snapshots} == {1}
+    assert len(seen) == 1
+    assert provider.get_stats()["coalesced"] == 24
+
+
+def test_stale_snapshot_served_when_upstream_fails():
+    provider = _CountingProvider(ttl_seconds=60)
+
+    async def _run():
+        first = await provider.get_snapshot()
+        provider.fail = True
+        second = await provider.get_snapshot(max_age=0)
+        return first, second
+
+    first, second = asyncio.run(_run())
+
+    assert provider.calls == 2
+    assert second is first
+
+
+def test_snapshot_derives_cross_rates():
+    snapshot = RatesSnapshot(version=1, usd_base={"EUR": 0.5, "JPY": 150.0})
+
+    assert snapshot.cross("EUR/USD") == 2.0
+    assert snapshot.cross("USD/JPY") == 150.0
+    assert snapshot.cross("EUR/JPY") == 300.0
+    assert snapshot.cross("EUR/XXX") is None
+    assert snapshot.rates_for(["EUR/USD", "GBP/USD"]) == {"EUR/USD": 2.0}
@@ -0,0 +1,69 @@
+import pytest
+from firebase_admin import exceptions as firebase_exceptions
+
+from app.utils.token_cache import InvalidTokenError, VerifiedTokenCache
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _verifier(calls, exp_in=600):
+    def verify(token):
+        calls.append(token)
+        if token.startswith("bad"):
+            raise ValueError("Invalid token")
+        if token.startswith("down"):
+            raise firebase_exceptions.UnknownError("certificate fetch failed")
+        return {"uid": token.split("-")[0], "exp": 1_000_000 + exp_in}
+    return verify
+
+
+def test_claims_verified_once_until_exp():
+    calls, clock = [], Clock()
+    cache = VerifiedTokenCache(_verifier(calls), max_entries=10, max_ttl_seconds=3600, negative_ttl_seconds=30, clock=clock)
+
+    assert cache.verify("alice-token")["uid"] == "alice"
+    cache.verify("alice-token")["uid"] = "mutated"
+    assert cache.verify("alice-token")["uid"] == "alice"
+    assert len(calls) == 1
+
+    clock.now += 601  # past exp: verify again (and surface the verifier's verdict)
+    cache.verify("alice-token")
+    assert len(calls) == 2
+    assert "alice-token" not in str(cache._entries)
+
+
+def test_bad_tokens_are_negatively_cached_but_outages_are_not():
+    calls, clock = [], Clock()
+    cache = VerifiedTokenCache(_verifier(calls), max_entries=10, max_ttl_seconds=3600, negative_ttl_seconds=30, clock=clock)
+
+    with pytest.raises(ValueError):
+        cache.verify("bad-token")
+    with pytest.raises(InvalidTokenError):
+        cache.verify("bad-token")
+    assert len(calls) == 1
+    clock.now += 31
+    with pytest.raises(ValueError):
+        cache.verify("bad-token")
+    assert len(calls) == 2
+
+    for _ in range(2):
+        with pytest.raises(firebase_exceptions.UnknownError):
+            cache.verify("down-token")
+    assert len(calls) == 4
+
+
+def test_lru_bound():
+    calls = []
+    cache = VerifiedTokenCache(_verifier(calls), max_entries=2, max_ttl_seconds=3600, negative_ttl_seconds=30, clock=Clock())
+    for token in ("a-1", "b-1", "a-1", "c-1"):
+        cache.verify(token)
+    cache.verify("a-1")
+    cache.verify("b-1")
+    assert calls == ["a-1", "b-1", "c-1", "b-1"]
+    assert cache.get_stats()["evictions"] == 2
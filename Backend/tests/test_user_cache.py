@@ -0,0 +1,141 @@
+import asyncio
+
+from app.services.pubsub import InProcessPubSub, RedisPubSub
+from app.services.settings_service import SettingsService
+from app.services.user_cache import UserDataCache
+from app.utils.firestore_repository import FirestoreRepository
+
+from .fake_firestore import FakeFirestore
+from .fakes import FakeClock, FakeRedis
+from .test_websocket_topics import settle
+
+
+def _cache(**kwargs):
+    return UserDataCache(bus=kwargs.pop("bus", None) or InProcessPubSub(), **kwargs)
+
+
+def test_entries_expire_and_least_recently_used_are_evicted():
+    clock = FakeClock()
+    cache = _cache(max_entries=2, ttl_seconds=10, clock=clock)
+    cache.put("settings", "u1", {"theme": "dark"})
+    cache.put("settings", "u2", {"theme": "light"})
+    # Callers get copies; mutating one does not touch the cache
+    cache.get("settings", "u1")["theme"] = "mutated"
+    assert cache.get("settings", "u1") == {"theme": "dark"}
+
+    cache.put("settings", "u3", {})
+    assert cache.get("settings", "u2") is None
+    assert cache.get("settings", "u1") == {"theme": "dark"}
+
+    clock.now = 11
+    assert cache.get("settings", "u1", "expired") == "expired"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_concurrent_misses_share_one_load():
+    cache = _cache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"plan": "pro"}
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.get_or_load("subscription", "u1", loader) for _ in range(20)))
+        again = await cache.get_or_load("subscription", "u1", loader)
+        return results, again
+
+    results, again = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result == {"plan": "pro"} for result in results)
+    assert again == {"plan": "pro"}
+
+
+def test_cancelling_one_caller_does_not_fail_the_others():
+    cache = _cache()
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+            return {"plan": "pro"}
+
+        leader = asyncio.ensure_future(cache.get_or_load("subscription", "u1", loader))
+        follower = asyncio.ensure_future(cache.get_or_load("subscription", "u1", loader))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return leader, await follower
+
+    leader, result = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert result == {"plan": "pro"}
+    assert cache.get("subscription", "u1") == {"plan": "pro"}
+
+
+def test_invalidation_during_a_load_is_not_overwritten_by_the_stale_value():
+    cache = _cache()
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow_loader():
+            await release.wait()
+            return "stale"
+
+        load = asyncio.ensure_future(cache.get_or_load("header", "u1", slow_loader))
+        await asyncio.sleep(0)
+        cache.invalidate("header", "u1")
+        release.set()
+        assert await load == "stale"
+
+    asyncio.run(scenario())
+    assert cache.get("header", "u1") is None
+
+
+def test_invalidation_reaches_every_worker_over_the_bus():
+    async def scenario():
+        server = FakeRedis()
+        first = _cache(bus=RedisPubSub("redis://fake", client=server))
+        second = _cache(bus=RedisPubSub("redis://fake", client=server))
+        await first.start()
+        await second.start()
+        for cache in (first, second):
+            cache.put("settings", "u1", {"theme": "dark"})
+
+        first.invalidate("settings", "u1")
+        await settle()
+        seen = first.get("settings", "u1"), second.get("settings", "u1")
+        stats = first.get_stats(), second.get_stats()
+        await first.stop()
+        await second.stop()
+        return seen, stats
+
+    seen, (first_stats, second_stats) = asyncio.run(scenario())
+    assert seen == (None, None)
+    assert first_stats["remote_invalidations"] == 0
+    assert second_stats["remote_invalidations"] == 1
+
+
+def test_settings_are_served_from_memory_until_written():
+    db = FakeFirestore()
+    repo = FirestoreRepository(client_factory=lambda: db, max_workers=2)
+    service = SettingsService(repo=repo, cache=_cache())
+
+    async def scenario():
+        await service.update_settings("u1", {"theme": "dark"})
+        reads = db.reads
+        for _ in range(5):
+            assert (await service.get_settings("u1"))["settings"] == {"theme": "dark"}
+        cached_reads = db.reads - reads
+        await service.update_settings("u1", {"lang": "en"})
+        latest = await service.get_settings("u1")
+        return cached_reads, latest
+
+    cached_reads, latest = asyncio.run(scenario())
+    repo.shutdown()
+    assert cached_reads == 0
+    assert latest["settings"] == {"theme": "dark", "lang": "en"}
@@ -0,0 +1,270 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.enhanced_websocket_manager import EnhancedWebSocketManager, normalize_topic
+from app.services.ws_codec import TICK_STRUCT, negotiate_encoding
+from app.services.ws_outbox import ConnectionOutbox
+
+
+async def settle():
+    # Let the per-connection writer tasks drain their outboxes.
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def send_text(self, data):
+        self.sent.append(json.loads(data))
+
+    def topics(self):
+        return [message.get("topic") for message in self.sent if message.get("topic")]
+
+
+TICK = {
+    "timestamp": "2026-01-01T00:00:00",
+    "rates": {"EUR/USD": 1.1, "USD/JPY": 150.0},
+    "news": [{"title": "CPI"}],
+    "sentiment": {"overall": "bullish"},
+    "type": "live_update",
+}
+
+
+def test_normalize_topic():
+    assert normalize_topic("rates:eurusd") == "rates:EUR/USD"
+    assert normalize_topic("rates:EUR-USD") == "rates:EUR/USD"
+    assert normalize_topic("NEWS") == "news"
+    assert normalize_topic("orders:EUR/USD") is None
+    assert normalize_topic("rates:EURO") is None
+
+
+def test_updates_reach_only_their_subscribers():
+    async def run():
+        manager = EnhancedWebSocketManager()
+        legacy, eur, news = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(legacy, "global", user_id="u1")
+        await manager.connect(eur, "global", user_id="u2", topics=["rates:EUR/USD"])
+        await manager.connect(news, "global", user_id="u3")
+        assert await manager.handle_control_message(news, json.dumps({"action": "subscribe", "topics": ["news", "bogus"]}))
+        await settle()
+        assert news.sent[-1]["topics"] == ["news"]
+
+        await manager.send_forex_update(TICK)
+        await settle()
+
+        assert legacy.topics() == ["forex"]
+        assert legacy.sent[-1]["data"] == TICK
+        assert eur.topics() == ["rates:EUR/USD"]
+        assert eur.sent[-1]["data"]["rate"] == 1.1
+        assert news.topics() == ["news"]
+
+        await manager.handle_control_message(eur, json.dumps({"action": "unsubscribe", "topics": ["rates:EUR/USD"]}))
+        await settle()
+        before = len(eur.sent)
+        await manager.send_forex_update(TICK)
+        await settle()
+        assert len(eur.sent) == before
+
+        manager.disconnect(news)
+        assert "news" not in manager.topic_subscribers
+        assert not await manager.handle_control_message(legacy, "hello")
+
+    asyncio.run(run())
+
+
+def test_notifications_go_to_owner_only():
+    async def run():
+        manager = EnhancedWebSocketManager()
+        alice, bob = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(alice, "global", user_id="alice")
+        await manager.connect(bob, "global", user_id="bob", topics=["rates"])
+
+        await manager.send_to_user("alice", "Hi", update_type="notification", data={"id": 1})
+        await settle()
+
+        assert alice.topics() == ["notifications"]
+        assert bob.topics() == []
+
+    asyncio.run(run())
+
+
+class StalledWebSocket(FakeWebSocket):
+    """Accepts the connection, then never finishes a send"""
+
+    async def send_text(self, data):
+        await asyncio.Event().wait()
+
+
+def test_broadcast_encodes_once_and_drops_slow_consumers(monkeypatch):
+    monkeypatch.setenv("WS_SEND_QUEUE_MAX", "4")
+
+    async def run():
+        manager = EnhancedWebSocketManager()
+        fast, slow = FakeWebSocket(), StalledWebSocket()
+        await manager.connect(fast, "global")
+        await manager.connect(slow, "global")
+        await settle()
+        messages_before = manager.get_stats()["messages"]
+
+        for i in range(6):
+            await manager.broadcast(f"tick {i}")
+            await settle()
+
+        stats = manager.get_stats()
+        assert stats["messages"] - messages_before == 6
+        assert [m["message"] for m in fast.sent[1:]] == [f"tick {i}" for i in range(6)]
+        assert stats["slow_consumers_dropped"] == 1
+        assert slow not in manager.all_connections
+        assert slow.closed_with == 1013
+        assert fast in manager.all_connections
+
+    asyncio.run(run())
+
+
+class GatedWebSocket(FakeWebSocket):
+    """Holds every send until the gate opens"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = asyncio.Event()
+
+    async def send_text(self, data):
+        await self.gate.wait()
+        await super().send_text(data)
+
+
+def test_lagging_client_gets_latest_rates_and_ordered_task_updates(monkeypatch):
+    monkeypatch.setenv("WS_SEND_QUEUE_MAX", "8")
+
+    async def run():
+        manager = EnhancedWebSocketManager()
+        client = GatedWebSocket()
+        await manager.connect(client, "task-1", topics=["rates:EUR/USD", "rates:USD/JPY"])
+
+        for i in range(50):
+            await manager.send_forex_update({"timestamp": str(i), "rates": {"EUR/USD": 1.0 + i, "USD/JPY": 100.0 + i}})
+            if i % 10 == 0:
+                await manager.send_task_progress("task-1", "step", i / 50, f"progress {i}")
+
+        assert client in manager.all_connections
+        client.gate.set()
+        await settle()
+
+        rates = [m["data"] for m in client.sent if m.get("topic", "").startswith("rates:")]
+        progress = [m["message"] for m in client.sent if m.get("type") == "progress"]
+        assert {(r["pair"], r["rate"]) for r in rates} == {("EUR/USD", 50.0), ("USD/JPY", 149.0)}
+        assert len(rates) == 2
+        assert progress == [f"step: progress {i}" for i in range(0, 50, 10)]
+        assert manager.get_stats()["conflated_frames"] == 98
+
+    asyncio.run(run())
+
+
+def test_only_ordered_frames_count_toward_the_outbox_limit():
+    async def run():
+        client = GatedWebSocket()
+        outbox = ConnectionOutbox(client, on_failure=lambda ws: None, max_size=2)
+        frame = lambda value: json.dumps({"v": value})
+        assert outbox.put(frame("progress 1")) and outbox.put(frame("progress 2"))
+        assert outbox.put(frame("eur 1"), key="rates:EUR/USD")
+        assert outbox.put(frame("jpy 1"), key="rates:USD/JPY")
+        assert outbox.put(frame("eur 2"), key="rates:EUR/USD")
+        assert not outbox.put(frame("progress 3"))
+
+        client.gate.set()
+        await settle()
+        assert [m["v"] for m in client.sent] == ["progress 1", "progress 2", "eur 2", "jpy 1"]
+        assert outbox.put(frame("progress 3"))
+        outbox.close()
+
+    asyncio.run(run())
+
+
+def test_reconnect_since_replays_missed_updates(monkeypatch):
+    monkeypatch.setenv("WS_REPLAY_BUFFER", "4")
+
+    async def run():
+        manager = EnhancedWebSocketManager()
+        first = FakeWebSocket()
+        await manager.connect(first, "task-9", user_id="u1", topics=["rates:EUR/USD"])
+        await manager.send_task_progress("task-9", "fetch", 0.1, "started")
+        await settle()
+        last_seen = first.sent[-1]["seq"]
+        manager.disconnect(first)
+
+        # Missed while offline: task progress and several ticks
+        await manager.send_task_progress("task-9", "fetch", 0.5, "half")
+        await manager.send_task_progress("task-9", "fetch", 0.9, "almost")
+        for rate in (1.1, 1.2):
+            await manager.connect(FakeWebSocket(), "global", topics=["rates:EUR/USD"])
+            await manager.send_forex_update({"timestamp": "t", "rates": {"EUR/USD": rate}})
+
+        resumed = FakeWebSocket()
+        await manager.connect(resumed, "task-9", user_id="u1", topics=["rates:EUR/USD"], since=last_seen)
+        await settle()
+
+        replayed = resumed.sent[1:]
+        assert [m.get("progress") for m in replayed if m.get("type") == "progress"] == [0.5, 0.9]
+        assert [m["data"]["rate"] for m in replayed if m.get("topic") == "rates:EUR/USD"] == [1.2]
+        assert all(m["seq"] > last_seen for m in replayed)
+        assert [m["seq"] for m in replayed] == sorted(m["seq"] for m in replayed)
+
+        # Too far behind: the ring (4 frames) no longer covers the gap
+        for i in range(6):
+            await manager.send_task_progress("task-9", "fetch", 1.0, f"step {i}")
+        late = FakeWebSocket()
+        await manager.connect(late, "task-9", since=last_seen)
+        await settle()
+        assert late.sent[1]["type"] == "replay_gap"
+        assert late.sent[1]["topic"] == "task:task-9"
+        assert len([m for m in late.sent if m.get("type") == "progress"]) == 4
+
+    asyncio.run(run())
+
+
+def test_compact_encodings_for_rate_ticks():
+    import msgpack
+
+    offered = SimpleNamespace(scope={"subprotocols": ["forex-binary.v1"]}, query_params={})
+    assert negotiate_encoding(offered) == ("binary", "forex-binary.v1")
+    queried = SimpleNamespace(scope={}, query_params={"encoding": "MsgPack"})
+    assert negotiate_encoding(queried) == ("msgpack", None)
+    assert negotiate_encoding(SimpleNamespace(scope={}, query_params={"encoding": "xml"})) == ("json", None)
+
+    class BytesWebSocket(FakeWebSocket):
+        async def send_bytes(self, data):
+            self.sent.append(data)
+
+    async def run():
+        manager = EnhancedWebSocketManager()
+        plain, packed, binary = FakeWebSocket(), BytesWebSocket(), BytesWebSocket()
+        await manager.connect(plain, "global", topics=["rates:EUR/USD"])
+        await manager.connect(packed, "global", topics=["rates:EUR/USD"], encoding="msgpack")
+        await manager.connect(binary, "global", topics=["rates:USD/JPY", "rates:EUR/USD"], encoding="binary")
+        await manager.send_forex_update({"timestamp": "2026-01-01T00:00:00+00:00", "rates": {"EUR/USD": 1.1, "USD/JPY": 150.25}})
+        await settle()
+
+        assert plain.sent[-1]["data"]["rate"] == 1.1
+        assert msgpack.unpackb(packed.sent[-1])["data"]["rate"] == 1.1
+
+        pair_ids = binary.sent[0]["data"]["pair_ids"]
+        ticks = [TICK_STRUCT.unpack(frame) for frame in binary.sent[1:]]
+        assert all(len(frame) == TICK_STRUCT.size == 35 for frame in binary.sent[1:])
+        by_pair = {pair: tick for pair, pair_id in pair_ids.items() for tick in ticks if tick[1] == pair_id}
+        assert by_pair["USD/JPY"][2:5] == (150.25, 150.25, 1767225600000)
+        assert by_pair["EUR/USD"][5] > 0
+
+    asyncio.run(run())